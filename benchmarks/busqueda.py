@@ -0,0 +1,69 @@
+"""
+Benchmark del índice de búsqueda de productos
+
+Genera un catálogo sintético con nombres en español y mide el tiempo de
+construcción del índice y la mediana por búsqueda (subcadena, varias
+palabras, con acentos y difusa). No necesita base de datos.
+
+Uso:
+    python benchmarks/busqueda.py --productos 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.search_index import ProductSearchIndex
+
+NOMBRES = ["Papel", "Tóner", "Cartucho", "Grapadora", "Carpeta", "Engargolado", "Cuaderno",
+           "Cañón", "Bolígrafo", "Etiqueta", "Sobre", "Micas", "Espiral", "Cinta"]
+DETALLES = ["A4", "Carta", "Oficio", "Negro", "Color", "HP", "Brother", "Xerox", "75g", "90g",
+            "Azul", "Rojo", "Tamaño Infantil", "Reciclado", "Económico"]
+TIPOS = ["papel", "toner", "encuadernacion", "otro"]
+
+BUSQUEDAS = ["pa", "toner", "TONER negro", "canon", "cuaderno reciclado", "tonr", "grapdora", "zzzz"]
+
+
+def catalogo(total, seed=7):
+    rng = random.Random(seed)
+    return [{
+        "id_producto": i,
+        "nombre": f"{rng.choice(NOMBRES)} {rng.choice(DETALLES)} {rng.choice(DETALLES)} {i}",
+        "tipo": rng.choice(TIPOS),
+        "cantidad": rng.randint(0, 5000)
+    } for i in range(1, total + 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del índice de búsqueda")
+    parser.add_argument("--productos", type=int, default=5000, help="Tamaño del catálogo")
+    parser.add_argument("--runs", type=int, default=200, help="Repeticiones por búsqueda")
+    args = parser.parse_args(argv)
+
+    rows = catalogo(args.productos)
+    index = ProductSearchIndex()
+    inicio = time.perf_counter()
+    index.sync(rows)
+    print(f"🔨 Índice de {len(index):,} productos construido en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    inicio = time.perf_counter()
+    index.sync([{**row, "cantidad": row["cantidad"] + 1} for row in rows])
+    print(f"🔄 Sincronización tras cambios de stock: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    print(f"{'búsqueda':<22} {'filas':>7} {'mediana µs':>11}")
+    for query in BUSQUEDAS:
+        times = []
+        for _ in range(args.runs):
+            inicio = time.perf_counter_ns()
+            result = index.search(query)
+            times.append((time.perf_counter_ns() - inicio) / 1000)
+        print(f"{query:<22} {len(result):>7,} {statistics.median(times):>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""
+Prueba de concurrencia y latencia del registro de movimientos
+
+Crea una base de datos aparte con un producto, lanza muchos hilos que
+registran salidas del mismo producto a la vez y comprueba que el stock final
+cuadra con los movimientos aceptados y nunca queda negativo. Compara tres
+formas de registrar:
+
+- procedimiento: DatabaseConnection.register_movement con el procedimiento
+  registrar_movimiento (migración 0008), un viaje por movimiento
+- transaccion: el mismo método sin el procedimiento (SELECT ... FOR UPDATE,
+  INSERT y lectura del stock en una transacción)
+- sin_bloqueo: consulta del stock e INSERT por separado, como se hacía antes;
+  sirve para ver la carrera que deja el stock negativo
+
+    python benchmarks/concurrencia_movimientos.py --hilos 32 --movimientos 200 --stock 4000
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import get_db_config
+from src.migrations import discover_migrations
+from src.pool import ConnectionPoolManager, percentile
+
+MODES = ("procedimiento", "transaccion", "sin_bloqueo")
+
+# Tablas mínimas del esquema base (productos, stock, movimientos y el trigger de stock)
+DDL = [
+    """
+    CREATE TABLE productos (
+        id_producto INT AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        tipo ENUM('papel', 'toner', 'encuadernacion', 'otro') NOT NULL,
+        precio_unitario DECIMAL(10,2) DEFAULT 0.00
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE stock (
+        id_stock INT AUTO_INCREMENT PRIMARY KEY,
+        producto_id INT NOT NULL,
+        cantidad INT NOT NULL DEFAULT 0,
+        ubicacion VARCHAR(100) DEFAULT 'Almacen Principal',
+        ultima_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_stock_producto (producto_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE movimientos (
+        id_movimiento INT AUTO_INCREMENT PRIMARY KEY,
+        producto_id INT NOT NULL,
+        tipo ENUM('entrada', 'salida') NOT NULL,
+        cantidad INT NOT NULL CHECK (cantidad > 0),
+        fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+        responsable VARCHAR(100) NOT NULL,
+        motivo TEXT
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TRIGGER actualizar_stock_despues_movimiento
+    AFTER INSERT ON movimientos
+    FOR EACH ROW
+    UPDATE stock
+    SET cantidad = cantidad + IF(NEW.tipo = 'entrada', NEW.cantidad, -NEW.cantidad),
+        ultima_actualizacion = NOW()
+    WHERE producto_id = NEW.producto_id
+    """
+]
+
+
+def register_without_lock(db, producto_id, cantidad):
+    """Comprobación y alta por separado: dos hilos pueden pasar la misma comprobación"""
+    stock = db.fetch_one("SELECT cantidad FROM stock WHERE producto_id = %s", (producto_id,),
+                         use_cache=False, use_primary=True)
+    if stock["cantidad"] < cantidad:
+        return {"status": "no_stock"}
+    db.execute_query("INSERT INTO movimientos (producto_id, tipo, cantidad, responsable, motivo) "
+                     "VALUES (%s, 'salida', %s, 'Benchmark', 'Concurrencia')", (producto_id, cantidad))
+    return {"status": "ok"}
+
+
+def run_mode(db, mode, threads, per_thread, initial_stock):
+    """Lanza los hilos contra el mismo producto y verifica el resultado"""
+    db.execute_query("DELETE FROM movimientos")
+    db.execute_query("UPDATE stock SET cantidad = %s WHERE producto_id = 1", (initial_stock,))
+    db.set_movement_procedure(mode != "transaccion")
+
+    latencies, statuses, errors = [], {"ok": 0, "no_stock": 0, "no_product": 0}, []
+    lock = threading.Lock()
+    start_event = threading.Event()
+
+    def worker():
+        local_latencies, local_statuses = [], []
+        start_event.wait()
+        for _ in range(per_thread):
+            inicio = time.perf_counter()
+            try:
+                if mode == "sin_bloqueo":
+                    result = register_without_lock(db, 1, 1)
+                else:
+                    result = db.register_movement(1, "salida", 1, "Benchmark", "Concurrencia")
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            local_latencies.append((time.perf_counter() - inicio) * 1000)
+            local_statuses.append(result["status"])
+        with lock:
+            latencies.extend(local_latencies)
+            for status in local_statuses:
+                statuses[status] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    inicio = time.perf_counter()
+    start_event.set()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - inicio
+
+    final = db.fetch_one("SELECT cantidad FROM stock WHERE producto_id = 1", use_cache=False, use_primary=True)
+    salidas = db.fetch_one("SELECT COUNT(*) AS total, COALESCE(SUM(cantidad), 0) AS unidades FROM movimientos",
+                           use_cache=False, use_primary=True)
+    expected = initial_stock - int(salidas["unidades"])
+    latencies.sort()
+    return {
+        "aceptados": statuses["ok"],
+        "rechazados": statuses["no_stock"],
+        "errores": len(errors),
+        "stock_final": final["cantidad"],
+        "correcto": final["cantidad"] == expected and final["cantidad"] >= 0
+                    and salidas["total"] == statuses["ok"],
+        "mediana_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": percentile(latencies, 0.95),
+        "movimientos_por_s": (statuses["ok"] + statuses["no_stock"]) / elapsed if elapsed else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrencia del registro de movimientos")
+    parser.add_argument("--hilos", type=int, default=32, help="Hilos simultáneos")
+    parser.add_argument("--movimientos", type=int, default=200, help="Salidas por hilo")
+    parser.add_argument("--stock", type=int, default=4000, help="Stock inicial (menor que el total para agotarlo)")
+    parser.add_argument("--modos", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--database", default="sgi_bench_concurrencia", help="Base de datos de la prueba")
+    args = parser.parse_args(argv)
+
+    base_config = {key: value for key, value in get_db_config().items() if key != "database"}
+    admin = ConnectionPoolManager({**base_config, "autocommit": True}, min_size=0, max_size=1,
+                                  name="bench_admin_pool")
+    connection = admin.get_connection()
+    cursor = connection.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    cursor.execute(f"CREATE DATABASE `{args.database}` CHARACTER SET utf8mb4")
+    cursor.execute(f"USE `{args.database}`")
+    for statement in DDL:
+        cursor.execute(statement)
+    migration = next(m for m in discover_migrations() if m.version == 8)
+    for statement in migration.statements():
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO productos (nombre, tipo, precio_unitario) VALUES ('Papel benchmark', 'papel', 1)")
+    cursor.execute("INSERT INTO stock (producto_id, cantidad) VALUES (1, 0)")
+
+    # El singleton lee la configuración del entorno al crearse
+    os.environ["DB_NAME"] = args.database
+    os.environ["DB_POOL_MAX"] = str(args.hilos + 1)
+    from src.database import DatabaseConnection
+    db = DatabaseConnection()
+    db.disable_result_cache()
+
+    total = args.hilos * args.movimientos
+    print(f"🧵 {args.hilos} hilos × {args.movimientos} salidas = {total:,} intentos sobre stock {args.stock:,}")
+    print(f"{'modo':<15} {'aceptados':>10} {'rechazados':>11} {'errores':>8} {'stock final':>12} "
+          f"{'mediana ms':>11} {'p95 ms':>8} {'mov/s':>8}  resultado")
+    failed = False
+    try:
+        for mode in args.modos:
+            result = run_mode(db, mode, args.hilos, args.movimientos, args.stock)
+            failed |= mode != "sin_bloqueo" and not result["correcto"]
+            print(f"{mode:<15} {result['aceptados']:>10,} {result['rechazados']:>11,} {result['errores']:>8} "
+                  f"{result['stock_final']:>12,} {result['mediana_ms']:>11.2f} {result['p95_ms']:>8.2f} "
+                  f"{result['movimientos_por_s']:>8.0f}  {'✅' if result['correcto'] else '❌'}")
+    finally:
+        db.close_all_connections()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        cursor.close()
+        connection.close()
+        admin.close_all()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
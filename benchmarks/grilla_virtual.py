@@ -0,0 +1,254 @@
+"""
+Benchmark de la tabla virtual con un catálogo grande
+
+Con un catálogo sintético (100.000 filas por defecto) compara la tabla de
+stock clásica (borrar todos los elementos e insertar uno por fila) con
+VirtualTreeview, que solo dibuja las filas visibles:
+
+- carga inicial y refresco completo
+- desplazamiento a posiciones aleatorias (tiempo por dibujado)
+- orden por columna en el modelo en memoria
+
+Con --db mide además la paginación en el servidor de la tabla de productos:
+crea una base de datos aparte con el catálogo, aplica los índices de las
+migraciones 0002 y 0009 y cronometra el conteo y las páginas a distintas
+profundidades para cada orden. La base se elimina al terminar.
+
+Necesita una pantalla para Tk (la parte de base de datos no).
+
+Uso:
+    python benchmarks/grilla_virtual.py --filas 100000
+    python benchmarks/grilla_virtual.py --filas 100000 --db --sin-clasica
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.virtual_grid import ListRowSource, QueryRowSource, VirtualTreeview
+
+COLUMNS = ("id", "producto", "tipo", "cantidad", "ubicacion", "precio", "valor_total", "estado")
+SORT_KEYS = {"id": "id_producto", "producto": "nombre", "tipo": "tipo", "cantidad": "cantidad",
+             "ubicacion": "ubicacion", "precio": "precio_unitario", "valor_total": "valor_total",
+             "estado": "estado"}
+NOMBRES = ["Papel", "Tóner", "Cartucho", "Grapadora", "Carpeta", "Engargolado", "Cuaderno", "Cañón"]
+DETALLES = ["A4", "Carta", "Oficio", "Negro", "Color", "HP", "Brother", "Xerox", "75g", "90g"]
+TIPOS = ["papel", "toner", "encuadernacion", "otro"]
+PRODUCT_SORTS = {"id": "id_producto", "nombre": "nombre", "tipo": "tipo", "precio": "precio_unitario"}
+
+
+def catalogo(total, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(1, total + 1):
+        cantidad = rng.randint(0, 5000)
+        precio = round(rng.uniform(1, 900), 2)
+        rows.append({
+            "id_producto": i,
+            "nombre": f"{rng.choice(NOMBRES)} {rng.choice(DETALLES)} {rng.choice(DETALLES)} {i}",
+            "tipo": rng.choice(TIPOS),
+            "cantidad": cantidad,
+            "ubicacion": f"Campus {rng.randint(1, 6)}",
+            "precio_unitario": precio,
+            "valor_total": cantidad * precio,
+            "estado": "CRÍTICO" if cantidad < 100 else "NORMAL"
+        })
+    return rows
+
+
+def row_values(row):
+    """Mismo formato que la tabla de stock de la aplicación"""
+    return (row["id_producto"], row["nombre"], row["tipo"].capitalize(), row["cantidad"], row["ubicacion"],
+            f"${row['precio_unitario']:,.2f}", f"${row['valor_total']:,.2f}",
+            row["estado"]), ("critical" if row["estado"] == "CRÍTICO" else "normal",)
+
+
+def make_tree(root):
+    from tkinter import ttk
+    frame = ttk.Frame(root)
+    frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(frame, columns=COLUMNS, show="headings")
+    for column in COLUMNS:
+        tree.heading(column, text=column.capitalize())
+    scrollbar = ttk.Scrollbar(frame, orient="vertical")
+    tree.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+    root.update()
+    return frame, tree, scrollbar
+
+
+def ms(inicio):
+    return (time.perf_counter() - inicio) * 1000
+
+
+def bench_widgets(rows, scrolls, classic):
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"⚠️ Sin pantalla para Tk, se omite la parte de la interfaz: {e}")
+        return
+    root.geometry("1100x700")
+
+    print(f"{'tabla':<10} {'carga ms':>10} {'refresco ms':>12} {'elementos':>10} "
+          f"{'despl. mediana ms':>18} {'orden ms':>9}")
+
+    if classic:
+        frame, tree, scrollbar = make_tree(root)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.configure(command=tree.yview)
+
+        def fill():
+            for item in tree.get_children():
+                tree.delete(item)
+            for row in rows:
+                values, tags = row_values(row)
+                tree.insert("", tk.END, values=values, tags=tags)
+            root.update_idletasks()
+
+        inicio = time.perf_counter()
+        fill()
+        carga = ms(inicio)
+        inicio = time.perf_counter()
+        fill()
+        refresco = ms(inicio)
+        rng = random.Random(1)
+        times = []
+        for _ in range(scrolls):
+            inicio = time.perf_counter()
+            tree.yview_moveto(rng.random())
+            root.update_idletasks()
+            times.append(ms(inicio))
+        print(f"{'clásica':<10} {carga:>10.1f} {refresco:>12.1f} {len(tree.get_children()):>10,} "
+              f"{statistics.median(times):>18.3f} {'-':>9}")
+        frame.destroy()
+        root.update()
+
+    frame, tree, scrollbar = make_tree(root)
+    grid = VirtualTreeview(tree, scrollbar, ListRowSource(sort_keys=SORT_KEYS), row_values,
+                           key="id_producto")
+    inicio = time.perf_counter()
+    grid.set_rows(rows)
+    root.update_idletasks()
+    carga = ms(inicio)
+    root.update()
+    inicio = time.perf_counter()
+    grid.set_rows(rows)
+    root.update_idletasks()
+    refresco = ms(inicio)
+    rng = random.Random(1)
+    times = []
+    for _ in range(scrolls):
+        inicio = time.perf_counter()
+        grid.yview("moveto", rng.random())
+        root.update_idletasks()
+        times.append(ms(inicio))
+    inicio = time.perf_counter()
+    grid.sort_by("producto")
+    root.update_idletasks()
+    orden = ms(inicio)
+    print(f"{'virtual':<10} {carga:>10.1f} {refresco:>12.1f} {len(tree.get_children()):>10,} "
+          f"{statistics.median(times):>18.3f} {orden:>9.1f}")
+    root.destroy()
+
+
+def bench_server_paging(rows, database, page_size):
+    from src.database import get_db_config
+    from src.migrations import discover_migrations
+    from src.pool import ConnectionPoolManager
+
+    base_config = {key: value for key, value in get_db_config().items() if key != "database"}
+    admin = ConnectionPoolManager({**base_config, "autocommit": True}, min_size=0, max_size=1,
+                                  name="bench_admin_pool")
+    connection = admin.get_connection()
+    cursor = connection.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}` CHARACTER SET utf8mb4")
+    cursor.execute(f"USE `{database}`")
+    try:
+        cursor.execute("""
+            CREATE TABLE productos (
+                id_producto INT AUTO_INCREMENT PRIMARY KEY,
+                nombre VARCHAR(100) NOT NULL,
+                tipo ENUM('papel', 'toner', 'encuadernacion', 'otro') NOT NULL,
+                precio_unitario DECIMAL(10,2) DEFAULT 0.00
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+        for migration in discover_migrations():
+            if migration.version in (2, 9):
+                for statement in migration.statements():
+                    cursor.execute(statement)
+        for start in range(0, len(rows), 5000):
+            cursor.executemany(
+                "INSERT INTO productos (id_producto, nombre, tipo, precio_unitario) VALUES (%s, %s, %s, %s)",
+                [(r["id_producto"], r["nombre"], r["tipo"], r["precio_unitario"])
+                 for r in rows[start:start + 5000]])
+        cursor.execute("ANALYZE TABLE productos")
+        cursor.fetchall()
+
+        # El singleton lee la configuración del entorno al crearse
+        os.environ["DB_NAME"] = database
+        from src.database import DatabaseConnection
+        db = DatabaseConnection()
+        db.disable_result_cache()
+        source = QueryRowSource(db, "SELECT id_producto, nombre, tipo, precio_unitario FROM productos",
+                                PRODUCT_SORTS, default_order="nombre", key="id_producto")
+
+        inicio = time.perf_counter()
+        total = source.count()
+        print(f"\n🗄️  Paginación en el servidor: {total:,} productos, COUNT(*) en {ms(inicio):.1f} ms")
+        offsets = [0, total // 2, max(0, total - page_size)]
+        print(f"{'orden':<14} " + " ".join(f"{'página @' + format(o, ','):>16}" for o in offsets))
+        for column in (None, "id", "tipo", "precio"):
+            for descending in ((False,) if column is None else (False, True)):
+                source.sort(column, descending)
+                cells = []
+                for offset in offsets:
+                    times = []
+                    for _ in range(5):
+                        inicio = time.perf_counter()
+                        source.fetch(offset, page_size)
+                        times.append(ms(inicio))
+                    cells.append(f"{statistics.median(times):>13.2f} ms")
+                label = "nombre" if column is None else f"{column} {'desc' if descending else 'asc'}"
+                print(f"{label:<14} " + " ".join(cells))
+        db.close_all_connections()
+    finally:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.close()
+        connection.close()
+        admin.close_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la tabla virtual")
+    parser.add_argument("--filas", type=int, default=100000, help="Filas del catálogo")
+    parser.add_argument("--desplazamientos", type=int, default=200, help="Saltos aleatorios medidos")
+    parser.add_argument("--sin-clasica", action="store_true", help="No medir la tabla clásica (lenta)")
+    parser.add_argument("--db", action="store_true", help="Medir también la paginación en el servidor")
+    parser.add_argument("--pagina", type=int, default=200, help="Filas por página remota")
+    parser.add_argument("--database", default="sgi_bench_grilla", help="Base de datos de la prueba")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    rows = catalogo(args.filas)
+    print(f"📦 Catálogo de {len(rows):,} filas generado en {ms(inicio):.0f} ms")
+
+    source = ListRowSource(rows, SORT_KEYS)
+    for column in ("producto", "cantidad", "valor_total"):
+        inicio = time.perf_counter()
+        source.sort(column)
+        print(f"🔃 Orden en memoria por {column}: {ms(inicio):.1f} ms")
+
+    bench_widgets(rows, args.desplazamientos, not args.sin_clasica)
+    if args.db:
+        bench_server_paging(rows, args.database, args.pagina)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
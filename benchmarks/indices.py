@@ -0,0 +1,147 @@
+"""
+Benchmark de las consultas de la interfaz antes y después de cada migración
+
+Mide las consultas que lanza la GUI (stock, búsqueda, últimos movimientos,
+reporte de consumo, exportación de movimientos, alertas y barra de estado),
+aplica las migraciones pendientes de una en una y vuelve a medir tras cada
+una, mostrando la mediana y el plan (EXPLAIN) antes y después.
+
+Las migraciones se aplican de verdad: conviene lanzarlo sobre una copia con
+volumen realista, por ejemplo restaurando un backup en otra base de datos:
+
+    python -m src.backup restore backups/<backup> --database inventario_bench
+    DB_NAME=inventario_bench python benchmarks/indices.py --runs 20
+
+Sin migraciones pendientes solo se mide el estado actual.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import DatabaseConnection
+from src.migrations import MigrationRunner, discover_migrations
+
+QUERIES = {
+    "stock": ("""
+        SELECT p.id_producto, p.nombre, p.tipo, s.cantidad, s.ubicacion, p.precio_unitario
+        FROM productos p
+        JOIN stock s ON p.id_producto = s.producto_id
+        ORDER BY p.nombre
+        """, None),
+    # Mismo filtro que la búsqueda de la GUI sin índice en memoria (subcadena,
+    # sin índice posible); s.estado se omite porque no existe antes de la 0006
+    "busqueda": ("""
+        SELECT p.id_producto, p.nombre, p.tipo, s.cantidad, s.ubicacion,
+               p.precio_unitario,
+               (s.cantidad * p.precio_unitario) as valor_total
+        FROM productos p
+        JOIN stock s ON p.id_producto = s.producto_id
+        WHERE LOWER(p.nombre) LIKE %s OR LOWER(p.tipo) LIKE %s
+        ORDER BY p.nombre
+        """, ("%papel%", "%papel%")),
+    "ultimos_movimientos": ("""
+        SELECT m.id_movimiento, p.nombre, m.tipo, m.cantidad, m.fecha, m.responsable
+        FROM movimientos m
+        JOIN productos p ON m.producto_id = p.id_producto
+        ORDER BY m.fecha DESC
+        LIMIT 50
+        """, None),
+    "consumo": ("""
+        SELECT p.nombre, p.tipo, SUM(m.cantidad) as total_consumido,
+               COUNT(*) as num_movimientos
+        FROM movimientos m
+        JOIN productos p ON m.producto_id = p.id_producto
+        WHERE m.tipo = 'salida'
+        GROUP BY p.id_producto
+        ORDER BY total_consumido DESC
+        LIMIT 10
+        """, None),
+    "movimientos_producto": ("""
+        SELECT fecha, tipo, cantidad
+        FROM movimientos
+        WHERE producto_id = %s AND tipo = 'salida'
+        ORDER BY fecha DESC
+        LIMIT 100
+        """, (1,)),
+    "exportacion_movimientos": ("""
+        SELECT m.id_movimiento, m.fecha
+        FROM movimientos m
+        ORDER BY m.fecha DESC, m.id_movimiento DESC
+        LIMIT 5000
+        """, None),
+    "alertas": ("SELECT * FROM vista_alertas_stock", None),
+    "resumen_barra_estado": ("""
+        SELECT SUM(s.cantidad * p.precio_unitario) as valor_total, COUNT(*) as total_productos
+        FROM stock s
+        JOIN productos p ON s.producto_id = p.id_producto
+        """, None)
+}
+
+
+def measure(db, runs):
+    """Mediana en ms y plan resumido de cada consulta"""
+    results = {}
+    for name, (query, params) in QUERIES.items():
+        times = []
+        for _ in range(runs):
+            inicio = time.perf_counter()
+            db.fetch_all(query, params, use_cache=False, use_primary=True)
+            times.append((time.perf_counter() - inicio) * 1000)
+        plan = db.fetch_all("EXPLAIN " + query, params, use_cache=False, use_primary=True)
+        results[name] = {
+            "median_ms": statistics.median(times),
+            "plan": [f"{row['table']}:{row['type']}:{row['key'] or '-'}"
+                     f"{' filesort' if 'filesort' in (row['Extra'] or '') else ''}" for row in plan]
+        }
+    return results
+
+
+def print_comparison(title, before, after):
+    print(f"\n📊 {title}")
+    print(f"{'consulta':<26} {'antes ms':>9} {'después ms':>11} {'mejora':>8}  plan después")
+    for name in QUERIES:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        ratio = f"{b / a:.1f}x" if a else "-"
+        print(f"{name:<26} {b:>9.2f} {a:>11.2f} {ratio:>8}  {', '.join(after[name]['plan'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de índices por migración")
+    parser.add_argument("--runs", type=int, default=10, help="Repeticiones por consulta")
+    parser.add_argument("--target", type=int, default=None, help="Última migración a aplicar")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    runner = MigrationRunner()
+    pending = [item["version"] for item in runner.status() if item["estado"] == "pendiente"]
+    migrations = [m for m in discover_migrations() if m.version in pending
+                  and (args.target is None or m.version <= args.target)]
+
+    report = {"inicial": measure(db, args.runs), "migraciones": []}
+    if not migrations:
+        print_comparison("Estado actual (sin migraciones pendientes)", report["inicial"], report["inicial"])
+
+    before = report["inicial"]
+    for migration in migrations:
+        runner.up(migration.version)
+        after = measure(db, args.runs)
+        print_comparison(f"{migration.version:04d}_{migration.name}", before, after)
+        report["migraciones"].append({"version": migration.version, "nombre": migration.name,
+                                      "antes": before, "despues": after})
+        before = after
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    db.close_all_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,217 @@
+"""
+Benchmark del particionado mensual y el archivo de movimientos
+
+Crea una base de datos aparte con un historial sintético (10 millones de
+movimientos repartidos en varios años por defecto), mide las consultas de la
+interfaz y de los reportes, aplica la migración 0005, crea las particiones
+mensuales, archiva las de más de N años y vuelve a medir tras cada paso. Muestra
+la mediana de cada consulta y el tamaño en disco de movimientos y del archivo.
+
+Usa el motor SEQUENCE de MariaDB (seq_1_to_N) para generar las filas; la
+tabla de movimientos se crea sin triggers para que la carga sea rápida.
+
+    python benchmarks/particiones.py --filas 10000000 --anios-historial 6 --anios 2
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.archive import ArchiveManager
+from src.database import get_db_config
+from src.migrations import discover_migrations
+from src.pool import ConnectionPoolManager
+
+PRODUCTOS = 200
+BLOQUE = 1_000_000
+
+# movimientos antes de la migración 0005 (esquema base + índices de 0001)
+DDL = [
+    """
+    CREATE TABLE productos (
+        id_producto INT AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        tipo ENUM('papel', 'toner', 'encuadernacion', 'otro') NOT NULL,
+        precio_unitario DECIMAL(10, 2)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE movimientos (
+        id_movimiento INT AUTO_INCREMENT PRIMARY KEY,
+        producto_id INT NOT NULL,
+        tipo ENUM('entrada', 'salida') NOT NULL,
+        cantidad INT NOT NULL CHECK (cantidad > 0),
+        fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+        responsable VARCHAR(100) NOT NULL,
+        motivo TEXT,
+        KEY idx_movimientos_producto_tipo_fecha (producto_id, tipo, fecha),
+        KEY idx_movimientos_fecha (fecha, id_movimiento),
+        CONSTRAINT fk_producto_movimiento
+            FOREIGN KEY (producto_id) REFERENCES productos(id_producto)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """
+]
+
+# {tabla}: movimientos o, si el rango llega a lo archivado, movimientos_historico
+QUERIES = {
+    "ultimos_movimientos": ("""
+        SELECT m.id_movimiento, p.nombre, m.tipo, m.cantidad, m.fecha, m.responsable
+        FROM movimientos m
+        JOIN productos p ON m.producto_id = p.id_producto
+        ORDER BY m.fecha DESC
+        LIMIT 50
+        """, False),
+    "consumo_ultimo_mes": ("""
+        SELECT producto_id, SUM(cantidad) AS total, COUNT(*) AS num
+        FROM movimientos
+        WHERE tipo = 'salida' AND fecha >= NOW() - INTERVAL 1 MONTH
+        GROUP BY producto_id
+        """, False),
+    "exportacion_ultimo_anio": ("""
+        SELECT id_movimiento, producto_id, tipo, cantidad, fecha, responsable, motivo
+        FROM movimientos
+        WHERE fecha >= NOW() - INTERVAL 1 YEAR
+        ORDER BY fecha DESC
+        """, False),
+    "rango_antiguo": ("""
+        SELECT producto_id, SUM(cantidad) AS total, COUNT(*) AS num
+        FROM {tabla}
+        WHERE fecha >= NOW() - INTERVAL %s YEAR AND fecha < NOW() - INTERVAL %s YEAR + INTERVAL 1 MONTH
+        GROUP BY producto_id
+        """, True)
+}
+
+
+def run(cursor, statement, params=None):
+    cursor.execute(statement, params)
+    if cursor.with_rows:
+        return cursor.fetchall()
+    return None
+
+
+def load(cursor, filas, anios):
+    """Genera el catálogo y `filas` movimientos repartidos en `anios` años hasta hoy"""
+    run(cursor, f"INSERT INTO productos (nombre, tipo, precio_unitario) "
+                f"SELECT CONCAT('Producto ', seq), ELT(1 + seq % 4, 'papel', 'toner', 'encuadernacion', 'otro'), "
+                f"10 + seq % 90 FROM seq_1_to_{PRODUCTOS}")
+    segundos = anios * 365 * 86400
+    for inicio in range(1, filas + 1, BLOQUE):
+        fin = min(inicio + BLOQUE - 1, filas)
+        # Las filas más nuevas tienen ids mayores, como en producción
+        run(cursor, f"""
+            INSERT INTO movimientos (producto_id, tipo, cantidad, fecha, responsable, motivo)
+            SELECT 1 + seq % {PRODUCTOS}, IF(seq % 3 = 0, 'entrada', 'salida'), 1 + seq % 50,
+                   NOW() - INTERVAL FLOOR(({filas} - seq) * {segundos} / {filas}) SECOND,
+                   'Benchmark', IF(seq % 10 = 0, 'Movimiento sintético', NULL)
+            FROM seq_{inicio}_to_{fin}
+            """)
+        print(f"   {fin:,} / {filas:,} filas cargadas")
+
+
+def measure(cursor, runs, tabla_historico, anios):
+    """Mediana en ms de cada consulta"""
+    results = {}
+    for name, (query, usa_rango) in QUERIES.items():
+        statement = query.format(tabla=tabla_historico)
+        params = (anios + 1, anios + 1) if usa_rango else None
+        times = []
+        for _ in range(runs):
+            inicio = time.perf_counter()
+            run(cursor, statement, params)
+            times.append((time.perf_counter() - inicio) * 1000)
+        results[name] = statistics.median(times)
+    return results
+
+
+def sizes(cursor, database):
+    """Tamaño en disco (datos + índices, MB) de movimientos y del archivo"""
+    rows = run(cursor, "SELECT TABLE_NAME, (DATA_LENGTH + INDEX_LENGTH) / 1048576 FROM information_schema.TABLES "
+                       "WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ('movimientos', 'movimientos_archivo')",
+               (database,))
+    return {name: float(size) for name, size in rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de particiones y archivo de movimientos")
+    parser.add_argument("--filas", type=int, default=10_000_000, help="Movimientos sintéticos")
+    parser.add_argument("--anios-historial", type=int, default=6, help="Años que cubre el historial")
+    parser.add_argument("--anios", type=int, default=2, help="Antigüedad a partir de la cual se archiva")
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones por consulta")
+    parser.add_argument("--database", default="sgi_bench_particiones", help="Base de datos del benchmark")
+    parser.add_argument("--conservar", action="store_true", help="No eliminar la base de datos al terminar")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    base_config = {key: value for key, value in get_db_config().items() if key != "database"}
+    config = {**base_config, "database": args.database}
+    admin = ConnectionPoolManager({**base_config, "autocommit": True}, min_size=0, max_size=1,
+                                  name="bench_admin_pool")
+    connection = admin.get_connection()
+    cursor = connection.cursor()
+    run(cursor, f"DROP DATABASE IF EXISTS `{args.database}`")
+    run(cursor, f"CREATE DATABASE `{args.database}` CHARACTER SET utf8mb4")
+    run(cursor, f"USE `{args.database}`")
+
+    report = {"filas": args.filas, "fases": {}, "tamano_mb": {}, "tiempos_s": {}}
+    try:
+        for statement in DDL:
+            run(cursor, statement)
+        print(f"📥 Generando {args.filas:,} movimientos en {args.anios_historial} años...")
+        inicio = time.perf_counter()
+        load(cursor, args.filas, args.anios_historial)
+        run(cursor, "ANALYZE TABLE movimientos")
+        report["tiempos_s"]["carga"] = time.perf_counter() - inicio
+
+        report["fases"]["sin particiones"] = measure(cursor, args.runs, "movimientos", args.anios)
+        report["tamano_mb"]["sin particiones"] = sizes(cursor, args.database)
+
+        migration = next(m for m in discover_migrations() if m.version == 5)
+        inicio = time.perf_counter()
+        for statement in migration.statements():
+            run(cursor, statement)
+        report["tiempos_s"]["migracion_0005"] = time.perf_counter() - inicio
+
+        manager = ArchiveManager(config)
+        inicio = time.perf_counter()
+        created = manager.maintain()
+        report["tiempos_s"]["maintain"] = time.perf_counter() - inicio
+        print(f"🧱 {len(created)} particiones mensuales creadas")
+        run(cursor, "ANALYZE TABLE movimientos")
+        report["fases"]["particionada"] = measure(cursor, args.runs, "movimientos", args.anios)
+
+        inicio = time.perf_counter()
+        archived = manager.archive(args.anios)
+        report["tiempos_s"]["archive"] = time.perf_counter() - inicio
+        print(f"📦 {sum(rows for _, rows in archived):,} movimientos archivados en {len(archived)} particiones")
+        run(cursor, "ANALYZE TABLE movimientos, movimientos_archivo")
+        report["fases"]["archivada"] = measure(cursor, args.runs, "movimientos_historico", args.anios)
+        report["tamano_mb"]["archivada"] = sizes(cursor, args.database)
+    finally:
+        if not args.conservar:
+            run(cursor, f"DROP DATABASE IF EXISTS `{args.database}`")
+        cursor.close()
+        connection.close()
+        admin.close_all()
+
+    fases = list(report["fases"])
+    print(f"\n📊 Mediana en ms ({args.filas:,} movimientos)")
+    print(f"{'consulta':<26}" + "".join(f"{fase:>18}" for fase in fases))
+    for name in QUERIES:
+        print(f"{name:<26}" + "".join(f"{report['fases'][fase][name]:>18.2f}" for fase in fases))
+    print("\n💾 Tamaño en disco (MB)")
+    for fase, tablas in report["tamano_mb"].items():
+        print(f"{fase:<26}" + "".join(f"{tabla}: {size:,.1f}  " for tabla, size in sorted(tablas.items())))
+    print("\n⏱️ " + ", ".join(f"{paso}: {segundos:.1f}s" for paso, segundos in report["tiempos_s"].items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark de memoria por formato de resultado
+
+Ejecuta la misma consulta con cada result_format de
+DatabaseConnection.fetch_all y mide con tracemalloc el pico de memoria y el
+tiempo. Requiere una base de datos con datos (por ejemplo tras importar
+movimientos de prueba).
+
+Uso:
+    python benchmarks/result_formats.py
+    python benchmarks/result_formats.py --formats dict tuple row
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import DatabaseConnection
+from src.results import RESULT_FORMATS
+
+DEFAULT_QUERY = """
+SELECT m.id_movimiento, p.nombre, m.tipo, m.cantidad, m.fecha, m.responsable, m.motivo,
+       p.precio_unitario
+FROM movimientos m
+JOIN productos p ON m.producto_id = p.id_producto
+"""
+
+
+def measure(db, query, result_format):
+    """Devuelve (filas, pico de memoria en bytes, segundos) para un formato"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    result = db.fetch_all(query, use_cache=False, result_format=result_format)
+    elapsed = time.perf_counter() - inicio
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = len(next(iter(result.values()))) if isinstance(result, dict) and result else len(result)
+    del result
+    return rows, peak, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de formatos de resultado")
+    parser.add_argument("--query", default=DEFAULT_QUERY, help="Consulta SELECT a medir")
+    parser.add_argument("--formats", nargs="+", default=list(RESULT_FORMATS), choices=RESULT_FORMATS)
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    base_peak = None
+    print(f"{'formato':<10} {'filas':>10} {'pico MB':>10} {'vs dict':>8} {'tiempo':>9}")
+    for result_format in args.formats:
+        rows, peak, elapsed = measure(db, args.query, result_format)
+        if result_format == "dict":
+            base_peak = peak
+        ratio = f"{peak / base_peak:.0%}" if base_peak else "-"
+        print(f"{result_format:<10} {rows:>10,} {peak / 1024 / 1024:>10.1f} {ratio:>8} {elapsed:>8.2f}s")
+
+    db.close_all_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
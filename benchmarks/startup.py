@@ -0,0 +1,107 @@
+"""
+Benchmark de arranque de la aplicación
+
+Mide en intérpretes nuevos (arranque en frío de Python, con la caché de
+bytecode ya generada):
+
+- import del paquete src y de src.gui
+- tiempo hasta el primer dibujado de la ventana principal (InventoryApp)
+
+La ventana se cierra en cuanto se dibuja, sin esperar a la base de datos.
+El objetivo de arranque es menos de 1 s.
+
+Uso:
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --json resultados_arranque.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET_SECONDS = 1.0
+
+SCENARIOS = {
+    "import src": """
+import time
+inicio = time.perf_counter()
+import src
+print(time.perf_counter() - inicio)
+""",
+    "import src.gui": """
+import time
+inicio = time.perf_counter()
+import src.gui
+print(time.perf_counter() - inicio)
+""",
+    "primer dibujado": """
+import time
+inicio = time.perf_counter()
+import tkinter as tk
+from src.gui import InventoryApp
+
+root = tk.Tk()
+root.withdraw()
+app = InventoryApp(root)
+
+def dibujado(event=None):
+    print(time.perf_counter() - inicio)
+    app.runner.shutdown()
+    root.destroy()
+
+root.bind("<Map>", lambda event: root.after_idle(dibujado) if event.widget is root else None)
+root.deiconify()
+root.mainloop()
+"""
+}
+
+
+def run_scenario(code):
+    """Ejecuta un escenario en un intérprete nuevo y devuelve los segundos medidos"""
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                            text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "error")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque")
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones por escenario")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    # Una ejecución previa genera los .pyc para no medir la compilación
+    subprocess.run([sys.executable, "-c", "import src.gui"], cwd=ROOT, capture_output=True)
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        try:
+            times = [run_scenario(code) for _ in range(args.runs)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️ {name}: no se pudo medir ({e})")
+            continue
+        results[name] = {
+            "median": statistics.median(times),
+            "min": min(times),
+            "max": max(times),
+            "runs": len(times)
+        }
+        print(f"{name:<18} mediana {results[name]['median'] * 1000:8.1f} ms  "
+              f"(mín. {results[name]['min'] * 1000:.1f} ms, máx. {results[name]['max'] * 1000:.1f} ms)")
+
+    if "primer dibujado" in results:
+        ok = results["primer dibujado"]["median"] < TARGET_SECONDS
+        print(f"{'✅' if ok else '❌'} Objetivo de arranque en frío < {TARGET_SECONDS:.0f} s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,14 @@
+-- Índices de movimientos para las consultas de la interfaz
+--
+-- (producto_id, tipo, fecha): reporte de consumo (tipo = 'salida' agrupado
+-- por producto) y consultas de un producto por fecha. Cubre también la clave
+-- foránea, por lo que el índice automático de fk_producto_movimiento sobra.
+CREATE INDEX IF NOT EXISTS idx_movimientos_producto_tipo_fecha
+    ON movimientos (producto_id, tipo, fecha);
+
+-- (fecha, id_movimiento): últimos movimientos y exportación ordenados por
+-- fecha sin filesort
+CREATE INDEX IF NOT EXISTS idx_movimientos_fecha
+    ON movimientos (fecha, id_movimiento);
+
+ALTER TABLE movimientos DROP INDEX IF EXISTS fk_producto_movimiento;
@@ -0,0 +1,4 @@
+-- Índice de productos por nombre: listados ordenados por nombre y búsquedas
+-- por prefijo desde la pestaña de stock
+CREATE INDEX IF NOT EXISTS idx_productos_nombre
+    ON productos (nombre);
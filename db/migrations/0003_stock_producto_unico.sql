@@ -0,0 +1,10 @@
+-- Un único registro de stock por producto
+--
+-- Falla si ya existen productos con más de un registro de stock; revisarlos con:
+--   SELECT producto_id, COUNT(*) FROM stock GROUP BY producto_id HAVING COUNT(*) > 1;
+-- El índice único cubre la clave foránea, así que el índice automático de
+-- fk_producto_stock se elimina.
+CREATE UNIQUE INDEX IF NOT EXISTS uk_stock_producto
+    ON stock (producto_id);
+
+ALTER TABLE stock DROP INDEX IF EXISTS fk_producto_stock;
@@ -0,0 +1,82 @@
+-- Resumen diario de movimientos por producto y tipo
+--
+-- Lo mantienen los triggers de movimientos en la misma transacción que cada
+-- alta, baja o corrección, así que el reporte de consumo lee un registro por
+-- producto y día en lugar de todos los movimientos. Reconstrucción y
+-- verificación: python -m src.summaries rebuild | check
+CREATE TABLE IF NOT EXISTS consumo_diario (
+    producto_id INT NOT NULL,
+    dia DATE NOT NULL,
+    tipo ENUM('entrada', 'salida') NOT NULL,
+    total_cantidad BIGINT NOT NULL DEFAULT 0,
+    num_movimientos INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (producto_id, dia, tipo),
+    KEY idx_consumo_diario_tipo_dia (tipo, dia),
+    CONSTRAINT fk_producto_consumo_diario
+        FOREIGN KEY (producto_id)
+        REFERENCES productos(id_producto)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DELIMITER $$
+CREATE TRIGGER IF NOT EXISTS consumo_diario_despues_insertar
+AFTER INSERT ON movimientos
+FOR EACH ROW
+BEGIN
+    IF NEW.fecha IS NOT NULL THEN
+        INSERT INTO consumo_diario (producto_id, dia, tipo, total_cantidad, num_movimientos)
+        VALUES (NEW.producto_id, DATE(NEW.fecha), NEW.tipo, NEW.cantidad, 1)
+        ON DUPLICATE KEY UPDATE
+            total_cantidad = total_cantidad + NEW.cantidad,
+            num_movimientos = num_movimientos + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER IF NOT EXISTS consumo_diario_despues_eliminar
+AFTER DELETE ON movimientos
+FOR EACH ROW
+BEGIN
+    IF OLD.fecha IS NOT NULL THEN
+        UPDATE consumo_diario
+        SET total_cantidad = total_cantidad - OLD.cantidad,
+            num_movimientos = num_movimientos - 1
+        WHERE producto_id = OLD.producto_id AND dia = DATE(OLD.fecha) AND tipo = OLD.tipo;
+        DELETE FROM consumo_diario
+        WHERE producto_id = OLD.producto_id AND dia = DATE(OLD.fecha) AND tipo = OLD.tipo
+          AND num_movimientos <= 0;
+    END IF;
+END$$
+
+CREATE TRIGGER IF NOT EXISTS consumo_diario_despues_actualizar
+AFTER UPDATE ON movimientos
+FOR EACH ROW
+BEGIN
+    IF OLD.fecha IS NOT NULL THEN
+        UPDATE consumo_diario
+        SET total_cantidad = total_cantidad - OLD.cantidad,
+            num_movimientos = num_movimientos - 1
+        WHERE producto_id = OLD.producto_id AND dia = DATE(OLD.fecha) AND tipo = OLD.tipo;
+        DELETE FROM consumo_diario
+        WHERE producto_id = OLD.producto_id AND dia = DATE(OLD.fecha) AND tipo = OLD.tipo
+          AND num_movimientos <= 0;
+    END IF;
+    IF NEW.fecha IS NOT NULL THEN
+        INSERT INTO consumo_diario (producto_id, dia, tipo, total_cantidad, num_movimientos)
+        VALUES (NEW.producto_id, DATE(NEW.fecha), NEW.tipo, NEW.cantidad, 1)
+        ON DUPLICATE KEY UPDATE
+            total_cantidad = total_cantidad + NEW.cantidad,
+            num_movimientos = num_movimientos + 1;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Carga inicial con los movimientos existentes (recalcula si ya había datos)
+INSERT INTO consumo_diario (producto_id, dia, tipo, total_cantidad, num_movimientos)
+SELECT producto_id, DATE(fecha), tipo, SUM(cantidad), COUNT(*)
+FROM movimientos
+WHERE fecha IS NOT NULL
+GROUP BY producto_id, DATE(fecha), tipo
+ON DUPLICATE KEY UPDATE
+    total_cantidad = VALUES(total_cantidad),
+    num_movimientos = VALUES(num_movimientos);
@@ -0,0 +1,69 @@
+-- Particionado mensual de movimientos y tabla de archivo
+--
+-- movimientos pasa a particionarse por RANGE sobre TO_DAYS(fecha). La
+-- migración solo deja la partición p_futuro (MAXVALUE); las particiones
+-- mensuales las crea y mantiene: python -m src.archive maintain
+--
+-- Restricciones de InnoDB para tablas particionadas:
+-- * No admite claves foráneas. La integridad con productos se conserva con
+--   el trigger productos_antes_eliminar (equivale al ON DELETE RESTRICT) y,
+--   en las altas, con la FK de consumo_diario: el trigger que la actualiza
+--   falla si el producto no existe y el INSERT se deshace.
+-- * Toda clave única debe incluir la columna de particionado, por eso la
+--   clave primaria pasa a ser (id_movimiento, fecha) y fecha es NOT NULL.
+ALTER TABLE movimientos DROP FOREIGN KEY IF EXISTS fk_producto_movimiento;
+
+-- Movimientos sin fecha (solo posibles si se insertó NULL explícitamente).
+-- Localizarlos antes con: SELECT * FROM movimientos WHERE fecha IS NULL
+-- Se fechan en 2000-01-01 para que caigan en la partición más antigua; el
+-- trigger de actualización los suma a consumo_diario en ese día.
+UPDATE movimientos SET fecha = '2000-01-01 00:00:00' WHERE fecha IS NULL;
+
+ALTER TABLE movimientos
+    MODIFY fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id_movimiento, fecha);
+
+ALTER TABLE movimientos
+    PARTITION BY RANGE (TO_DAYS(fecha)) (
+        PARTITION p_futuro VALUES LESS THAN MAXVALUE
+    );
+
+DELIMITER $$
+CREATE TRIGGER IF NOT EXISTS productos_antes_eliminar
+BEFORE DELETE ON productos
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM movimientos WHERE producto_id = OLD.id_producto LIMIT 1) THEN
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'No se puede eliminar un producto con movimientos registrados';
+    END IF;
+END$$
+DELIMITER ;
+
+-- Movimientos archivados: particiones completas de más de DB_ARCHIVE_YEARS
+-- años que python -m src.archive archive traslada desde movimientos. Se
+-- guarda comprimida y sin triggers; archivado_en permite a los backups
+-- incrementales copiar solo lo archivado desde el anterior.
+CREATE TABLE IF NOT EXISTS movimientos_archivo (
+    id_movimiento INT NOT NULL,
+    producto_id INT NOT NULL,
+    tipo ENUM('entrada', 'salida') NOT NULL,
+    cantidad INT NOT NULL,
+    fecha DATETIME NOT NULL,
+    responsable VARCHAR(100) NOT NULL,
+    motivo TEXT,
+    archivado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_movimiento),
+    KEY idx_movimientos_archivo_fecha (fecha, id_movimiento),
+    KEY idx_movimientos_archivo_producto_tipo_fecha (producto_id, tipo, fecha),
+    KEY idx_movimientos_archivo_archivado_en (archivado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
+
+-- Historial completo para los reportes cuyo rango llega a lo archivado
+CREATE OR REPLACE VIEW movimientos_historico AS
+SELECT id_movimiento, producto_id, tipo, cantidad, fecha, responsable, motivo
+FROM movimientos
+UNION ALL
+SELECT id_movimiento, producto_id, tipo, cantidad, fecha, responsable, motivo
+FROM movimientos_archivo;
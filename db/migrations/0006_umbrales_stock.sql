@@ -0,0 +1,127 @@
+-- Umbrales de stock crítico configurables y estado precalculado en stock
+--
+-- umbrales_stock guarda el mínimo por tipo de producto o, con prioridad, por
+-- producto concreto. stock.stock_minimo copia el umbral que aplica a cada
+-- producto (lo mantienen los triggers) y stock.estado es una columna generada
+-- e indexada, de modo que listar los productos críticos recorre un rango del
+-- índice en lugar de evaluar la regla en cada fila.
+--
+-- Cambiar un umbral: UPDATE umbrales_stock SET minimo = 300 WHERE tipo = 'papel';
+-- Umbral propio de un producto:
+--   INSERT INTO umbrales_stock (producto_id, minimo) VALUES (2, 15);
+CREATE TABLE IF NOT EXISTS umbrales_stock (
+    id_umbral INT AUTO_INCREMENT PRIMARY KEY,
+    tipo ENUM('papel', 'toner', 'encuadernacion', 'otro') NULL,
+    producto_id INT NULL,
+    minimo INT NOT NULL CHECK (minimo >= 0),
+    UNIQUE KEY uk_umbrales_stock_tipo (tipo),
+    UNIQUE KEY uk_umbrales_stock_producto (producto_id),
+    CONSTRAINT chk_umbrales_stock_destino CHECK ((tipo IS NULL) <> (producto_id IS NULL)),
+    CONSTRAINT fk_producto_umbral
+        FOREIGN KEY (producto_id)
+        REFERENCES productos(id_producto)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Las reglas que estaban fijas en la vista y en la interfaz
+INSERT IGNORE INTO umbrales_stock (tipo, minimo) VALUES
+('papel', 500),
+('toner', 10),
+('encuadernacion', 20);
+
+DELIMITER $$
+CREATE FUNCTION IF NOT EXISTS umbral_stock(p_producto_id INT) RETURNS INT
+READS SQL DATA
+BEGIN
+    RETURN COALESCE(
+        (SELECT minimo FROM umbrales_stock WHERE producto_id = p_producto_id),
+        (SELECT u.minimo
+         FROM umbrales_stock u
+         JOIN productos p ON u.tipo = p.tipo
+         WHERE p.id_producto = p_producto_id));
+END$$
+DELIMITER ;
+
+-- NULL: sin umbral, el producto nunca es crítico. El orden del ENUM es el
+-- alfabético para que ORDER BY estado siga ordenando como el texto.
+ALTER TABLE stock
+    ADD COLUMN IF NOT EXISTS stock_minimo INT NULL,
+    ADD COLUMN IF NOT EXISTS estado ENUM('CRÍTICO', 'NORMAL')
+        AS (IF(cantidad < stock_minimo, 'CRÍTICO', 'NORMAL')) STORED;
+
+UPDATE stock SET stock_minimo = umbral_stock(producto_id);
+
+CREATE INDEX IF NOT EXISTS idx_stock_estado
+    ON stock (estado, producto_id);
+
+DELIMITER $$
+CREATE TRIGGER IF NOT EXISTS stock_antes_insertar
+BEFORE INSERT ON stock
+FOR EACH ROW
+BEGIN
+    SET NEW.stock_minimo = umbral_stock(NEW.producto_id);
+END$$
+
+CREATE TRIGGER IF NOT EXISTS stock_antes_actualizar
+BEFORE UPDATE ON stock
+FOR EACH ROW
+BEGIN
+    IF NEW.producto_id <> OLD.producto_id THEN
+        SET NEW.stock_minimo = umbral_stock(NEW.producto_id);
+    END IF;
+END$$
+
+CREATE TRIGGER IF NOT EXISTS productos_despues_actualizar
+AFTER UPDATE ON productos
+FOR EACH ROW
+BEGIN
+    IF NEW.tipo <> OLD.tipo THEN
+        UPDATE stock SET stock_minimo = umbral_stock(producto_id)
+        WHERE producto_id = NEW.id_producto;
+    END IF;
+END$$
+
+CREATE TRIGGER IF NOT EXISTS umbrales_stock_despues_insertar
+AFTER INSERT ON umbrales_stock
+FOR EACH ROW
+BEGIN
+    UPDATE stock s
+    JOIN productos p ON s.producto_id = p.id_producto
+    SET s.stock_minimo = umbral_stock(s.producto_id)
+    WHERE p.id_producto = NEW.producto_id OR p.tipo = NEW.tipo;
+END$$
+
+CREATE TRIGGER IF NOT EXISTS umbrales_stock_despues_actualizar
+AFTER UPDATE ON umbrales_stock
+FOR EACH ROW
+BEGIN
+    UPDATE stock s
+    JOIN productos p ON s.producto_id = p.id_producto
+    SET s.stock_minimo = umbral_stock(s.producto_id)
+    WHERE p.id_producto IN (OLD.producto_id, NEW.producto_id) OR p.tipo IN (OLD.tipo, NEW.tipo);
+END$$
+
+CREATE TRIGGER IF NOT EXISTS umbrales_stock_despues_eliminar
+AFTER DELETE ON umbrales_stock
+FOR EACH ROW
+BEGIN
+    UPDATE stock s
+    JOIN productos p ON s.producto_id = p.id_producto
+    SET s.stock_minimo = umbral_stock(s.producto_id)
+    WHERE p.id_producto = OLD.producto_id OR p.tipo = OLD.tipo;
+END$$
+DELIMITER ;
+
+-- La vista de alertas lee el estado indexado (mismas columnas que antes)
+CREATE OR REPLACE VIEW vista_alertas_stock AS
+SELECT
+    p.id_producto,
+    p.nombre,
+    p.tipo,
+    s.cantidad,
+    s.ubicacion,
+    'CRITICO' AS nivel_alerta
+FROM stock s
+JOIN productos p ON p.id_producto = s.producto_id
+WHERE s.estado = 'CRÍTICO';
@@ -0,0 +1,36 @@
+-- Fotografías periódicas del stock para consultar el inventario a una fecha
+--
+-- Cada fotografía guarda la cantidad y el precio de todos los productos en
+-- un instante. El inventario a una fecha parte de la fotografía más cercana y
+-- suma los movimientos fechados entre ambas (src/snapshots.py), sin recorrer
+-- el historial completo. Se toman con: python -m src.snapshots take
+CREATE TABLE IF NOT EXISTS snapshots_stock (
+    fecha DATETIME NOT NULL,
+    producto_id INT NOT NULL,
+    cantidad INT NOT NULL,
+    precio_unitario DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    valor DECIMAL(14,2) AS (cantidad * precio_unitario) STORED,
+    PRIMARY KEY (fecha, producto_id),
+    KEY idx_snapshots_stock_producto_fecha (producto_id, fecha),
+    CONSTRAINT fk_producto_snapshot
+        FOREIGN KEY (producto_id)
+        REFERENCES productos(id_producto)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Un movimiento registrado con fecha anterior a fotografías ya tomadas (por
+-- ejemplo al importar un archivo) no estaba en el stock que se fotografió:
+-- se suma a esas fotografías igual que el trigger de stock lo suma a stock.
+-- Con la fecha actual el rango está vacío y solo cuesta una búsqueda en el
+-- índice.
+DELIMITER $$
+CREATE TRIGGER IF NOT EXISTS snapshots_stock_despues_movimiento
+AFTER INSERT ON movimientos
+FOR EACH ROW
+BEGIN
+    UPDATE snapshots_stock
+    SET cantidad = cantidad + IF(NEW.tipo = 'entrada', NEW.cantidad, -NEW.cantidad)
+    WHERE producto_id = NEW.producto_id AND fecha >= NEW.fecha;
+END$$
+DELIMITER ;
@@ -0,0 +1,53 @@
+-- Registro atómico de un movimiento en un solo viaje al servidor
+--
+-- Valida el producto, bloquea su fila de stock (FOR UPDATE), comprueba la
+-- existencia para las salidas, inserta el movimiento y devuelve el stock
+-- resultante. Dos terminales que registran salidas del mismo producto se
+-- serializan en el bloqueo, así que el stock no puede quedar negativo.
+--
+-- Devuelve una fila: estado ('ok', 'sin_producto' o 'sin_stock'), stock
+-- (resultante, o el disponible si no alcanza) e id_movimiento.
+-- Inicia y confirma su propia transacción: llamarlo con autocommit activo.
+DELIMITER $$
+CREATE PROCEDURE IF NOT EXISTS registrar_movimiento(
+    IN p_producto_id INT,
+    IN p_tipo VARCHAR(10),
+    IN p_cantidad INT,
+    IN p_responsable VARCHAR(100),
+    IN p_motivo TEXT
+)
+MODIFIES SQL DATA
+BEGIN
+    DECLARE v_stock INT DEFAULT NULL;
+    DECLARE v_id INT DEFAULT NULL;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    IF p_tipo NOT IN ('entrada', 'salida') OR p_cantidad IS NULL OR p_cantidad <= 0 THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Movimiento no válido: tipo entrada/salida y cantidad positiva';
+    END IF;
+
+    START TRANSACTION;
+    SELECT cantidad INTO v_stock FROM stock WHERE producto_id = p_producto_id FOR UPDATE;
+
+    IF v_stock IS NULL AND NOT EXISTS (SELECT 1 FROM productos WHERE id_producto = p_producto_id) THEN
+        ROLLBACK;
+        SELECT 'sin_producto' AS estado, NULL AS stock, NULL AS id_movimiento;
+    ELSEIF p_tipo = 'salida' AND COALESCE(v_stock, 0) < p_cantidad THEN
+        ROLLBACK;
+        SELECT 'sin_stock' AS estado, COALESCE(v_stock, 0) AS stock, NULL AS id_movimiento;
+    ELSE
+        INSERT INTO movimientos (producto_id, tipo, cantidad, responsable, motivo)
+        VALUES (p_producto_id, p_tipo, p_cantidad, p_responsable, p_motivo);
+        SET v_id = LAST_INSERT_ID();
+        -- La fila sigue bloqueada: este es el stock que dejó el trigger
+        SELECT cantidad INTO v_stock FROM stock WHERE producto_id = p_producto_id;
+        COMMIT;
+        SELECT 'ok' AS estado, v_stock AS stock, v_id AS id_movimiento;
+    END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,11 @@
+-- Índices para ordenar la tabla de productos en el servidor
+--
+-- La tabla virtual de productos pide cada página con ORDER BY columna,
+-- id_producto LIMIT/OFFSET. Un índice secundario de InnoDB ya incluye la
+-- clave primaria, así que recorre las filas en ese orden sin ordenar todo el
+-- catálogo en cada página. El orden por nombre usa idx_productos_nombre (0002).
+CREATE INDEX IF NOT EXISTS idx_productos_tipo
+    ON productos (tipo);
+
+CREATE INDEX IF NOT EXISTS idx_productos_precio
+    ON productos (precio_unitario);
@@ -0,0 +1,45 @@
+-- Integridad de movimientos con productos sin clave foránea
+--
+-- Desde la 0005 movimientos está particionada y no admite claves foráneas.
+-- Las altas quedaban protegidas solo de rebote, por la FK de consumo_diario
+-- en su trigger. Estos triggers lo comprueban de forma explícita al insertar
+-- o al cambiar el producto de un movimiento. El borrado de un producto se
+-- rechaza también si solo tiene movimientos archivados, para no dejar
+-- huérfanas las filas de movimientos_archivo.
+DELIMITER $$
+CREATE TRIGGER IF NOT EXISTS movimientos_antes_insertar
+BEFORE INSERT ON movimientos
+FOR EACH ROW
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM productos WHERE id_producto = NEW.producto_id) THEN
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'El producto del movimiento no existe';
+    END IF;
+END$$
+
+CREATE TRIGGER IF NOT EXISTS movimientos_antes_actualizar
+BEFORE UPDATE ON movimientos
+FOR EACH ROW
+BEGIN
+    IF NEW.producto_id <> OLD.producto_id
+       AND NOT EXISTS (SELECT 1 FROM productos WHERE id_producto = NEW.producto_id) THEN
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'El producto del movimiento no existe';
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS productos_antes_eliminar;
+
+DELIMITER $$
+CREATE TRIGGER productos_antes_eliminar
+BEFORE DELETE ON productos
+FOR EACH ROW
+BEGIN
+    IF EXISTS (SELECT 1 FROM movimientos WHERE producto_id = OLD.id_producto LIMIT 1)
+       OR EXISTS (SELECT 1 FROM movimientos_archivo WHERE producto_id = OLD.id_producto LIMIT 1) THEN
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'No se puede eliminar un producto con movimientos registrados';
+    END IF;
+END$$
+DELIMITER ;
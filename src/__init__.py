@@ -1,15 +1,43 @@
 """
 Sistema de Gestión de Inventario - Paquete Principal
 Permite importar componentes directamente desde el paquete src
+
+Los componentes se importan la primera vez que se usan (from src import
+InventoryApp), de modo que importar el paquete no carga tkinter ni el
+conector de MySQL.
 """
 from datetime import datetime
+import importlib
 import logging
 import platform
 import sys
-import mysql.connector
-from .database import DatabaseConnection
-from .gui import InventoryApp
-from .utils import DataUtils, safe_int_conversion
+
+# Componente exportado -> módulo que lo define
+_LAZY_EXPORTS = {
+    "DatabaseConnection": ".database",
+    "AsyncDatabaseConnection": ".async_database",
+    "BackupEngine": ".backup",
+    "RestoreEngine": ".backup",
+    "MigrationRunner": ".migrations",
+    "ArchiveManager": ".archive",
+    "InventoryApp": ".gui",
+    "DataUtils": ".utils",
+    "safe_int_conversion": ".utils"
+}
+
+
+def __getattr__(name):
+    """Importa un componente exportado en su primer uso"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 __version__ = "1.1.0"
 __author__ = "Carlos Daniel Martínez Reynoso"
@@ -23,6 +51,8 @@ __copyright__ = f"Copyright © 2024-{datetime.now().year} {__author__}"
 
 def get_system_info():
     """Devuelve información del sistema para debugging"""
+    import mysql.connector
+
     return {
         "python_version": sys.version,
         "platform": platform.platform(),
@@ -49,6 +79,11 @@ logger = logging.getLogger('SGI')
 # Módulos exportados públicamente
 __all__ = [
     "DatabaseConnection",
+    "AsyncDatabaseConnection",
+    "BackupEngine",
+    "RestoreEngine",
+    "MigrationRunner",
+    "ArchiveManager",
     "InventoryApp",
     "DataUtils",
     "safe_int_conversion",
@@ -0,0 +1,327 @@
+"""
+Particiones mensuales y archivo de movimientos antiguos
+
+movimientos está particionada por mes (migración 0005). Este módulo crea de
+antemano las particiones de los próximos meses y traslada las más antiguas a
+la tabla comprimida movimientos_archivo:
+
+    python -m src.archive status
+    python -m src.archive maintain --meses 3
+    python -m src.archive archive --anios 2
+
+El archivado intercambia la partición con una tabla de carga vacía
+(EXCHANGE PARTITION, instantáneo), copia esas filas al archivo y elimina la
+partición ya vacía. No se dispara ningún trigger, así que stock y
+consumo_diario no cambian; los reportes que llegan a fechas archivadas leen
+la vista movimientos_historico (ver movement_source).
+"""
+import argparse
+import logging
+import os
+from datetime import date, datetime
+
+from mysql.connector import Error
+
+from src.database import get_db_config
+from src.pool import ConnectionPoolManager
+
+logger = logging.getLogger('Archive')
+
+TABLE = "movimientos"
+ARCHIVE_TABLE = "movimientos_archivo"
+HISTORY_VIEW = "movimientos_historico"
+STAGING_TABLE = "movimientos_archivo_carga"
+FUTURE_PARTITION = "p_futuro"
+LOCK_NAME = "sgi_movimientos_archivo"
+
+COLUMNS = ("id_movimiento", "producto_id", "tipo", "cantidad", "fecha", "responsable", "motivo")
+
+# TO_DAYS() de MariaDB cuenta desde el año 0; date.toordinal() desde el año 1
+_TO_DAYS_OFFSET = 365
+
+
+class ArchiveError(Exception):
+    """Error al mantener las particiones o archivar movimientos"""
+
+
+def to_days(day):
+    """Equivalente en Python de TO_DAYS() para una fecha"""
+    return day.toordinal() + _TO_DAYS_OFFSET
+
+
+def from_days(days):
+    """Fecha correspondiente a un valor de TO_DAYS()"""
+    return date.fromordinal(int(days) - _TO_DAYS_OFFSET)
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Nombre de la partición de un mes: p_AAAA_MM"""
+    return f"p_{month.year:04d}_{month.month:02d}"
+
+
+def movement_source(db, desde=None):
+    """
+    Tabla o vista de movimientos que cubre un rango que empieza en `desde`
+
+    Devuelve 'movimientos' si el rango no llega a lo archivado y la vista
+    movimientos_historico en caso contrario (o si no hay fecha inicial).
+    Sin la migración 0005 aplicada no hay archivo y se usa movimientos.
+
+    Args:
+        db (DatabaseConnection): Conexión para consultar el archivo
+        desde (date | datetime, optional): Inicio del rango pedido
+    """
+    if not db.has_table(ARCHIVE_TABLE):
+        return TABLE
+    result = db.fetch_one(f"SELECT MAX(fecha) AS ultima FROM {ARCHIVE_TABLE}", use_cache=False)
+    if not result or result.get("ultima") is None:
+        return TABLE
+    if desde is not None:
+        inicio = desde if isinstance(desde, datetime) else datetime.combine(desde, datetime.min.time())
+        if inicio > result["ultima"]:
+            return TABLE
+    return HISTORY_VIEW
+
+
+class ArchiveManager:
+    """
+    Mantenimiento de las particiones mensuales de movimientos
+
+    Args:
+        config (dict, optional): Configuración de conexión (por defecto get_db_config())
+        lock_timeout (int): Segundos de espera si otro proceso está manteniendo la tabla
+    """
+
+    def __init__(self, config=None, lock_timeout=30):
+        self.config = dict(config or get_db_config())
+        self.lock_timeout = lock_timeout
+
+    def _pool(self):
+        return ConnectionPoolManager({**self.config, "autocommit": True}, min_size=0, max_size=1,
+                                     name="archive_pool")
+
+    def _locked(self, work):
+        """Ejecuta work(cursor) con el bloqueo de mantenimiento tomado"""
+        pool = self._pool()
+        try:
+            connection = pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, self.lock_timeout))
+                    if cursor.fetchall()[0][0] != 1:
+                        raise ArchiveError(
+                            f"Otro proceso está manteniendo {TABLE} (esperados {self.lock_timeout}s)")
+                    try:
+                        return work(cursor)
+                    finally:
+                        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                        cursor.fetchall()
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
+        finally:
+            pool.close_all()
+
+    def _partitions(self, cursor):
+        """
+        Particiones de movimientos en orden
+
+        Returns:
+            list: Diccionarios con nombre, limite (fecha exclusiva o None para
+                MAXVALUE) y filas (estimación de information_schema)
+        """
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            (self.config["database"], TABLE))
+        partitions = []
+        for name, description, rows in cursor.fetchall():
+            limit = None if description in (None, "MAXVALUE") else from_days(description)
+            partitions.append({"nombre": name, "limite": limit, "filas": int(rows or 0)})
+        return partitions
+
+    def status(self):
+        """
+        Particiones de movimientos y contenido del archivo
+
+        Returns:
+            dict: particiones (ver _partitions) y archivo (filas, desde, hasta)
+        """
+        def work(cursor):
+            partitions = self._partitions(cursor)
+            cursor.execute(f"SELECT COUNT(*), MIN(fecha), MAX(fecha) FROM {ARCHIVE_TABLE}")
+            rows, first, last = cursor.fetchone()
+            return {"particiones": partitions,
+                    "archivo": {"filas": rows, "desde": first, "hasta": last}}
+
+        return self._locked(work)
+
+    def maintain(self, months_ahead=3, max_future_rows=None):
+        """
+        Crea las particiones mensuales hasta `months_ahead` meses por delante
+
+        Divide p_futuro con REORGANIZE PARTITION. La primera vez reparte el
+        historial completo desde el mes del movimiento más antiguo, lo que
+        copia toda la tabla; después p_futuro está vacía y la operación es
+        inmediata.
+
+        Args:
+            months_ahead (int): Meses futuros con partición propia
+            max_future_rows (int, optional): No reorganizar si p_futuro tiene
+                más filas estimadas (para lanzarlo al arrancar sin bloquear)
+
+        Returns:
+            list: Nombres de las particiones creadas
+
+        Raises:
+            ArchiveError: Si la tabla no está particionada o hay mantenimiento en curso
+        """
+        def work(cursor):
+            partitions = self._partitions(cursor)
+            if not partitions or partitions[-1]["nombre"] != FUTURE_PARTITION:
+                raise ArchiveError(f"{TABLE} no está particionada (aplicar la migración 0005)")
+            future_rows = partitions[-1]["filas"]
+            if max_future_rows is not None and future_rows > max_future_rows:
+                logger.warning(f"⚠️ {FUTURE_PARTITION} tiene ~{future_rows:,} filas; crear las particiones "
+                               f"con: python -m src.archive maintain")
+                return []
+
+            last_month = _add_months(_month_start(date.today()), months_ahead)
+            if len(partitions) > 1:
+                first_month = partitions[-2]["limite"]
+            else:
+                cursor.execute(f"SELECT MIN(fecha) FROM {TABLE} PARTITION ({FUTURE_PARTITION})")
+                oldest = cursor.fetchone()[0]
+                first_month = _month_start(oldest.date() if oldest else date.today())
+
+            months = []
+            month = first_month
+            while month <= last_month:
+                months.append(month)
+                month = _add_months(month, 1)
+            if not months:
+                return []
+
+            definitions = [f"PARTITION {partition_name(month)} VALUES LESS THAN "
+                           f"({to_days(_add_months(month, 1))})" for month in months]
+            definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+            cursor.execute(f"ALTER TABLE {TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+                           f"({', '.join(definitions)})")
+            created = [partition_name(month) for month in months]
+            logger.info(f"✅ Particiones creadas en {TABLE}: {created[0]} a {created[-1]}")
+            return created
+
+        return self._locked(work)
+
+    def archive(self, years=None):
+        """
+        Traslada al archivo las particiones con más de `years` años
+
+        Cada partición se intercambia con la tabla de carga, se copia al
+        archivo comprobando el número de filas y se elimina. Si la copia
+        falla la partición se devuelve a su sitio con otro intercambio.
+
+        Args:
+            years (int, optional): Antigüedad mínima (por defecto DB_ARCHIVE_YEARS o 2)
+
+        Returns:
+            list: Tuplas (partición, filas archivadas)
+        """
+        if years is None:
+            years = int(os.getenv('DB_ARCHIVE_YEARS', '2'))
+        today = date.today()
+        cutoff = date(today.year - years, today.month, 1)
+        columns = ", ".join(COLUMNS)
+
+        def work(cursor):
+            partitions = self._partitions(cursor)
+            # partitions[-1] es p_futuro (MAXVALUE) y partitions[-2] la última con
+            # límite, que se conserva siempre: maintain() crea los meses nuevos a
+            # partir de su límite y, sin ella, p_futuro absorbería su rango. (Los
+            # movimientos con fecha anterior a lo archivado caen, por ser RANGE, en
+            # la primera partición que queda.)
+            candidates = [p for p in partitions[:-2] if p["limite"] is not None and p["limite"] <= cutoff]
+            if not candidates:
+                return []
+
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            cursor.execute(f"CREATE TABLE {STAGING_TABLE} LIKE {TABLE}")
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} REMOVE PARTITIONING")
+            archived = []
+            try:
+                for partition in candidates:
+                    name = partition["nombre"]
+                    cursor.execute(f"ALTER TABLE {TABLE} EXCHANGE PARTITION {name} WITH TABLE {STAGING_TABLE}")
+                    try:
+                        cursor.execute(f"SELECT COUNT(*) FROM {STAGING_TABLE}")
+                        expected = cursor.fetchone()[0]
+                        cursor.execute(f"INSERT INTO {ARCHIVE_TABLE} ({columns}) "
+                                       f"SELECT {columns} FROM {STAGING_TABLE}")
+                        if cursor.rowcount != expected:
+                            raise ArchiveError(f"Se archivaron {cursor.rowcount} de {expected} filas de {name}")
+                    except (Error, ArchiveError):
+                        cursor.execute(f"DELETE FROM {ARCHIVE_TABLE} WHERE id_movimiento IN "
+                                       f"(SELECT id_movimiento FROM {STAGING_TABLE})")
+                        cursor.execute(f"ALTER TABLE {TABLE} EXCHANGE PARTITION {name} WITH TABLE {STAGING_TABLE}")
+                        raise
+                    cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+                    cursor.execute(f"TRUNCATE TABLE {STAGING_TABLE}")
+                    archived.append((name, expected))
+                    logger.info(f"📦 Partición {name} archivada ({expected:,} movimientos)")
+            finally:
+                cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            return archived
+
+        return self._locked(work)
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Particiones y archivo de movimientos")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="Mostrar particiones y archivo")
+    maintain = commands.add_parser("maintain", help="Crear las particiones de los próximos meses")
+    maintain.add_argument("--meses", type=int, default=3, help="Meses futuros con partición")
+    archive = commands.add_parser("archive", help="Archivar las particiones antiguas")
+    archive.add_argument("--anios", type=int, default=None, help="Antigüedad mínima en años (DB_ARCHIVE_YEARS)")
+    args = parser.parse_args(argv)
+
+    manager = ArchiveManager()
+    try:
+        if args.command == "maintain":
+            created = manager.maintain(args.meses)
+            print(f"✅ {len(created)} particiones creadas" if created else "✅ Las particiones ya están al día")
+        elif args.command == "archive":
+            archived = manager.archive(args.anios)
+            for name, rows in archived:
+                print(f"📦 {name}: {rows:,} movimientos archivados")
+            if not archived:
+                print("✅ No hay particiones para archivar")
+        else:
+            info = manager.status()
+            for partition in info["particiones"]:
+                limit = partition["limite"].strftime("%d/%m/%Y") if partition["limite"] else "MAXVALUE"
+                print(f"{partition['nombre']:<12} < {limit:<10} ~{partition['filas']:>12,} filas")
+            archivo = info["archivo"]
+            print(f"📦 Archivo: {archivo['filas']:,} movimientos"
+                  + (f" ({archivo['desde']:%d/%m/%Y} a {archivo['hasta']:%d/%m/%Y})" if archivo["filas"] else ""))
+    except ArchiveError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from mysql.connector import Error
+from mysql.connector.aio import connect
+
+from src.database import QueryInstrumentation, get_db_config
+
+logger = logging.getLogger('AsyncDatabaseConnection')
+
+
+class AsyncConnectionPool:
+    """
+    Pool acotado de conexiones asíncronas
+
+    Un semáforo limita el número de conexiones abiertas; las conexiones libres
+    se reutilizan en orden LIFO para mantener calientes las más recientes.
+    """
+
+    def __init__(self, config, max_size=20, acquire_timeout=30.0):
+        self.config = config
+        self.max_size = max(1, int(max_size))
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = asyncio.Semaphore(self.max_size)
+        self._idle = []
+        self._closed = False
+
+    async def acquire(self):
+        """Obtiene una conexión, esperando como máximo acquire_timeout segundos"""
+        if self._closed:
+            raise ConnectionError("El pool asíncrono está cerrado")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError(
+                f"No hay conexiones asíncronas disponibles tras {self.acquire_timeout}s")
+
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                if await connection.is_connected():
+                    return connection
+                await self._close_quietly(connection)
+            return await connect(**self.config)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    async def release(self, connection, reusable=True):
+        """
+        Devuelve una conexión al pool
+
+        Args:
+            connection: Conexión obtenida con acquire()
+            reusable (bool): False si la operación se interrumpió (cancelación u
+                otra excepción) y la conexión puede tener un resultado a medias;
+                en ese caso se cierra en lugar de volver a la lista libre
+        """
+        try:
+            if reusable and not self._closed and await connection.is_connected():
+                self._idle.append(connection)
+            else:
+                await self._close_quietly(connection)
+        finally:
+            self._semaphore.release()
+
+    async def close(self):
+        """Cierra las conexiones libres y rechaza nuevas peticiones"""
+        self._closed = True
+        while self._idle:
+            await self._close_quietly(self._idle.pop())
+
+    @staticmethod
+    async def _close_quietly(connection):
+        try:
+            await connection.close()
+        except Exception:
+            pass
+
+
+class AsyncTransaction:
+    """Operaciones disponibles dentro de AsyncDatabaseConnection.transaction()"""
+
+    def __init__(self, connection, instrumentation):
+        self._connection = connection
+        self._instrumentation = instrumentation
+        self.lastrowid = None
+        self.rowcount = 0
+
+    async def execute(self, query, params=None):
+        """Ejecuta una sentencia de modificación dentro de la transacción"""
+        cursor = await self._connection.cursor()
+        start_ns = time.perf_counter_ns()
+        try:
+            await cursor.execute(query, params or ())
+            self.lastrowid = cursor.lastrowid
+            self.rowcount = cursor.rowcount
+            self._instrumentation.record(query, time.perf_counter_ns() - start_ns, self.rowcount)
+            return self.rowcount
+        except Error as e:
+            self._instrumentation.record(query, time.perf_counter_ns() - start_ns, error=e)
+            raise
+        finally:
+            await cursor.close()
+
+    async def fetch_all(self, query, params=None):
+        """Ejecuta un SELECT dentro de la transacción y devuelve todas las filas"""
+        cursor = await self._connection.cursor(dictionary=True)
+        start_ns = time.perf_counter_ns()
+        try:
+            await cursor.execute(query, params or ())
+            results = await cursor.fetchall()
+            self._instrumentation.record(query, time.perf_counter_ns() - start_ns, len(results))
+            return results
+        except Error as e:
+            self._instrumentation.record(query, time.perf_counter_ns() - start_ns, error=e)
+            raise
+        finally:
+            await cursor.close()
+
+    async def fetch_one(self, query, params=None):
+        """Ejecuta un SELECT dentro de la transacción y devuelve la primera fila"""
+        rows = await self.fetch_all(query, params)
+        return rows[0] if rows else None
+
+
+class AsyncDatabaseConnection:
+    """
+    Versión asyncio de DatabaseConnection para scripts y servicios
+
+    Permite lanzar cientos de consultas concurrentes desde un solo bucle de
+    eventos sin un hilo por consulta. Cada instancia tiene su propio pool
+    acotado, por lo que debe crearse y cerrarse dentro del mismo bucle:
+
+        async with AsyncDatabaseConnection() as db:
+            filas = await db.fetch_all("SELECT * FROM productos")
+
+    Las consultas se miden con QueryInstrumentation igual que en la versión
+    síncrona (DB_QUERY_LOG / DB_QUERY_LOG_SAMPLE). Para reunir ambas métricas
+    se puede pasar el mismo recolector: instrumentation=db_sync._instrumentation.
+    """
+
+    def __init__(self, max_size=None, acquire_timeout=None, instrumentation=None):
+        config = {**get_db_config(), "autocommit": True}
+        self._instrumentation = instrumentation or QueryInstrumentation(
+            os.getenv('DB_QUERY_LOG', 'sample').lower(),
+            float(os.getenv('DB_QUERY_LOG_SAMPLE', '0.05')))
+        self._pool = AsyncConnectionPool(
+            config,
+            max_size=max_size or int(os.getenv('DB_ASYNC_POOL_SIZE', '20')),
+            acquire_timeout=acquire_timeout or float(os.getenv('DB_ASYNC_POOL_TIMEOUT', '30')))
+        logger.info(f"✅ Pool asíncrono creado (máximo {self._pool.max_size} conexiones)")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Cierra el pool asíncrono"""
+        await self._pool.close()
+        logger.info("✅ Pool asíncrono cerrado")
+
+    def get_query_stats(self):
+        """
+        Devuelve las métricas de consultas agrupadas por huella
+
+        Returns:
+            dict: Por huella, ejecuciones, errores, filas y latencias p50/p95/p99
+        """
+        return self._instrumentation.snapshot()
+
+    async def execute_query(self, query, params=None):
+        """
+        Ejecuta una consulta de modificación (INSERT, UPDATE, DELETE)
+
+        Args:
+            query (str): Consulta SQL a ejecutar
+            params (tuple, optional): Parámetros para la consulta
+
+        Returns:
+            bool: True si la consulta se ejecutó exitosamente, False en caso contrario
+        """
+        connection = await self._pool.acquire()
+        # Solo vuelve al pool tras terminar o tras un error del servidor; una
+        # cancelación a mitad de consulta deja la conexión en un estado incierto
+        reusable = False
+        start_ns = None
+        try:
+            cursor = await connection.cursor()
+            try:
+                start_ns = time.perf_counter_ns()
+                await cursor.execute(query, params or ())
+                self._instrumentation.record(query, time.perf_counter_ns() - start_ns, cursor.rowcount)
+            finally:
+                await cursor.close()
+            reusable = True
+            return True
+        except Error as e:
+            reusable = True
+            if start_ns is not None:
+                self._instrumentation.record(query, time.perf_counter_ns() - start_ns, error=e)
+            logger.error(
+                f"❌ Error en consulta asíncrona: {e} | Query: {query} | Params: {params}")
+            return False
+        finally:
+            await self._pool.release(connection, reusable)
+
+    async def fetch_all(self, query, params=None):
+        """
+        Ejecuta una consulta de selección y devuelve todos los resultados
+
+        Args:
+            query (str): Consulta SQL SELECT
+            params (tuple, optional): Parámetros para la consulta
+
+        Returns:
+            list: Lista de diccionarios con los resultados
+        """
+        connection = await self._pool.acquire()
+        reusable = False
+        start_ns = None
+        try:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                start_ns = time.perf_counter_ns()
+                await cursor.execute(query, params or ())
+                results = await cursor.fetchall()
+                self._instrumentation.record(query, time.perf_counter_ns() - start_ns, len(results))
+            finally:
+                await cursor.close()
+            reusable = True
+            return results
+        except Error as e:
+            reusable = True
+            if start_ns is not None:
+                self._instrumentation.record(query, time.perf_counter_ns() - start_ns, error=e)
+            logger.error(
+                f"❌ Error en consulta SELECT asíncrona: {e} | Query: {query} | Params: {params}")
+            return []
+        finally:
+            await self._pool.release(connection, reusable)
+
+    async def fetch_one(self, query, params=None):
+        """
+        Ejecuta una consulta de selección y devuelve un solo resultado
+
+        Returns:
+            dict: Diccionario con el resultado o None si no hay resultados
+        """
+        results = await self.fetch_all(query, params)
+        return results[0] if results else None
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Ejecuta varias sentencias en una transacción sobre una sola conexión
+
+        Confirma al salir del bloque y hace rollback si se produce una excepción:
+
+            async with db.transaction() as tx:
+                await tx.execute("INSERT ...", params)
+                nuevo_id = tx.lastrowid
+        """
+        connection = await self._pool.acquire()
+        reusable = False
+        try:
+            cursor = await connection.cursor()
+            await cursor.execute("START TRANSACTION")
+            await cursor.close()
+
+            tx = AsyncTransaction(connection, self._instrumentation)
+            try:
+                yield tx
+                await connection.commit()
+                reusable = True
+                logger.info("✅ Transacción asíncrona confirmada")
+            except BaseException as e:
+                try:
+                    await connection.rollback()
+                except Exception as rollback_error:
+                    # No debe ocultar el error original; la conexión se cierra abajo
+                    logger.error(f"❌ Falló el rollback de la transacción asíncrona: {rollback_error}")
+                else:
+                    logger.error(f"❌ Error en transacción asíncrona, rollback ejecutado: {e}")
+                raise
+        finally:
+            # Tras un error la conexión se cierra: el rollback pudo no completarse
+            await self._pool.release(connection, reusable)
+
+
+# Bloque de ejecución para pruebas directas contra un MariaDB local
+if __name__ == "__main__":
+    async def _prueba_concurrente(total=200):
+        async with AsyncDatabaseConnection() as db:
+            inicio = time.perf_counter()
+            resultados = await asyncio.gather(*[
+                db.fetch_one("SELECT COUNT(*) AS total FROM movimientos")
+                for _ in range(total)
+            ])
+            duracion = time.perf_counter() - inicio
+            correctas = sum(1 for r in resultados if r is not None)
+            print(f"✅ {correctas}/{total} consultas concurrentes en {duracion:.2f}s")
+
+    print("🔍 Probando conexión asíncrona a base de datos...")
+    asyncio.run(_prueba_concurrente())
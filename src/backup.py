@@ -0,0 +1,1240 @@
+"""
+Backup lógico nativo de la base de datos de inventario
+
+Sustituye a la llamada a mysqldump: cada tabla se lee por bloques con
+paginación por clave primaria (keyset) y se escribe comprimida en formato
+LOAD DATA (campos separados por tabuladores, NULL como \\N). Las tablas se
+vuelcan en paralelo, cada una con su propia conexión, dentro de una
+instantánea consistente común. El resultado es un directorio con:
+
+    schema.sql.gz       Tablas, vistas, triggers y procedimientos
+    <tabla>.tsv.gz      Filas de cada tabla
+    manifest.json       Filas, tamaños y sumas SHA-256 de cada archivo
+
+Los backups incrementales solo guardan los movimientos posteriores a la marca
+de agua (último id_movimiento) del backup anterior y las filas de stock
+modificadas desde entonces; se encadenan a un backup completo (base) y la
+restauración reproduce la cadena en orden.
+
+La restauración carga las tablas en paralelo con LOAD DATA LOCAL INFILE (o
+INSERT multi-fila si el servidor no lo permite), crea los índices secundarios,
+las claves foráneas y el trigger de stock después de la carga y verifica
+sumas de control y número de filas.
+
+Uso desde la línea de comandos:
+
+    python -m src.backup backup --dir backups --compression gzip --workers 4
+    python -m src.backup backup --incremental
+    python -m src.backup list
+    python -m src.backup restore backups/backup_inventario_20250101_020000 --workers 4
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from mysql.connector import Error
+
+from src.database import get_db_config
+from src.pool import ConnectionPoolManager
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: sin ella se usa gzip
+    zstandard = None
+
+logger = logging.getLogger('BackupEngine')
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Caracteres que LOAD DATA interpreta y deben escaparse en los valores
+_SPECIAL_BYTES = re.compile(rb"[\\\t\n\r\x00]")
+_ESCAPES = {b"\\": b"\\\\", b"\t": b"\\t", b"\n": b"\\n", b"\r": b"\\r", b"\x00": b"\\0"}
+_UNESCAPES = {b"t": b"\t", b"n": b"\n", b"r": b"\r", b"0": b"\x00", b"\\": b"\\", b"Z": b"\x1a"}
+_ESCAPED_BYTE = re.compile(rb"\\(.)", re.DOTALL)
+_DEFINER_RE = re.compile(r"\s+DEFINER\s*=\s*`[^`]*`@`[^`]*`", re.IGNORECASE)
+_DEFERRABLE_RE = re.compile(
+    r"^\s*(?:(?:UNIQUE|FULLTEXT|SPATIAL)\s+)?(?:KEY|INDEX)\b|^\s*CONSTRAINT\s+\S+\s+FOREIGN\s+KEY\b",
+    re.IGNORECASE)
+# LOAD DATA LOCAL rechazado por el cliente o el servidor (local_infile desactivado)
+LOCAL_INFILE_ERRORS = (1148, 2068, 3948)
+_OBJECT_RE = re.compile(r"^CREATE\b.*?\b(TABLE|VIEW|TRIGGER|PROCEDURE|FUNCTION)\s+"
+                        r"(?:IF\s+NOT\s+EXISTS\s+)?`?([^`\s(]+)`?",
+                        re.IGNORECASE | re.DOTALL)
+
+# Cómo se capturan las tablas en un backup incremental:
+# - append: solo filas con clave mayor que la marca de agua del backup anterior
+# - changed: filas cuya columna de fecha es posterior a la instantánea anterior
+# Las demás tablas (catálogos pequeños como productos, cuya fecha_registro no
+# cambia al editar un producto) se vuelcan completas en cada incremental.
+# Si a una tabla append le faltan filas ya copiadas (movimientos tras archivar
+# particiones antiguas) se vuelca completa para que la restauración las quite.
+INCREMENTAL_TABLES = {
+    "movimientos": ("append", "id_movimiento"),
+    "movimientos_archivo": ("changed", "archivado_en"),
+    "stock": ("changed", "ultima_actualizacion")
+}
+
+
+class BackupError(Exception):
+    """Error al crear o leer un backup"""
+
+
+def quote_identifier(name):
+    """Cita un identificador de MariaDB con comillas invertidas"""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def decode_field(field):
+    """Convierte un campo en formato LOAD DATA al valor que se envía al servidor"""
+    if field == b"\\N":
+        return None
+    if b"\\" in field:
+        field = _ESCAPED_BYTE.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), field)
+    return field.decode("utf-8")
+
+
+def encode_value(value):
+    """Convierte un valor crudo del servidor al formato de LOAD DATA"""
+    if value is None:
+        return b"\\N"
+    data = bytes(value) if isinstance(value, (bytes, bytearray)) else str(value).encode("utf-8")
+    if _SPECIAL_BYTES.search(data):
+        data = _SPECIAL_BYTES.sub(lambda m: _ESCAPES[m.group(0)], data)
+    return data
+
+
+def strip_definer(sql):
+    """Elimina la cláusula DEFINER para poder restaurar con otro usuario"""
+    return _DEFINER_RE.sub("", sql, count=1)
+
+
+class _HashingWriter:
+    """Archivo binario que calcula el SHA-256 y el tamaño de lo escrito"""
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data):
+        self._file.write(data)
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return len(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CompressedWriter:
+    """
+    Escritura comprimida (gzip o zstd) con sumas de control
+
+    `content_sha256` corresponde a los datos sin comprimir y `sha256` al
+    archivo tal como queda en disco.
+    """
+
+    def __init__(self, path, compression="gzip", level=None):
+        self.path = path
+        self._raw = _HashingWriter(path)
+        self._content = hashlib.sha256()
+        if compression == "zstd":
+            if zstandard is None:
+                raise BackupError("La compresión zstd requiere el paquete 'zstandard'")
+            compressor = zstandard.ZstdCompressor(level=level or 3)
+            self._stream = compressor.stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb",
+                                         compresslevel=level or 6, mtime=0)
+
+    def write(self, data):
+        self._content.update(data)
+        self._stream.write(data)
+
+    def close(self):
+        """Cierra el archivo y devuelve sus datos para el manifiesto"""
+        self._stream.close()
+        self._raw.close()
+        return {
+            "file": os.path.basename(self.path),
+            "bytes": self._raw.bytes,
+            "sha256": self._raw.sha256.hexdigest(),
+            "content_sha256": self._content.hexdigest()
+        }
+
+
+def open_compressed(path):
+    """Abre para lectura un archivo de backup según su extensión"""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise BackupError(f"Se necesita el paquete 'zstandard' para leer {path}")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.BufferedReader(reader)
+    return gzip.open(path, "rb")
+
+
+def read_rows(path):
+    """
+    Lee las filas de un archivo de datos del backup
+
+    Yields:
+        list: Valores de cada fila (str o None)
+    """
+    with open_compressed(path) as f:
+        for line in f:
+            yield [decode_field(field) for field in line[:-1].split(b"\t")]
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Calcula el SHA-256 de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(backup_path):
+    """Lee el manifest.json de un directorio de backup"""
+    path = os.path.join(backup_path, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise BackupError(f"No se pudo leer el manifiesto {path}: {e}")
+
+
+def find_backups(backup_dir, database=None):
+    """
+    Lista los backups completos del directorio, del más antiguo al más reciente
+
+    Returns:
+        list: Manifiestos con la clave "path" añadida
+    """
+    backups = []
+    if not os.path.isdir(backup_dir):
+        return backups
+    for name in os.listdir(backup_dir):
+        path = os.path.join(backup_dir, name)
+        if not os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            continue  # Backup incompleto o directorio ajeno
+        try:
+            manifest = load_manifest(path)
+        except BackupError:
+            continue
+        if database and manifest.get("database") != database:
+            continue
+        backups.append({**manifest, "path": path})
+    backups.sort(key=lambda m: (m.get("snapshot_time") or m.get("created_at", ""), m["name"]))
+    return backups
+
+
+def resolve_chain(backup_path):
+    """
+    Devuelve los manifiestos necesarios para restaurar un backup
+
+    Returns:
+        list: Desde el backup completo base hasta el indicado, en orden
+
+    Raises:
+        BackupError: Si falta algún eslabón de la cadena
+    """
+    manifest = {**load_manifest(backup_path), "path": backup_path}
+    parent_dir = os.path.dirname(os.path.abspath(backup_path))
+    chain = []
+    for name in manifest.get("chain", []):
+        path = os.path.join(parent_dir, name)
+        if not os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            raise BackupError(f"Falta el backup {name} de la cadena de {manifest['name']}")
+        chain.append({**load_manifest(path), "path": path})
+    return chain + [manifest]
+
+
+def split_sql_script(script):
+    """
+    Divide un script SQL en sentencias respetando DELIMITER
+
+    Los cuerpos de triggers y procedimientos se escriben entre
+    `DELIMITER $$` y `DELIMITER ;` como en db/SGI_sql.sql.
+
+    Returns:
+        list: Sentencias sin el delimitador final
+    """
+    statements = []
+    delimiter = ";"
+    buffer = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        match = re.match(r"(?i)^DELIMITER\s+(\S+)\s*$", stripped)
+        if match:
+            delimiter = match.group(1)
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).rstrip()[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    if buffer and "\n".join(buffer).strip():
+        statements.append("\n".join(buffer).strip())
+    return statements
+
+
+class BackupEngine:
+    """
+    Motor de backup lógico en paralelo
+
+    Args:
+        backup_dir (str): Directorio donde se crean los backups
+        compression (str): 'gzip', 'zstd' o 'auto' (zstd si está instalado)
+        workers (int): Tablas volcadas a la vez
+        chunk_size (int): Filas por consulta keyset
+        level (int, optional): Nivel de compresión
+        config (dict, optional): Configuración de conexión (por defecto la del .env)
+    """
+
+    def __init__(self, backup_dir="backups", compression="gzip", workers=4, chunk_size=10000,
+                 level=None, config=None):
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise BackupError("La compresión zstd requiere el paquete 'zstandard'")
+
+        self.backup_dir = backup_dir
+        self.compression = compression
+        self.extension = COMPRESSION_EXTENSIONS[compression]
+        self.workers = max(1, int(workers))
+        self.chunk_size = max(1, int(chunk_size))
+        self.level = level
+        self.config = config or get_db_config()
+
+        self._progress_lock = threading.Lock()
+        self._rows_done = 0
+        self._rows_estimate = 0
+
+    # --- Descubrimiento del esquema -------------------------------------------
+
+    def _describe_tables(self, cursor):
+        """
+        Lee columnas, clave primaria, dependencias y filas estimadas de cada tabla
+
+        Returns:
+            dict: {tabla: {"columns", "primary_key", "depends_on", "estimate"}}
+                en orden de dependencias (padres antes que hijos)
+        """
+        database = self.config["database"]
+        cursor.execute(
+            "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME",
+            (database,))
+        tables = {name: {"columns": [], "primary_key": [], "depends_on": [], "estimate": rows or 0}
+                  for name, rows in cursor.fetchall()}
+
+        # Las columnas generadas (stock.estado) se recalculan al cargar
+        cursor.execute(
+            "SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = %s AND COALESCE(GENERATION_EXPRESSION, '') = '' "
+            "ORDER BY TABLE_NAME, ORDINAL_POSITION", (database,))
+        for table, column in cursor.fetchall():
+            if table in tables:
+                tables[table]["columns"].append(column)
+
+        cursor.execute(
+            "SELECT TABLE_NAME, COLUMN_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME "
+            "FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = %s "
+            "ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION", (database,))
+        for table, column, constraint, referenced in cursor.fetchall():
+            if table not in tables:
+                continue
+            if constraint == "PRIMARY":
+                tables[table]["primary_key"].append(column)
+            elif referenced and referenced != table and referenced not in tables[table]["depends_on"]:
+                tables[table]["depends_on"].append(referenced)
+
+        # Orden topológico para que el esquema y la restauración respeten las FK
+        ordered = {}
+
+        def visit(name, path=()):
+            if name in ordered or name not in tables or name in path:
+                return
+            for parent in tables[name]["depends_on"]:
+                visit(parent, path + (name,))
+            ordered[name] = tables[name]
+
+        for name in tables:
+            visit(name)
+        return ordered
+
+    def _dump_schema(self, cursor, tables, path):
+        """Escribe las sentencias CREATE de tablas, vistas, triggers y procedimientos"""
+        database = self.config["database"]
+        writer = CompressedWriter(path, self.compression, self.level)
+        writer.write(f"-- Backup SGI de {database} ({datetime.now().isoformat(timespec='seconds')})\n"
+                     "SET FOREIGN_KEY_CHECKS=0;\n\n".encode("utf-8"))
+
+        for table in tables:
+            cursor.execute(f"SHOW CREATE TABLE {quote_identifier(table)}")
+            writer.write(f"{cursor.fetchone()[1]};\n\n".encode("utf-8"))
+
+        cursor.execute(
+            "SELECT TABLE_NAME FROM information_schema.VIEWS WHERE TABLE_SCHEMA = %s "
+            "ORDER BY TABLE_NAME", (database,))
+        for (view,) in cursor.fetchall():
+            cursor.execute(f"SHOW CREATE VIEW {quote_identifier(view)}")
+            writer.write(f"{strip_definer(cursor.fetchone()[1])};\n\n".encode("utf-8"))
+
+        objects = []
+        cursor.execute(
+            "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = %s "
+            "ORDER BY TRIGGER_NAME", (database,))
+        objects += [("TRIGGER", name) for (name,) in cursor.fetchall()]
+        cursor.execute(
+            "SELECT ROUTINE_TYPE, ROUTINE_NAME FROM information_schema.ROUTINES "
+            "WHERE ROUTINE_SCHEMA = %s ORDER BY ROUTINE_TYPE, ROUTINE_NAME", (database,))
+        objects += list(cursor.fetchall())
+
+        if objects:
+            writer.write(b"DELIMITER $$\n")
+            for kind, name in objects:
+                cursor.execute(f"SHOW CREATE {kind} {quote_identifier(name)}")
+                row = cursor.fetchone()
+                # SHOW CREATE TRIGGER/PROCEDURE/FUNCTION devuelven el SQL en la 3.ª columna
+                writer.write(f"{strip_definer(row[2])}$$\n\n".encode("utf-8"))
+            writer.write(b"DELIMITER ;\n")
+
+        writer.write(b"SET FOREIGN_KEY_CHECKS=1;\n")
+        return writer.close()
+
+    # --- Volcado de filas -----------------------------------------------------
+
+    def _report(self, progress_callback, rows, table):
+        """Acumula el avance y lo notifica"""
+        with self._progress_lock:
+            self._rows_done += rows
+            done, estimate = self._rows_done, max(self._rows_estimate, self._rows_done)
+        if progress_callback:
+            progress_callback(done, estimate, table)
+
+    def _keyset_query(self, table, info, where=None):
+        """
+        Construye las consultas por bloques ordenadas por la clave primaria
+
+        Returns:
+            tuple: (primera consulta, consulta siguiente) - la siguiente recibe la
+                última clave leída; es None si la tabla no tiene clave primaria
+        """
+        select = f"SELECT {', '.join(quote_identifier(c) for c in info['columns'])} FROM {quote_identifier(table)}"
+        conditions = [where] if where else []
+        key = info["primary_key"]
+        if not key:
+            return select + (f" WHERE {where}" if where else ""), None
+
+        key_cols = ", ".join(quote_identifier(c) for c in key)
+        if len(key) == 1:
+            next_condition = f"{key_cols} > %s"
+        else:
+            next_condition = f"({key_cols}) > ({', '.join(['%s'] * len(key))})"
+        suffix = f" ORDER BY {key_cols} LIMIT {self.chunk_size}"
+        first = select + (f" WHERE {where}" if where else "") + suffix
+        following = select + f" WHERE {' AND '.join(conditions + [next_condition])}" + suffix
+        return first, following
+
+    def _dump_table(self, connection, table, info, path, progress_callback=None,
+                    where=None, params=()):
+        """
+        Vuelca una tabla en formato LOAD DATA usando consultas keyset
+
+        Args:
+            where (str, optional): Condición adicional (para backups incrementales)
+            params (tuple): Parámetros de la condición
+
+        Returns:
+            dict: Archivo, filas, tamaño, sumas de control y última clave volcada
+        """
+        first_query, next_query = self._keyset_query(table, info, where)
+        key_positions = [info["columns"].index(c) for c in info["primary_key"]]
+        writer = CompressedWriter(path, self.compression, self.level)
+        rows_total = 0
+        last_key = None
+
+        cursor = connection.cursor(raw=True)
+        try:
+            if next_query is None:
+                # Tabla sin clave primaria: una sola lectura en streaming
+                cursor.execute(first_query, tuple(params))
+                while True:
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    writer.write(b"".join(b"\t".join(map(encode_value, row)) + b"\n" for row in rows))
+                    rows_total += len(rows)
+                    self._report(progress_callback, len(rows), table)
+            else:
+                cursor.execute(first_query, tuple(params))
+                while True:
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    writer.write(b"".join(b"\t".join(map(encode_value, row)) + b"\n" for row in rows))
+                    rows_total += len(rows)
+                    self._report(progress_callback, len(rows), table)
+                    last_key = [bytes(rows[-1][i]).decode("utf-8") for i in key_positions]
+                    if len(rows) < self.chunk_size:
+                        break
+                    cursor.execute(next_query, tuple(params) + tuple(last_key))
+        finally:
+            cursor.close()
+
+        entry = writer.close()
+        entry.update({
+            "rows": rows_total,
+            "columns": info["columns"],
+            "primary_key": info["primary_key"],
+            "depends_on": info["depends_on"],
+            "last_key": last_key
+        })
+        return entry
+
+    # --- Instantánea consistente ------------------------------------------------
+
+    @staticmethod
+    def _run(connection, statement):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def _start_snapshots(self, coordinator, workers):
+        """
+        Inicia una transacción de solo lectura con la misma instantánea en todas
+        las conexiones de trabajo
+
+        Se toma un bloqueo global de lectura (FLUSH TABLES WITH READ LOCK) apenas
+        el tiempo necesario para abrir las instantáneas; si el usuario no tiene
+        el privilegio RELOAD cada conexión abre su propia instantánea.
+
+        Returns:
+            bool: True si la instantánea es común a todas las tablas
+        """
+        locked = False
+        try:
+            self._run(coordinator, "SET SESSION lock_wait_timeout = 10")
+            self._run(coordinator, "FLUSH TABLES WITH READ LOCK")
+            locked = True
+        except Error as e:
+            logger.warning(f"⚠️ Sin bloqueo global de lectura, cada tabla usará su propia instantánea: {e}")
+
+        try:
+            for connection in workers:
+                self._run(connection, "SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                self._run(connection, "START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        finally:
+            if locked:
+                self._run(coordinator, "UNLOCK TABLES")
+        return locked
+
+    # --- Punto de entrada -----------------------------------------------------
+
+    def run(self, progress_callback=None, name=None, incremental=False, max_chain=7):
+        """
+        Crea un backup completo o incremental
+
+        Args:
+            progress_callback (callable, optional): Recibe (filas_volcadas,
+                filas_estimadas, tabla) desde los hilos de trabajo
+            name (str, optional): Nombre del directorio del backup
+            incremental (bool): Encadenar al backup más reciente del directorio;
+                si no hay ninguno se crea uno completo
+            max_chain (int): Incrementales seguidos antes de forzar uno completo
+
+        Returns:
+            dict: Manifiesto del backup (incluye "path" con su directorio)
+        """
+        start = time.perf_counter()
+        parent = None
+        if incremental:
+            previous = find_backups(self.backup_dir, self.config["database"])
+            if (previous and "snapshot_time" in previous[-1]
+                    and len(previous[-1].get("chain", [])) < max_chain):
+                parent = previous[-1]
+
+        kind = "incremental" if parent else "completo"
+        name = name or f"backup_inventario_{datetime.now().strftime('%Y%m%d_%H%M%S')}" + (
+            "_inc" if parent else "")
+        path = os.path.join(self.backup_dir, name)
+        os.makedirs(path, exist_ok=False)
+        try:
+            manifest = self._run_dump(path, name, progress_callback, parent)
+        except BaseException:
+            # Un backup sin manifiesto no es restaurable: no dejar restos
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        manifest["elapsed"] = round(time.perf_counter() - start, 3)
+        with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        logger.info(
+            f"✅ Backup {kind} creado en {path}: {manifest['total_rows']:,} filas, "
+            f"{manifest['total_bytes'] / 1024:.1f} KB en {manifest['elapsed']:.2f}s")
+        return {**manifest, "path": path}
+
+    def _table_filter(self, table, info, parent, cursor=None):
+        """
+        Decide qué filas de una tabla entran en el backup
+
+        Args:
+            cursor (optional): Cursor dentro de la instantánea para comprobar
+                que las tablas append conservan las filas ya copiadas
+
+        Returns:
+            tuple: (modo, condición WHERE, parámetros) - modo es 'full',
+                'append' o 'changed'
+        """
+        if parent is None or table not in parent.get("tables", {}):
+            return "full", None, ()
+        mode, column = INCREMENTAL_TABLES.get(table, ("full", None))
+        if column not in info["columns"]:
+            return "full", None, ()
+        if mode == "append":
+            high_water = parent.get("high_water", {}).get(table)
+            if high_water is None:
+                return "full", None, ()
+            expected = parent["tables"][table].get("table_rows")
+            if cursor is not None and expected is not None:
+                cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)} "
+                               f"WHERE {quote_identifier(column)} <= %s", (high_water,))
+                current = cursor.fetchone()[0]
+                if current != expected:
+                    logger.info(f"📋 {table}: {current:,} filas hasta la marca de agua frente a "
+                                f"{expected:,} en {parent['name']}; se vuelca completa")
+                    return "full", None, ()
+            return mode, f"{quote_identifier(column)} > %s", (high_water,)
+        # >= para no perder filas modificadas en el mismo segundo de la instantánea
+        return mode, f"{quote_identifier(column)} >= %s", (parent["snapshot_time"],)
+
+    def _run_dump(self, path, name, progress_callback=None, parent=None):
+        """Vuelca esquema y tablas en `path` y devuelve el manifiesto"""
+        pool = ConnectionPoolManager({**self.config, "autocommit": True}, min_size=0,
+                                     max_size=self.workers + 1, name="backup_pool")
+        coordinator = pool.get_connection()
+        worker_connections = []
+        try:
+            cursor = coordinator.cursor()
+            try:
+                tables = self._describe_tables(cursor)
+                server_version = coordinator.get_server_info()
+            finally:
+                cursor.close()
+            if not tables:
+                raise BackupError(f"La base de datos {self.config['database']} no tiene tablas")
+
+            self._rows_done = 0
+            self._rows_estimate = sum(info["estimate"] for info in tables.values())
+
+            worker_connections = [pool.get_connection() for _ in range(min(self.workers, len(tables)))]
+            consistent = self._start_snapshots(coordinator, worker_connections)
+
+            # Hora del servidor en la instantánea: punto de partida del siguiente incremental
+            cursor = worker_connections[0].cursor()
+            try:
+                cursor.execute("SELECT NOW()")
+                snapshot_time = cursor.fetchone()[0].isoformat(sep=" ")
+                filters = {table: self._table_filter(table, info, parent, cursor)
+                           for table, info in tables.items()}
+            finally:
+                cursor.close()
+            if parent is not None:
+                # Estimación del avance: las tablas filtradas aportan pocas filas
+                self._rows_estimate = sum(info["estimate"] for table, info in tables.items()
+                                          if filters[table][0] == "full")
+
+            # El esquema se lee con la primera conexión, dentro de la instantánea
+            cursor = worker_connections[0].cursor()
+            try:
+                schema = self._dump_schema(cursor, tables,
+                                           os.path.join(path, f"schema.sql{self.extension}"))
+            finally:
+                cursor.close()
+
+            # Cada hilo toma una conexión libre y vuelca tablas completas
+            available = list(worker_connections)
+            available_lock = threading.Lock()
+
+            def dump(table):
+                with available_lock:
+                    connection = available.pop()
+                mode, where, params = filters[table]
+                try:
+                    entry = self._dump_table(
+                        connection, table, tables[table],
+                        os.path.join(path, f"{table}.tsv{self.extension}"), progress_callback,
+                        where, params)
+                    entry["mode"] = mode
+                    if mode == "full":
+                        entry["table_rows"] = entry["rows"]
+                    else:
+                        # Total de filas en la instantánea para verificar la restauración
+                        cursor = connection.cursor()
+                        try:
+                            cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}")
+                            entry["table_rows"] = cursor.fetchone()[0]
+                        finally:
+                            cursor.close()
+                    return table, entry
+                finally:
+                    with available_lock:
+                        available.append(connection)
+
+            # Las tablas más grandes primero para repartir mejor el trabajo
+            order = sorted(tables, key=lambda t: tables[t]["estimate"], reverse=True)
+            with ThreadPoolExecutor(max_workers=len(worker_connections),
+                                    thread_name_prefix="sgi-backup") as executor:
+                results = dict(executor.map(dump, order))
+        finally:
+            for connection in worker_connections:
+                try:
+                    connection.rollback()
+                except Error:
+                    pass
+                connection.close()
+            coordinator.close()
+            pool.close_all()
+
+        # Marca de agua de las tablas de solo inserción (clave máxima copiada)
+        high_water = {}
+        for table, (mode, column) in INCREMENTAL_TABLES.items():
+            if mode != "append" or table not in results:
+                continue
+            last_key = results[table]["last_key"]
+            key = results[table]["primary_key"]
+            if last_key and key and key[0] == column:
+                high_water[table] = int(last_key[0])
+            elif parent is not None and table in parent.get("high_water", {}):
+                high_water[table] = parent["high_water"][table]
+
+        return {
+            "format": FORMAT_VERSION,
+            "type": "incremental" if parent else "full",
+            "name": name,
+            "base": (parent.get("base") or parent["name"]) if parent else None,
+            "parent": parent["name"] if parent else None,
+            "chain": parent.get("chain", []) + [parent["name"]] if parent else [],
+            "since": parent["snapshot_time"] if parent else None,
+            "snapshot_time": snapshot_time,
+            "high_water": high_water,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "database": self.config["database"],
+            "server_version": server_version,
+            "compression": self.compression,
+            "consistent": consistent,
+            "schema": schema,
+            "tables": {table: results[table] for table in tables},
+            "total_rows": sum(r["rows"] for r in results.values()),
+            "total_bytes": schema["bytes"] + sum(r["bytes"] for r in results.values())
+        }
+
+
+def split_table_definition(statement):
+    """
+    Separa los índices secundarios y las claves foráneas de un CREATE TABLE
+
+    Trabaja sobre la salida de SHOW CREATE TABLE (una definición por línea).
+    Cargar los datos sin esos índices y añadirlos después con un solo ALTER
+    TABLE permite a InnoDB construirlos ordenados en lugar de fila a fila.
+
+    Returns:
+        tuple: (CREATE TABLE sin índices secundarios ni FK, lista de
+            definiciones para ALTER TABLE ... ADD)
+    """
+    lines = statement.split("\n")
+    kept, deferred = [], []
+    for line in lines:
+        if _DEFERRABLE_RE.match(line):
+            deferred.append(line.strip().rstrip(","))
+        else:
+            kept.append(line)
+    if not deferred:
+        return statement, []
+    # La última definición que queda no debe terminar en coma
+    for i in range(len(kept) - 1, 0, -1):
+        if kept[i].lstrip().startswith(")"):
+            kept[i - 1] = kept[i - 1].rstrip().rstrip(",")
+            break
+    return "\n".join(kept), deferred
+
+
+class RestoreEngine:
+    """
+    Restaura un backup (completo o incremental) en una base de datos
+
+    Reproduce la cadena desde el backup completo base:
+
+    1. Verifica el SHA-256 de todos los archivos de la cadena.
+    2. Crea las tablas con el esquema del último backup pero sin índices
+       secundarios ni claves foráneas.
+    3. Carga cada tabla en paralelo (sin FK no hay dependencias entre ellas)
+       con LOAD DATA LOCAL INFILE, o con INSERT multi-fila si el servidor no
+       lo permite, aplicando los incrementales en orden.
+    4. Añade índices y claves foráneas con un ALTER TABLE por tabla.
+    5. Crea vistas, procedimientos y el trigger de stock al final, para que
+       los movimientos restaurados no vuelvan a aplicarse al stock.
+    6. Comprueba que el número de filas coincide con el de la instantánea.
+
+    Args:
+        config (dict, optional): Configuración de conexión (por defecto la del .env)
+        database (str, optional): Base de datos destino (por defecto la de config)
+        drop_existing (bool): Eliminar antes las tablas y objetos que ya existan
+        batch_size (int): Filas por INSERT cuando no se usa LOAD DATA
+        workers (int): Tablas cargadas a la vez
+        method (str): 'auto' (LOAD DATA con respaldo a INSERT), 'load_data' o 'insert'
+        verify (bool): Verificar sumas de control y número de filas
+    """
+
+    def __init__(self, config=None, database=None, drop_existing=False, batch_size=2000,
+                 workers=4, method="auto", verify=True):
+        if method not in ("auto", "load_data", "insert"):
+            raise ValueError(f"Método de carga no soportado: {method}")
+        self.config = dict(config or get_db_config())
+        self.database = database or self.config["database"]
+        self.drop_existing = drop_existing
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(1, int(workers))
+        self.method = method
+        self.verify = verify
+        self._use_load_data = method != "insert"
+
+    @staticmethod
+    def classify_schema(script):
+        """
+        Agrupa las sentencias del schema.sql por tipo de objeto
+
+        Returns:
+            dict: {"TABLE": [(nombre, sql)], "VIEW": [...], "TRIGGER": [...],
+                "PROCEDURE": [...], "FUNCTION": [...]}
+        """
+        objects = {"TABLE": [], "VIEW": [], "TRIGGER": [], "PROCEDURE": [], "FUNCTION": []}
+        for statement in split_sql_script(script):
+            match = _OBJECT_RE.match(statement)
+            if match:
+                objects[match.group(1).upper()].append((match.group(2), statement))
+        return objects
+
+    def _read_schema(self, manifest):
+        """Lee y clasifica el esquema de un backup"""
+        with open_compressed(os.path.join(manifest["path"], manifest["schema"]["file"])) as f:
+            return self.classify_schema(f.read().decode("utf-8"))
+
+    @staticmethod
+    def _run(cursor, statement, params=()):
+        cursor.execute(statement, params)
+        if cursor.with_rows:
+            cursor.fetchall()
+
+    def _verify_files(self, chain):
+        """Comprueba en paralelo el SHA-256 de todos los archivos de la cadena"""
+        files = []
+        for manifest in chain:
+            files.append((os.path.join(manifest["path"], manifest["schema"]["file"]),
+                          manifest["schema"]["sha256"]))
+            files += [(os.path.join(manifest["path"], entry["file"]), entry["sha256"])
+                      for entry in manifest["tables"].values()]
+
+        def check(item):
+            path, expected = item
+            if not os.path.isfile(path):
+                return f"falta {path}"
+            if file_sha256(path) != expected:
+                return f"suma de control incorrecta en {path}"
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sgi-verify") as executor:
+            errors = [error for error in executor.map(check, files) if error]
+        if errors:
+            raise BackupError("Backup dañado: " + "; ".join(errors))
+
+    def _prepare_session(self, connection):
+        """Configura una sesión de carga: sin comprobaciones de FK ni de unicidad"""
+        cursor = connection.cursor()
+        try:
+            self._run(cursor, f"USE {quote_identifier(self.database)}")
+            self._run(cursor, "SET SESSION FOREIGN_KEY_CHECKS = 0")
+            self._run(cursor, "SET SESSION UNIQUE_CHECKS = 0")
+            try:
+                # Sin binlog la carga es más rápida (requiere privilegio SUPER/BINLOG ADMIN)
+                self._run(cursor, "SET SESSION sql_log_bin = 0")
+            except Error:
+                pass
+        finally:
+            cursor.close()
+
+    def _drop_existing(self, cursor, schema):
+        """Elimina los objetos del backup que ya existan en el destino"""
+        for name, _ in schema["TRIGGER"]:
+            self._run(cursor, f"DROP TRIGGER IF EXISTS {quote_identifier(name)}")
+        for kind in ("PROCEDURE", "FUNCTION"):
+            for name, _ in schema[kind]:
+                self._run(cursor, f"DROP {kind} IF EXISTS {quote_identifier(name)}")
+        for name, _ in schema["VIEW"]:
+            self._run(cursor, f"DROP VIEW IF EXISTS {quote_identifier(name)}")
+        for name, _ in reversed(schema["TABLE"]):
+            self._run(cursor, f"DROP TABLE IF EXISTS {quote_identifier(name)}")
+
+    def _create_views(self, cursor, views):
+        """Crea las vistas, reintentando las que dependen de otras vistas"""
+        pending = list(views)
+        while pending:
+            failed = []
+            for name, statement in pending:
+                try:
+                    self._run(cursor, statement)
+                except Error as e:
+                    failed.append((name, statement, e))
+            if len(failed) == len(pending):
+                raise BackupError(f"No se pudo crear la vista {failed[0][0]}: {failed[0][2]}")
+            pending = [(name, statement) for name, statement, _ in failed]
+
+    def _load_data(self, connection, table, entry, path, upsert=False):
+        """
+        Carga un archivo con LOAD DATA LOCAL INFILE
+
+        El archivo se descomprime a un temporal verificando su contenido con
+        content_sha256.
+
+        Returns:
+            int: Filas del archivo
+        """
+        digest = hashlib.sha256()
+        rows = 0
+        handle, temp_path = tempfile.mkstemp(prefix=f"sgi_{table}_", suffix=".tsv")
+        try:
+            with os.fdopen(handle, "wb") as out, open_compressed(path) as source:
+                for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    rows += chunk.count(b"\n")
+                    out.write(chunk)
+            if self.verify and digest.hexdigest() != entry["content_sha256"]:
+                raise BackupError(f"El contenido de {path} no coincide con el manifiesto")
+
+            columns = ", ".join(quote_identifier(c) for c in entry["columns"])
+            cursor = connection.cursor()
+            try:
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s {'REPLACE' if upsert else 'IGNORE'} "
+                    f"INTO TABLE {quote_identifier(table)} CHARACTER SET utf8mb4 ({columns})",
+                    (temp_path,))
+                return rows
+            finally:
+                cursor.close()
+        finally:
+            os.remove(temp_path)
+
+    def _insert_rows(self, connection, table, entry, rows, upsert=False):
+        """
+        Inserta filas en lotes de INSERT multi-fila
+
+        Returns:
+            int: Filas leídas del archivo
+        """
+        columns = entry["columns"]
+        updates = ", ".join(f"{quote_identifier(c)} = VALUES({quote_identifier(c)})"
+                            for c in columns if c not in entry["primary_key"])
+        query = (f"INSERT {'IGNORE ' if upsert and not updates else ''}INTO {quote_identifier(table)} "
+                 f"({', '.join(quote_identifier(c) for c in columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+        if upsert and updates:
+            # Las filas modificadas sustituyen a la versión anterior por clave primaria
+            query += f" ON DUPLICATE KEY UPDATE {updates}"
+
+        total = 0
+        cursor = connection.cursor()
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    cursor.executemany(query, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(query, batch)
+                total += len(batch)
+        finally:
+            cursor.close()
+        return total
+
+    def _load_file(self, connection, table, entry, path, upsert=False):
+        """Carga un archivo de datos con el método configurado"""
+        if self._use_load_data:
+            try:
+                return self._load_data(connection, table, entry, path, upsert)
+            except Error as e:
+                if self.method == "load_data" or e.errno not in LOCAL_INFILE_ERRORS:
+                    raise
+                logger.warning(f"⚠️ LOAD DATA LOCAL no disponible, se usará INSERT por lotes: {e}")
+                self._use_load_data = False
+                connection.rollback()
+        return self._insert_rows(connection, table, entry, read_rows(path), upsert)
+
+    def _restore_table(self, pool, table, chain, progress_callback=None):
+        """
+        Aplica a una tabla todos los eslabones de la cadena
+
+        Returns:
+            tuple: (tabla, filas cargadas)
+        """
+        connection = pool.get_connection()
+        loaded = 0
+        try:
+            self._prepare_session(connection)
+            for manifest in chain:
+                entry = manifest["tables"].get(table)
+                if entry is None:
+                    continue
+                mode = entry.get("mode", "full")
+                if manifest["type"] == "incremental" and mode == "full":
+                    cursor = connection.cursor()
+                    try:
+                        self._run(cursor, f"DELETE FROM {quote_identifier(table)}")
+                    finally:
+                        cursor.close()
+                rows = self._load_file(connection, table, entry,
+                                       os.path.join(manifest["path"], entry["file"]),
+                                       upsert=mode == "changed")
+                connection.commit()
+                loaded += rows
+                if progress_callback:
+                    progress_callback(manifest["name"], table, rows)
+        except BaseException:
+            try:
+                connection.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            connection.close()
+        return table, loaded
+
+    def _add_deferred(self, pool, table, definitions):
+        """Añade índices secundarios y claves foráneas con un solo ALTER TABLE"""
+        connection = pool.get_connection()
+        try:
+            self._prepare_session(connection)
+            cursor = connection.cursor()
+            try:
+                self._run(cursor, f"ALTER TABLE {quote_identifier(table)} "
+                                  + ", ".join(f"ADD {definition}" for definition in definitions))
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def _verify_counts(self, pool, manifest):
+        """
+        Compara el número de filas restauradas con el de la instantánea
+
+        Returns:
+            dict: {tabla: (esperadas, restauradas)} solo para las que no coinciden
+        """
+        mismatches = {}
+        connection = pool.get_connection()
+        try:
+            self._prepare_session(connection)
+            cursor = connection.cursor()
+            try:
+                for table, entry in manifest["tables"].items():
+                    expected = entry.get("table_rows", entry["rows"])
+                    cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}")
+                    actual = cursor.fetchone()[0]
+                    if actual != expected:
+                        mismatches[table] = (expected, actual)
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+        return mismatches
+
+    def restore(self, backup_path, progress_callback=None):
+        """
+        Restaura el backup indicado reproduciendo su cadena
+
+        Args:
+            backup_path (str): Directorio del backup (completo o incremental)
+            progress_callback (callable, optional): Recibe (backup, tabla, filas)
+                desde los hilos de carga
+
+        Returns:
+            dict: Backups aplicados, filas cargadas por tabla, método y duración
+
+        Raises:
+            BackupError: Si el backup está dañado o las filas no coinciden
+        """
+        start = time.perf_counter()
+        chain = resolve_chain(backup_path)
+        if self.verify:
+            self._verify_files(chain)
+        schema = self._read_schema(chain[-1])
+
+        tables = {}
+        for name, statement in schema["TABLE"]:
+            tables[name] = split_table_definition(statement)
+
+        config = {key: value for key, value in self.config.items() if key != "database"}
+        pool = ConnectionPoolManager({**config, "autocommit": False, "allow_local_infile": True},
+                                     min_size=0, max_size=self.workers, name="restore_pool")
+        try:
+            connection = pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    self._run(cursor, f"CREATE DATABASE IF NOT EXISTS {quote_identifier(self.database)} "
+                                      "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+                    self._prepare_session(connection)
+                    if self.drop_existing:
+                        self._drop_existing(cursor, schema)
+                    for create, _ in tables.values():
+                        self._run(cursor, create)
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
+
+            # Carga en paralelo: las tablas más grandes primero
+            sizes = {table: sum(m["tables"].get(table, {}).get("bytes", 0) for m in chain)
+                     for table in tables}
+            order = sorted(tables, key=lambda t: sizes[t], reverse=True)
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sgi-restore") as executor:
+                loaded = dict(executor.map(
+                    lambda table: self._restore_table(pool, table, chain, progress_callback), order))
+            load_time = time.perf_counter() - start
+
+            # Índices y claves foráneas (tablas en paralelo)
+            deferred = [(table, definitions) for table, (_, definitions) in tables.items() if definitions]
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sgi-restore") as executor:
+                list(executor.map(lambda item: self._add_deferred(pool, *item), deferred))
+
+            connection = pool.get_connection()
+            try:
+                self._prepare_session(connection)
+                cursor = connection.cursor()
+                try:
+                    for _, statement in schema["FUNCTION"]:
+                        self._run(cursor, statement)
+                    self._create_views(cursor, schema["VIEW"])
+                    for kind in ("PROCEDURE", "TRIGGER"):
+                        for _, statement in schema[kind]:
+                            self._run(cursor, statement)
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
+
+            mismatches = self._verify_counts(pool, chain[-1]) if self.verify else {}
+        finally:
+            pool.close_all()
+
+        if mismatches:
+            detail = ", ".join(f"{table}: {expected:,} esperadas, {actual:,} restauradas"
+                               for table, (expected, actual) in mismatches.items())
+            raise BackupError(f"La restauración no coincide con el backup ({detail})")
+
+        summary = {
+            "database": self.database,
+            "backups": [m["name"] for m in chain],
+            "rows": loaded,
+            "method": "load_data" if self._use_load_data else "insert",
+            "verified": self.verify,
+            "load_time": round(load_time, 3),
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
+        logger.info(f"✅ Restauración de {summary['backups'][-1]} completada en {summary['elapsed']:.2f}s "
+                    f"({sum(loaded.values()):,} filas, {summary['method']})")
+        return summary
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Backup y restauración de la base de datos de inventario")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup = commands.add_parser("backup", help="Crear un backup")
+    backup.add_argument("--dir", default="backups", help="Directorio de backups")
+    backup.add_argument("--incremental", action="store_true",
+                        help="Encadenar al backup más reciente (completo si no hay ninguno)")
+    backup.add_argument("--max-chain", type=int, default=7,
+                        help="Incrementales seguidos antes de forzar uno completo")
+    backup.add_argument("--compression", default="gzip", choices=["gzip", "zstd", "auto"])
+    backup.add_argument("--level", type=int, default=None, help="Nivel de compresión")
+    backup.add_argument("--workers", type=int, default=4, help="Tablas volcadas en paralelo")
+    backup.add_argument("--chunk-size", type=int, default=10000, help="Filas por consulta")
+
+    listing = commands.add_parser("list", help="Listar los backups de un directorio")
+    listing.add_argument("--dir", default="backups", help="Directorio de backups")
+
+    restore = commands.add_parser("restore", help="Restaurar un backup y su cadena")
+    restore.add_argument("path", help="Directorio del backup a restaurar")
+    restore.add_argument("--database", default=None, help="Base de datos destino")
+    restore.add_argument("--drop-existing", action="store_true",
+                         help="Eliminar las tablas y objetos existentes antes de restaurar")
+    restore.add_argument("--batch-size", type=int, default=2000, help="Filas por INSERT")
+    restore.add_argument("--workers", type=int, default=4, help="Tablas cargadas en paralelo")
+    restore.add_argument("--method", default="auto", choices=["auto", "load_data", "insert"],
+                         help="LOAD DATA LOCAL INFILE o INSERT por lotes")
+    restore.add_argument("--no-verify", action="store_true",
+                         help="No verificar sumas de control ni número de filas")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for manifest in find_backups(args.dir):
+            print(f"{manifest['name']:<45} {manifest['type']:<12} {manifest['total_rows']:>12,} filas "
+                  f"{manifest['total_bytes'] / 1024:>10.1f} KB")
+        return 0
+
+    if args.command == "restore":
+        def restore_progress(backup_name, table, rows):
+            print(f"📥 {backup_name}: {table} ({rows:,} filas)")
+
+        engine = RestoreEngine(database=args.database, drop_existing=args.drop_existing,
+                               batch_size=args.batch_size, workers=args.workers,
+                               method=args.method, verify=not args.no_verify)
+        summary = engine.restore(args.path, restore_progress)
+        print(f"✅ Restaurados {len(summary['backups'])} backups en {summary['database']} "
+              f"({sum(summary['rows'].values()):,} filas con {summary['method']}, "
+              f"{summary['elapsed']:.2f}s)")
+        return 0
+
+    def progress(done, estimate, table):
+        print(f"\r💾 {done:,}/{estimate:,} filas ({table})", end="", flush=True)
+
+    engine = BackupEngine(args.dir, compression=args.compression, workers=args.workers,
+                          chunk_size=args.chunk_size, level=args.level)
+    manifest = engine.run(progress, incremental=args.incremental, max_chain=args.max_chain)
+    print(f"\n✅ Backup {manifest['type']} creado en {manifest['path']} "
+          f"({manifest['total_rows']:,} filas, {manifest['total_bytes'] / 1024:.1f} KB, "
+          f"{manifest['elapsed']:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
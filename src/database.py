@@ -1,10 +1,27 @@
-from mysql.connector import Error, pooling
+from mysql.connector import Error
+from mysql.connector.cursor import RE_PY_PARAM
 import os
 from dotenv import load_dotenv
+import json
 import logging
-from datetime import datetime
+import logging.handlers
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
 from typing import Optional
 
+from src.pool import ConnectionPoolManager, PoolExhaustedError, ReplicaRouter
+from src.results import ResultSet, check_result_format, convert_rows
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -14,6 +31,780 @@ logging.basicConfig(
 logger = logging.getLogger('DatabaseConnection')
 
 
+def get_db_config():
+    """
+    Lee la configuración de conexión desde las variables de entorno (.env)
+
+    Returns:
+        dict: host, port, database, user, password, charset y collation
+    """
+    load_dotenv()
+    return {
+        "host": os.getenv('DB_HOST', 'localhost'),
+        "port": int(os.getenv('DB_PORT', '3306')),
+        "database": os.getenv('DB_NAME', 'gestion_inventario'),
+        "user": os.getenv('DB_USER', 'root'),
+        "password": os.getenv('DB_PASSWORD', ''),
+        "charset": 'utf8mb4',
+        "collation": 'utf8mb4_unicode_ci'
+    }
+
+
+def get_replica_config():
+    """
+    Lee la configuración de la réplica de lectura (DB_REPLICA_*)
+
+    Los valores no definidos se toman de la configuración del primario.
+
+    Returns:
+        dict | None: Configuración de conexión, o None si DB_REPLICA_HOST no está definida
+    """
+    config = get_db_config()
+    host = os.getenv('DB_REPLICA_HOST')
+    if not host:
+        return None
+    config.update({
+        "host": host,
+        "port": int(os.getenv('DB_REPLICA_PORT', str(config["port"]))),
+        "database": os.getenv('DB_REPLICA_NAME', config["database"]),
+        "user": os.getenv('DB_REPLICA_USER', config["user"]),
+        "password": os.getenv('DB_REPLICA_PASSWORD', config["password"])
+    })
+    return config
+
+
+class PreparedStatementCache:
+    """
+    Caché LRU de sentencias preparadas por conexión física del pool
+
+    Cada conexión física guarda sus propios cursores preparados indexados por el
+    texto SQL, de modo que una consulta se prepara una sola vez por conexión y
+    las ejecuciones siguientes sólo envían los parámetros. Si la conexión se
+    reconecta (cambia su connection_id) las sentencias se vuelven a preparar.
+
+    El cursor preparado solo reutiliza la sentencia si recibe el mismo objeto
+    str que la preparó (compara con `is`), por eso junto al cursor se guarda
+    el texto original y get_cursor lo devuelve para ejecutarlo: una consulta
+    construida en cada llamada (f-string) tiene el mismo texto pero otro objeto.
+    """
+
+    # ER_UNKNOWN_STMT_HANDLER: el servidor ya no conoce la sentencia preparada
+    STALE_STATEMENT_ERRORS = (1243,)
+
+    def __init__(self, max_statements=64):
+        self.max_statements = max(1, int(max_statements))
+        self._connections = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reprepares = 0
+
+    @staticmethod
+    def _raw_connection(connection):
+        """Devuelve la conexión física detrás de una conexión del pool"""
+        return getattr(connection, "_cnx", connection)
+
+    def _statements_for(self, raw):
+        """Devuelve el LRU de la conexión, descartándolo si hubo reconexión"""
+        entry = self._connections.get(raw)
+        if entry is None or entry["connection_id"] != raw.connection_id:
+            if entry is not None:
+                self.reprepares += len(entry["statements"])
+            entry = {"connection_id": raw.connection_id, "statements": OrderedDict()}
+            self._connections[raw] = entry
+        return entry["statements"]
+
+    def get_cursor(self, connection, query, dictionary=True):
+        """
+        Obtiene un cursor preparado para la consulta en la conexión indicada
+
+        Args:
+            connection: Conexión obtenida del pool
+            query (str): Consulta SQL (clave de la caché)
+            dictionary (bool): Si las filas se devuelven como diccionarios
+
+        Returns:
+            tuple: (cursor preparado, texto SQL con el que debe ejecutarse)
+        """
+        raw = self._raw_connection(connection)
+        key = (query, dictionary)
+
+        with self._lock:
+            statements = self._statements_for(raw)
+            entry = statements.get(key)
+            if entry is not None:
+                statements.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = (raw.cursor(prepared=True, dictionary=dictionary), query)
+
+        with self._lock:
+            statements[key] = entry
+            while len(statements) > self.max_statements:
+                _, (old_cursor, _) = statements.popitem(last=False)
+                self.evictions += 1
+                try:
+                    old_cursor.close()
+                except Exception:
+                    pass
+        return entry
+
+    def discard(self, connection, query, dictionary=True):
+        """Elimina una sentencia de la caché (por ejemplo, tras un error)"""
+        raw = self._raw_connection(connection)
+        with self._lock:
+            entry = self._connections.get(raw)
+            statement = entry["statements"].pop((query, dictionary), None) if entry else None
+        if statement is not None:
+            try:
+                statement[0].close()
+            except Exception:
+                pass
+
+    def invalidate(self, connection):
+        """Olvida todas las sentencias de una conexión para forzar su re-preparación"""
+        raw = self._raw_connection(connection)
+        with self._lock:
+            entry = self._connections.pop(raw, None)
+            if entry is not None:
+                self.reprepares += len(entry["statements"])
+
+    def get_stats(self):
+        """Devuelve los contadores de uso de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reprepares": self.reprepares,
+                "cached_statements": sum(len(e["statements"]) for e in self._connections.values()),
+                "hit_ratio": self.hits / total if total else 0.0
+            }
+
+
+class QueryResultCache:
+    """
+    Caché LRU/TTL de resultados de consultas SELECT etiquetada por tablas
+
+    Cada entrada se indexa por (SQL, parámetros) y se etiqueta con las tablas que
+    lee la consulta. Las escrituras invalidan sólo las etiquetas de las tablas
+    que modifican (incluyendo las que actualizan sus triggers), de modo que un
+    INSERT en movimientos no descarta el catálogo de productos. El TTL acota la
+    antigüedad de los datos escritos por otras terminales.
+    """
+
+    # Tablas base que lee cada vista
+    VIEW_DEPENDENCIES = {
+        "vista_alertas_stock": ("productos", "stock")
+    }
+
+    # Tablas modificadas indirectamente por triggers al escribir en la clave
+    TRIGGER_DEPENDENCIES = {
+        "movimientos": ("stock", "consumo_diario", "snapshots_stock"),
+        "productos": ("stock",),
+        "umbrales_stock": ("stock",)
+    }
+
+    _READ_TABLES_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+    _WRITE_TABLE_RE = re.compile(
+        r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+`?(\w+)`?",
+        re.IGNORECASE)
+    _SELECT_RE = re.compile(r"^\s*(?:SELECT|SHOW|EXPLAIN)\b", re.IGNORECASE)
+
+    def __init__(self, max_entries=256, ttl=30.0, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._tag_index = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def tables_read(cls, query):
+        """Devuelve las tablas base que lee una consulta"""
+        tables = set()
+        for name in cls._READ_TABLES_RE.findall(query):
+            name = name.lower()
+            tables.update(cls.VIEW_DEPENDENCIES.get(name, (name,)))
+        return frozenset(tables)
+
+    @classmethod
+    def tables_written(cls, query):
+        """
+        Devuelve las tablas que modifica una sentencia
+
+        Returns:
+            frozenset | None: Tablas afectadas, vacío si es una lectura o None si
+                no se puede determinar (DDL, CALL...) y hay que invalidar todo
+        """
+        if cls._SELECT_RE.match(query):
+            return frozenset()
+        match = cls._WRITE_TABLE_RE.match(query)
+        if not match:
+            return None
+        table = match.group(1).lower()
+        return frozenset((table,) + cls.TRIGGER_DEPENDENCIES.get(table, ()))
+
+    @staticmethod
+    def make_key(kind, query, params):
+        """Construye una clave hashable a partir de la consulta y sus parámetros"""
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif params is not None:
+            params = tuple(params)
+        return (kind, query, params)
+
+    @staticmethod
+    def _estimate_size(value):
+        """Estimación aproximada de la memoria ocupada por un resultado"""
+        size = sys.getsizeof(value)
+        rows = value if isinstance(value, list) else [value]
+        for row in rows:
+            if isinstance(row, dict):
+                size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+            elif isinstance(row, tuple):
+                size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+            elif row is not None:
+                size += sys.getsizeof(row)
+        return size
+
+    def begin(self, query):
+        """
+        Prepara una lectura: devuelve las etiquetas y sus generaciones actuales
+
+        Si alguna etiqueta se invalida mientras la consulta está en curso, el
+        resultado no se guarda para no cachear datos ya obsoletos.
+        """
+        tags = self.tables_read(query)
+        with self._lock:
+            return tags, {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def get(self, key):
+        """
+        Busca un resultado en la caché
+
+        Returns:
+            tuple: (encontrado, valor)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if self.ttl > 0 and time.monotonic() - entry["stored_at"] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry["value"]
+
+    def put(self, key, value, token):
+        """Guarda un resultado si sus tablas no cambiaron durante la consulta"""
+        tags, generations = token
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if any(self._generations.get(tag, 0) != gen for tag, gen in generations.items()):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                "value": value,
+                "tags": tags,
+                "size": size,
+                "stored_at": time.monotonic()
+            }
+            self._bytes += size
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Elimina una entrada (requiere tener el lock)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        for tag in entry["tags"]:
+            keys = self._tag_index.get(tag)
+            if keys:
+                keys.discard(key)
+
+    def invalidate_tables(self, tables):
+        """
+        Invalida las entradas que leen alguna de las tablas indicadas
+
+        Args:
+            tables (iterable | None): Tablas modificadas; None invalida todo
+        """
+        with self._lock:
+            if tables is None:
+                tables = set(self._tag_index) | set(self._generations)
+                for key in list(self._entries):
+                    self._remove(key)
+                    self.invalidations += 1
+            for tag in tables:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tag_index.pop(tag, ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def invalidate_query(self, query):
+        """Invalida las etiquetas afectadas por una sentencia de escritura"""
+        tables = self.tables_written(query)
+        if tables is None or tables:
+            self.invalidate_tables(tables)
+
+    def clear(self):
+        """Vacía la caché completa"""
+        self.invalidate_tables(None)
+
+    def get_stats(self):
+        """Devuelve los contadores de la caché para ajustar su tamaño y TTL"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+_FINGERPRINT_RULES = (
+    (re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL), " "),
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), "?"),
+    (re.compile(r'"(?:[^"\\]|\\.)*"'), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?+)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_query(query):
+    """
+    Normaliza una consulta para agrupar ejecuciones equivalentes
+
+    Elimina comentarios, reemplaza literales y parámetros por '?', colapsa las
+    listas IN y los espacios. El resultado se memoriza porque las consultas de
+    la aplicación son casi siempre el mismo texto.
+    """
+    normalized = query
+    for pattern, replacement in _FINGERPRINT_RULES:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized.strip().lower()
+
+
+class QueryInstrumentation:
+    """
+    Métricas de consultas por huella (fingerprint) con histogramas de latencia
+
+    Las latencias se miden con perf_counter_ns y se acumulan en cubetas fijas,
+    de modo que registrar una consulta cuesta unas pocas operaciones sin formatear
+    texto. El registro en database.log puede ser 'none', 'sample' (una fracción
+    aleatoria de las consultas) o 'all'; los errores los registra siempre quien
+    ejecuta la consulta, con sus parámetros.
+    """
+
+    # Límites superiores de las cubetas del histograma, en segundos
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+               0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    _BUCKETS_NS = tuple(int(b * 1e9) for b in BUCKETS)
+
+    LOG_MODES = ("none", "sample", "all")
+
+    def __init__(self, log_mode="sample", sample_rate=0.05):
+        if log_mode not in self.LOG_MODES:
+            log_mode = "sample"
+        self.log_mode = log_mode
+        self.sample_rate = float(sample_rate)
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, query, elapsed_ns, rows=0, error=None):
+        """
+        Registra una ejecución
+
+        Args:
+            query (str): Texto de la consulta
+            elapsed_ns (int): Duración en nanosegundos
+            rows (int): Filas devueltas o afectadas
+            error (Exception, optional): Error producido, si lo hubo
+        """
+        fingerprint = fingerprint_query(query)
+        bucket = bisect_left(self._BUCKETS_NS, elapsed_ns)
+
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                stats = self._stats[fingerprint] = {
+                    "count": 0,
+                    "errors": 0,
+                    "rows": 0,
+                    "sum_ns": 0,
+                    "max_ns": 0,
+                    "buckets": [0] * (len(self.BUCKETS) + 1)
+                }
+            stats["count"] += 1
+            stats["rows"] += rows
+            stats["sum_ns"] += elapsed_ns
+            if elapsed_ns > stats["max_ns"]:
+                stats["max_ns"] = elapsed_ns
+            stats["buckets"][bucket] += 1
+            if error is not None:
+                stats["errors"] += 1
+
+        if error is not None or self.log_mode == "none":
+            return
+        if self.log_mode == "all" or random.random() < self.sample_rate:
+            logger.info("✅ Consulta: %.80s | Filas: %d | Tiempo: %.4fs",
+                        fingerprint, rows, elapsed_ns / 1e9)
+
+    def _percentile(self, stats, q):
+        """Estima un percentil interpolando linealmente dentro de la cubeta"""
+        target = q * stats["count"]
+        cumulative = 0
+        lower = 0.0
+        for idx, count in enumerate(stats["buckets"]):
+            upper = self.BUCKETS[idx] if idx < len(self.BUCKETS) else stats["max_ns"] / 1e9
+            if count and cumulative + count >= target:
+                fraction = (target - cumulative) / count
+                return min(lower + (upper - lower) * fraction, stats["max_ns"] / 1e9)
+            cumulative += count
+            lower = upper
+        return stats["max_ns"] / 1e9
+
+    def snapshot(self):
+        """
+        Devuelve una foto de las métricas por huella
+
+        Returns:
+            dict: Por cada huella, ejecuciones, errores, filas, promedio, p50,
+                p95, p99 y máximo (en milisegundos)
+        """
+        with self._lock:
+            stats_copy = {fp: {**st, "buckets": list(st["buckets"])} for fp, st in self._stats.items()}
+
+        queries = {}
+        for fingerprint, stats in stats_copy.items():
+            count = stats["count"]
+            queries[fingerprint] = {
+                "count": count,
+                "errors": stats["errors"],
+                "rows": stats["rows"],
+                "avg_ms": stats["sum_ns"] / count / 1e6 if count else 0.0,
+                "p50_ms": self._percentile(stats, 0.50) * 1000,
+                "p95_ms": self._percentile(stats, 0.95) * 1000,
+                "p99_ms": self._percentile(stats, 0.99) * 1000,
+                "max_ms": stats["max_ns"] / 1e6,
+                "total_ms": stats["sum_ns"] / 1e6
+            }
+        return {
+            "since": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "queries": queries
+        }
+
+    def to_json(self, indent=2):
+        """Serializa la foto de métricas en JSON"""
+        return json.dumps(self.snapshot(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefix="sgi_query"):
+        """Serializa las métricas en el formato de texto de Prometheus"""
+        with self._lock:
+            stats_copy = {fp: {**st, "buckets": list(st["buckets"])} for fp, st in self._stats.items()}
+
+        def label(fingerprint):
+            escaped = fingerprint.replace("\\", "\\\\").replace('"', '\\"')
+            return f'fingerprint="{escaped}"'
+
+        lines = [
+            f"# HELP {prefix}_duration_seconds Latencia de consultas por huella",
+            f"# TYPE {prefix}_duration_seconds histogram"
+        ]
+        for fingerprint, stats in stats_copy.items():
+            lbl = label(fingerprint)
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, stats["buckets"]):
+                cumulative += count
+                lines.append(f'{prefix}_duration_seconds_bucket{{{lbl},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_duration_seconds_bucket{{{lbl},le="+Inf"}} {stats["count"]}')
+            lines.append(f'{prefix}_duration_seconds_sum{{{lbl}}} {stats["sum_ns"] / 1e9:.6f}')
+            lines.append(f'{prefix}_duration_seconds_count{{{lbl}}} {stats["count"]}')
+
+        lines.append(f"# HELP {prefix}_errors_total Consultas fallidas por huella")
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for fingerprint, stats in stats_copy.items():
+            lines.append(f'{prefix}_errors_total{{{label(fingerprint)}}} {stats["errors"]}')
+
+        lines.append(f"# HELP {prefix}_rows_total Filas devueltas o afectadas por huella")
+        lines.append(f"# TYPE {prefix}_rows_total counter")
+        for fingerprint, stats in stats_copy.items():
+            lines.append(f'{prefix}_rows_total{{{label(fingerprint)}}} {stats["rows"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Descarta las métricas acumuladas"""
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+
+class SlowQueryLog:
+    """
+    Registro de consultas lentas con su plan de ejecución
+
+    Cuando una consulta supera el umbral se guarda el SQL, los parámetros
+    enmascarados, el tiempo y la salida de EXPLAIN FORMAT=JSON. Los registros
+    se mantienen en memoria (los más recientes) y en un archivo JSONL rotativo.
+    El EXPLAIN se ejecuta en un hilo aparte para no alargar la consulta lenta y
+    como mucho una vez por huella cada `explain_cooldown` segundos.
+    """
+
+    _EXPLAINABLE_RE = re.compile(r"^\s*(?:SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+    def __init__(self, threshold_ms=500.0, capacity=200, log_file='slow_queries.jsonl',
+                 max_bytes=1024 * 1024, backup_count=3, mask_params=True, explain_cooldown=300.0):
+        self.threshold_ns = int(float(threshold_ms) * 1e6)
+        self.mask = mask_params
+        self.explain_cooldown = explain_cooldown
+        self._entries = deque(maxlen=int(capacity))
+        self._plans = {}
+        self._lock = threading.Lock()
+
+        self._file_logger = None
+        if log_file:
+            self._file_logger = logging.getLogger('SlowQueries')
+            self._file_logger.propagate = False
+            if not self._file_logger.handlers:
+                handler = logging.handlers.RotatingFileHandler(
+                    log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self._file_logger.addHandler(handler)
+            self._file_logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def mask_params(params):
+        """Oculta el contenido de los parámetros de texto conservando su tipo y longitud"""
+        if params is None:
+            return None
+        values = params.values() if isinstance(params, dict) else params
+        masked = []
+        for value in values:
+            if isinstance(value, (str, bytes)):
+                masked.append(f"<{type(value).__name__}:{len(value)}>")
+            else:
+                masked.append(str(value) if value is not None else None)
+        return masked
+
+    def is_slow(self, elapsed_ns):
+        """Indica si una duración supera el umbral configurado"""
+        return elapsed_ns >= self.threshold_ns
+
+    def capture(self, query, params, elapsed_ns, rows, explain):
+        """
+        Registra una consulta lenta
+
+        Args:
+            query (str): Consulta SQL
+            params: Parámetros usados
+            elapsed_ns (int): Duración en nanosegundos
+            rows (int): Filas devueltas o afectadas
+            explain (callable): Función (query, params) -> plan JSON
+        """
+        fingerprint = fingerprint_query(query)
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "fingerprint": fingerprint,
+            "sql": " ".join(query.split()),
+            "params": self.mask_params(params) if self.mask else [str(p) for p in (params or ())],
+            "elapsed_ms": round(elapsed_ns / 1e6, 3),
+            "rows": rows,
+            "plan": None
+        }
+
+        now = time.monotonic()
+        with self._lock:
+            self._entries.append(entry)
+            cached = self._plans.get(fingerprint)
+            reuse = cached is not None and now - cached[0] < self.explain_cooldown
+            if reuse:
+                entry["plan"] = cached[1]
+            elif self._EXPLAINABLE_RE.match(query):
+                self._plans[fingerprint] = (now, None)
+
+        logger.warning("🐢 Consulta lenta (%.1f ms): %.120s", entry["elapsed_ms"], entry["sql"])
+
+        if reuse or not self._EXPLAINABLE_RE.match(query):
+            self._write(entry)
+            return
+
+        def run_explain():
+            try:
+                plan = explain(query, params)
+            except Exception as e:
+                plan = {"error": str(e)}
+            with self._lock:
+                entry["plan"] = plan
+                self._plans[fingerprint] = (time.monotonic(), plan)
+            self._write(entry)
+
+        threading.Thread(target=run_explain, name="sgi-explain", daemon=True).start()
+
+    def _write(self, entry):
+        """Persiste el registro en el archivo rotativo"""
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+    def entries(self):
+        """Devuelve los registros en memoria, del más reciente al más antiguo"""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._entries)]
+
+    def clear(self):
+        """Vacía los registros en memoria"""
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+
+class Transaction:
+    """
+    Operaciones disponibles dentro de DatabaseConnection.transaction()
+
+    Todas las sentencias usan la misma conexión, por lo que `lastrowid`
+    corresponde siempre al último INSERT de esta transacción.
+    """
+
+    def __init__(self, db, connection):
+        self._db = db
+        self._connection = connection
+        self._savepoint_seq = 0
+        self.written = []
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        """
+        Ejecuta una sentencia de modificación dentro de la transacción
+
+        Returns:
+            int: Filas afectadas
+        """
+        start_ns = time.perf_counter_ns()
+        cursor, cached = None, False
+        try:
+            cursor, cached = self._db._execute(self._connection, query, params, dictionary=False)
+            self.lastrowid = cursor.lastrowid
+            self.rowcount = cursor.rowcount
+            self.written.append(query)
+            self._db._record_query(query, params, start_ns, self.rowcount)
+            return self.rowcount
+        except Error as e:
+            self._db._record_query(query, params, start_ns, error=e)
+            raise
+        finally:
+            if cursor and not cached:
+                cursor.close()
+
+    def executemany(self, query, params_seq):
+        """
+        Ejecuta una sentencia con varios juegos de parámetros
+
+        Returns:
+            int: Filas afectadas
+        """
+        start_ns = time.perf_counter_ns()
+        cursor = self._connection.cursor()
+        try:
+            cursor.executemany(query, params_seq)
+            self.lastrowid = cursor.lastrowid
+            self.rowcount = cursor.rowcount
+            self.written.append(query)
+            self._db._record_query(query, None, start_ns, self.rowcount)
+            return self.rowcount
+        except Error as e:
+            self._db._record_query(query, None, start_ns, error=e)
+            raise
+        finally:
+            cursor.close()
+
+    def fetch_all(self, query, params=None):
+        """Ejecuta un SELECT dentro de la transacción y devuelve todas las filas"""
+        start_ns = time.perf_counter_ns()
+        cursor, cached = None, False
+        try:
+            cursor, cached = self._db._execute(self._connection, query, params)
+            results = cursor.fetchall()
+            self._db._record_query(query, params, start_ns, len(results))
+            return results
+        except Error as e:
+            self._db._record_query(query, params, start_ns, error=e)
+            raise
+        finally:
+            if cursor and not cached:
+                cursor.close()
+
+    def fetch_one(self, query, params=None):
+        """Ejecuta un SELECT dentro de la transacción y devuelve la primera fila"""
+        rows = self.fetch_all(query, params)
+        return rows[0] if rows else None
+
+    @contextmanager
+    def savepoint(self, name=None):
+        """
+        Define un punto de guardado dentro de la transacción
+
+        Si el bloque lanza una excepción se deshacen solo sus cambios y la
+        excepción se propaga; la transacción exterior sigue abierta:
+
+            with tx.savepoint():
+                tx.execute(...)
+        """
+        if name is None:
+            self._savepoint_seq += 1
+            name = f"sp_{self._savepoint_seq}"
+        elif not re.fullmatch(r"\w+", name):
+            raise ValueError(f"Nombre de savepoint no válido: {name!r}")
+
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {name}")
+            written = len(self.written)
+            try:
+                yield name
+            except BaseException:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+                del self.written[written:]
+                raise
+            cursor.execute(f"RELEASE SAVEPOINT {name}")
+        finally:
+            cursor.close()
+
+
 class DatabaseConnection:
     """
     Clase para gestionar la conexión y operaciones con la base de datos MariaDB/MySQL
@@ -21,7 +812,25 @@ class DatabaseConnection:
     """
 
     _instance = None
-    _pool: Optional[pooling.MySQLConnectionPool] = None
+    _pool: Optional[ConnectionPoolManager] = None
+    _statement_cache: Optional[PreparedStatementCache] = None
+    _result_cache: Optional[QueryResultCache] = None
+    _instrumentation: Optional[QueryInstrumentation] = None
+    _slow_log: Optional[SlowQueryLog] = None
+    _replica: Optional[ReplicaRouter] = None
+    _movement_procedure_enabled = True
+    _movement_procedure_missing_at: Optional[float] = None
+    _known_tables: Optional[dict] = None
+
+    # Segundos durante los que se recuerda que una tabla o un procedimiento no existe
+    _MISSING_SCHEMA_TTL = 300.0
+
+    # Columnas aceptadas por la carga masiva de movimientos (en orden)
+    MOVEMENT_COLUMNS = ("producto_id", "tipo", "cantidad", "responsable", "motivo", "fecha")
+
+    # Formatos de fecha aceptados al importar (los de la aplicación y los ISO)
+    MOVEMENT_DATE_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+                             "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
 
     def __new__(cls):
         """Implementación de patrón Singleton para la conexión"""
@@ -36,26 +845,65 @@ class DatabaseConnection:
             # Cargar variables de entorno
             load_dotenv()
 
+            # Métricas por consulta y nivel de registro (none | sample | all)
+            self._instrumentation = QueryInstrumentation(
+                os.getenv('DB_QUERY_LOG', 'sample').lower(),
+                float(os.getenv('DB_QUERY_LOG_SAMPLE', '0.05')))
+
+            # Captura de consultas lentas con EXPLAIN (desactivada por defecto;
+            # activarla con un umbral, p. ej. DB_SLOW_QUERY_MS=500)
+            slow_threshold = float(os.getenv('DB_SLOW_QUERY_MS', '0'))
+            if slow_threshold > 0:
+                self._slow_log = SlowQueryLog(
+                    threshold_ms=slow_threshold,
+                    capacity=int(os.getenv('DB_SLOW_QUERY_KEEP', '200')),
+                    log_file=os.getenv('DB_SLOW_QUERY_FILE', 'slow_queries.jsonl'),
+                    mask_params=os.getenv('DB_SLOW_QUERY_MASK', '1').lower() in ('1', 'true', 'yes'))
+
+            # Sentencias preparadas (opcional). El reset de sesión al devolver una
+            # conexión al pool descarta las sentencias preparadas, por eso se
+            # desactiva cuando este modo está habilitado.
+            use_prepared = os.getenv('DB_PREPARED_STATEMENTS', '0').lower() in ('1', 'true', 'yes')
+            if use_prepared:
+                self._statement_cache = PreparedStatementCache(
+                    int(os.getenv('DB_PREPARED_CACHE_SIZE', '64')))
+
+            # Caché de resultados (opcional)
+            if os.getenv('DB_RESULT_CACHE', '0').lower() in ('1', 'true', 'yes'):
+                self.enable_result_cache(
+                    max_entries=int(os.getenv('DB_RESULT_CACHE_ENTRIES', '256')),
+                    ttl=float(os.getenv('DB_RESULT_CACHE_TTL', '30')),
+                    max_bytes=int(os.getenv('DB_RESULT_CACHE_MAX_BYTES', str(16 * 1024 * 1024))))
+
             # Configuración del pool de conexiones
             db_config = {
-                "host": os.getenv('DB_HOST', 'localhost'),
-                "port": int(os.getenv('DB_PORT', '3306')),
-                "database": os.getenv('DB_NAME', 'gestion_inventario'),
-                "user": os.getenv('DB_USER', 'root'),
-                "password": os.getenv('DB_PASSWORD', ''),
-                "pool_name": "inventory_pool",
-                "pool_size": 5,
-                "pool_reset_session": True,
-                "autocommit": True,
-                "charset": 'utf8mb4',
-                "collation": 'utf8mb4_unicode_ci'
+                **get_db_config(),
+                "autocommit": True
             }
 
-            # Crear pool de conexiones
-            self._pool = pooling.MySQLConnectionPool(**db_config)
-            logger.info("✅ Pool de conexiones creado exitosamente")
+            # Crear pool de conexiones (tamaño y reciclaje configurables por entorno).
+            # Por defecto las conexiones se abren en segundo plano para que la
+            # ventana aparezca sin esperar a la base de datos.
+            lazy = os.getenv('DB_POOL_LAZY', '1').lower() in ('1', 'true', 'yes')
+            self._pool = ConnectionPoolManager(
+                db_config,
+                min_size=int(os.getenv('DB_POOL_MIN', '1')),
+                max_size=int(os.getenv('DB_POOL_MAX', '5')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '10')),
+                max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                max_idle_time=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                ping_after=float(os.getenv('DB_POOL_PING_AFTER', '30')),
+                reset_session=not use_prepared,
+                warm=not lazy
+            )
+            if lazy:
+                self._pool.warm_up_async()
+            logger.info(
+                f"✅ Pool de conexiones creado exitosamente (mín. {self._pool.min_size}, máx. {self._pool.max_size})")
             print("✅ Pool de conexiones a base de datos inicializado")
 
+            self._initialize_replica_pool(use_prepared, lazy)
+
         except Error as e:
             logger.error(f"❌ Error al crear pool de conexiones: {e}")
             print(f"❌ Error crítico al inicializar la base de datos: {e}")
@@ -66,6 +914,43 @@ class DatabaseConnection:
             print(f"❌ Error crítico en configuración de base de datos: {e}")
             raise
 
+    def _initialize_replica_pool(self, use_prepared=False, lazy=False):
+        """
+        Crea el pool de la réplica de lectura si DB_REPLICA_HOST está definida
+
+        Un fallo al conectar con la réplica no impide arrancar: las lecturas
+        siguen yendo al primario.
+        """
+        replica_config = get_replica_config()
+        if replica_config is None:
+            return
+        try:
+            pool = ConnectionPoolManager(
+                {**replica_config, "autocommit": True},
+                min_size=int(os.getenv('DB_REPLICA_POOL_MIN', os.getenv('DB_POOL_MIN', '1'))),
+                max_size=int(os.getenv('DB_REPLICA_POOL_MAX', os.getenv('DB_POOL_MAX', '5'))),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '10')),
+                max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                max_idle_time=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                ping_after=float(os.getenv('DB_POOL_PING_AFTER', '30')),
+                reset_session=not use_prepared,
+                name="inventory_replica_pool",
+                warm=not lazy
+            )
+            if lazy:
+                pool.warm_up_async()
+        except Error as e:
+            logger.warning(f"⚠️ No se pudo conectar con la réplica, se usará solo el primario: {e}")
+            return
+
+        self._replica = ReplicaRouter(
+            pool,
+            read_your_writes=float(os.getenv('DB_REPLICA_RYW_WINDOW', '5')),
+            max_lag=float(os.getenv('DB_REPLICA_MAX_LAG', '5')),
+            check_interval=float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5')))
+        logger.info(
+            f"✅ Réplica de lectura configurada en {replica_config['host']}:{replica_config['port']}")
+
     def _get_connection(self):
         """Obtiene una conexión del pool"""
         try:
@@ -75,11 +960,228 @@ class DatabaseConnection:
             connection = self._pool.get_connection()
             logger.debug("Obtenida conexión del pool")
             return connection
+        except PoolExhaustedError as e:
+            logger.error(f"❌ Pool de conexiones agotado: {e}")
+            raise
         except Error as e:
             logger.error(f"❌ Error al obtener conexión del pool: {e}")
             raise ConnectionError(
                 f"No se pudo obtener una conexión de la base de datos: {e}")
 
+    def _get_read_connection(self, use_primary=False):
+        """
+        Obtiene una conexión para una lectura, de la réplica si es posible
+
+        Returns:
+            tuple: (conexión, es_réplica)
+        """
+        replica = self._replica
+        if replica is not None and replica.use_replica(use_primary):
+            try:
+                return replica.pool.get_connection(timeout=replica.acquire_timeout), True
+            except (Error, ConnectionError) as e:
+                replica.mark_failed(e)
+        return self._get_connection(), False
+
+    @contextmanager
+    def primary(self):
+        """
+        Envía al primario todas las lecturas del hilo actual dentro del bloque
+
+            with db.primary():
+                stock = db.fetch_one("SELECT cantidad FROM stock WHERE producto_id = %s", (1,))
+        """
+        if self._replica is None:
+            yield
+            return
+        with self._replica.force_primary():
+            yield
+
+    def get_replica_status(self):
+        """
+        Devuelve el estado de la réplica de lectura
+
+        Returns:
+            dict: Estado, retraso, reparto de lecturas y métricas del pool,
+                o {"enabled": False} si no hay réplica configurada
+        """
+        if self._replica is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._replica.get_status()}
+
+    def _execute(self, connection, query, params=None, dictionary=True):
+        """
+        Ejecuta una consulta en la conexión indicada
+
+        Si el modo de sentencias preparadas está activo reutiliza el cursor
+        preparado de la caché y, si el servidor ya no reconoce la sentencia,
+        la prepara de nuevo de forma transparente.
+
+        Returns:
+            tuple: (cursor, cached) - cached indica que el cursor pertenece a la
+                caché y no debe cerrarse
+        """
+        if self._statement_cache is None:
+            cursor = connection.cursor(dictionary=dictionary)
+            try:
+                cursor.execute(query, params or ())
+            except Exception:
+                cursor.close()
+                raise
+            return cursor, False
+
+        cursor, statement = self._statement_cache.get_cursor(connection, query, dictionary)
+        try:
+            cursor.execute(statement, params or ())
+        except Error as e:
+            if e.errno not in PreparedStatementCache.STALE_STATEMENT_ERRORS:
+                self._statement_cache.discard(connection, query, dictionary)
+                raise
+            logger.debug("Sentencia preparada obsoleta, preparando de nuevo")
+            self._statement_cache.invalidate(connection)
+            cursor, statement = self._statement_cache.get_cursor(connection, query, dictionary)
+            cursor.execute(statement, params or ())
+        return cursor, True
+
+    def get_prepared_statement_stats(self):
+        """
+        Devuelve los contadores de la caché de sentencias preparadas
+
+        Returns:
+            dict: hits, misses, evictions, re-preparaciones y ratio de aciertos,
+                o {"enabled": False} si el modo no está activo
+        """
+        if self._statement_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._statement_cache.get_stats()}
+
+    def enable_result_cache(self, max_entries=256, ttl=30.0, max_bytes=16 * 1024 * 1024):
+        """
+        Activa la caché de resultados para fetch_all y fetch_one
+
+        Args:
+            max_entries (int): Número máximo de consultas cacheadas
+            ttl (float): Segundos de vida de cada entrada (0 = sin caducidad)
+            max_bytes (int): Memoria aproximada máxima de la caché
+        """
+        self._result_cache = QueryResultCache(max_entries, ttl, max_bytes)
+        logger.info(
+            f"✅ Caché de resultados activada | Entradas: {max_entries} | TTL: {ttl}s | Memoria: {max_bytes} bytes")
+
+    def disable_result_cache(self):
+        """Desactiva y vacía la caché de resultados"""
+        self._result_cache = None
+
+    def clear_result_cache(self):
+        """Vacía la caché de resultados sin desactivarla"""
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def get_result_cache_stats(self):
+        """
+        Devuelve las estadísticas de la caché de resultados
+
+        Returns:
+            dict: Entradas, memoria, aciertos, fallos, ratio, desalojos,
+                caducidades e invalidaciones, o {"enabled": False}
+        """
+        if self._result_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._result_cache.get_stats()}
+
+    def _record_query(self, query, params, start_ns, rows=0, error=None, elapsed_ns=None):
+        """
+        Registra la duración de una consulta en las métricas por huella
+
+        Con `elapsed_ns` se usa esa duración en lugar de medir desde `start_ns`
+        (fetch_iter descuenta el tiempo que el consumidor tarda entre lotes).
+        """
+        if start_ns is None or self._instrumentation is None:
+            return
+        if elapsed_ns is None:
+            elapsed_ns = time.perf_counter_ns() - start_ns
+        self._instrumentation.record(query, elapsed_ns, rows, error)
+        if error is None and self._slow_log is not None and self._slow_log.is_slow(elapsed_ns):
+            self._slow_log.capture(query, params, elapsed_ns, rows, self._explain)
+
+    def _explain(self, query, params=None):
+        """
+        Obtiene el plan de ejecución de una consulta con EXPLAIN FORMAT=JSON
+
+        Returns:
+            dict: Plan decodificado (o el texto crudo si no es JSON válido)
+        """
+        connection = self._pool.get_connection(timeout=2.0)
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("EXPLAIN FORMAT=JSON " + query, params or ())
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+        plan = row[0] if row else None
+        try:
+            return json.loads(plan) if plan else None
+        except (TypeError, ValueError):
+            return plan
+
+    def get_slow_queries(self):
+        """
+        Devuelve las consultas lentas capturadas, de la más reciente a la más antigua
+
+        Returns:
+            list: Registros con fecha, SQL, parámetros enmascarados, tiempo y plan
+        """
+        if self._slow_log is None:
+            return []
+        return self._slow_log.entries()
+
+    def get_query_stats(self):
+        """
+        Devuelve las métricas de consultas agrupadas por huella
+
+        Returns:
+            dict: Por huella, ejecuciones, errores, filas y latencias p50/p95/p99
+        """
+        if self._instrumentation is None:
+            return {"queries": {}}
+        return self._instrumentation.snapshot()
+
+    def dump_query_stats(self, path=None, fmt="json"):
+        """
+        Exporta las métricas de consultas en JSON o en formato Prometheus
+
+        Args:
+            path (str, optional): Archivo destino; si no se indica sólo se devuelve el texto
+            fmt (str): 'json' o 'prometheus'
+
+        Returns:
+            str: Métricas serializadas
+        """
+        if self._instrumentation is None:
+            return ""
+        if fmt == "prometheus":
+            text = self._instrumentation.to_prometheus()
+        else:
+            text = self._instrumentation.to_json()
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            logger.info(f"✅ Métricas de consultas exportadas a {path}")
+        return text
+
+    def _invalidate_for_write(self, query):
+        """
+        Registra una escritura confirmada: invalida la caché de resultados
+        afectada y abre la ventana de lectura propia en el primario
+        """
+        if self._result_cache is not None:
+            self._result_cache.invalidate_query(query)
+        if self._replica is not None:
+            self._replica.note_write()
+
     def execute_query(self, query, params=None):
         """
         Ejecuta una consulta de modificación (INSERT, UPDATE, DELETE)
@@ -93,120 +1195,401 @@ class DatabaseConnection:
         """
         connection = None
         cursor = None
+        cached = False
+        start_ns = None
         try:
             connection = self._get_connection()
-            cursor = connection.cursor(dictionary=True)
 
-            start_time = datetime.now()
-            cursor.execute(query, params or ())
+            start_ns = time.perf_counter_ns()
+            cursor, cached = self._execute(connection, query, params)
             affected_rows = cursor.rowcount
-            execution_time = (datetime.now() - start_time).total_seconds()
-
-            logger.info(
-                f"✅ Consulta ejecutada exitosamente: {query[:50]}... | Filas afectadas: {affected_rows} | Tiempo: {execution_time:.4f}s")
+            self._record_query(query, params, start_ns, affected_rows)
 
+            self._invalidate_for_write(query)
             return True
 
         except Error as e:
+            self._record_query(query, params, start_ns, error=e)
             logger.error(
                 f"❌ Error en consulta: {e} | Query: {query} | Params: {params}")
             print(f"❌ Error en base de datos: {e}")
             return False
         finally:
-            if cursor:
+            if cursor and not cached:
                 cursor.close()
-            if connection and connection.is_connected():
+            if connection:
                 connection.close()
                 logger.debug("Conexión devuelta al pool")
 
-    def fetch_all(self, query, params=None):
+    def fetch_all(self, query, params=None, use_cache=True, use_primary=False, result_format="dict"):
         """
         Ejecuta una consulta de selección y devuelve todos los resultados
 
+        Si hay una réplica configurada la consulta se envía allí, salvo que se
+        pida el primario o se esté dentro de la ventana de lectura propia. Si
+        falla en la réplica se repite una vez en el primario.
+
+        Con un formato distinto de 'dict' el cursor devuelve tuplas y no se crea
+        un diccionario por fila, lo que reduce mucho la memoria de los reportes
+        grandes:
+
+        - 'tuple': ResultSet (lista de tuplas con la cabecera en `columns`)
+        - 'row': lista de filas con __slots__ (acceso `fila.nombre` o `fila['nombre']`)
+        - 'numpy': diccionario columna -> array de NumPy
+        - 'dataframe': DataFrame de pandas construido desde las tuplas
+
         Args:
             query (str): Consulta SQL SELECT
             params (tuple, optional): Parámetros para la consulta
+            use_cache (bool): Consultar la caché de resultados si está activa
+            use_primary (bool): Leer siempre del primario
+            result_format (str): 'dict', 'tuple', 'row', 'numpy' o 'dataframe'
 
         Returns:
-            list: Lista de diccionarios con los resultados
+            list: Lista de diccionarios con los resultados (o el formato pedido)
         """
+        check_result_format(result_format)
+        dictionary = result_format == "dict"
+
+        result_cache = self._result_cache if use_cache else None
+        if result_cache is not None:
+            # Todos los formatos por tuplas comparten la misma entrada de caché
+            cache_key = QueryResultCache.make_key("all" if dictionary else "all:tuple", query, params)
+            found, value = result_cache.get(cache_key)
+            if found:
+                return self._copy_cached_rows(value, result_format)
+            cache_token = result_cache.begin(query)
+
         connection = None
         cursor = None
+        cached = False
+        from_replica = False
+        start_ns = None
         try:
-            connection = self._get_connection()
-            cursor = connection.cursor(dictionary=True)
+            connection, from_replica = self._get_read_connection(use_primary)
 
-            start_time = datetime.now()
-            cursor.execute(query, params or ())
+            start_ns = time.perf_counter_ns()
+            cursor, cached = self._execute(connection, query, params, dictionary=dictionary)
             results = cursor.fetchall()
-            execution_time = (datetime.now() - start_time).total_seconds()
+            if not dictionary:
+                results = ResultSet(cursor.column_names, results)
+            self._record_query(query, params, start_ns, len(results))
 
-            logger.info(
-                f"✅ Consulta SELECT ejecutada: {query[:50]}... | Resultados: {len(results)} | Tiempo: {execution_time:.4f}s")
-
-            return results
+            if result_cache is not None:
+                result_cache.put(cache_key, results, cache_token)
+                return self._copy_cached_rows(results, result_format)
+            if dictionary:
+                return results
+            return convert_rows(results.columns, results, result_format)
 
         except Error as e:
-            logger.error(
-                f"❌ Error en consulta SELECT: {e} | Query: {query} | Params: {params}")
-            print(f"❌ Error en base de datos al recuperar datos: {e}")
-            return []
+            self._record_query(query, params, start_ns, error=e)
+            if not from_replica:
+                logger.error(
+                    f"❌ Error en consulta SELECT: {e} | Query: {query} | Params: {params}")
+                print(f"❌ Error en base de datos al recuperar datos: {e}")
+                return [] if dictionary else convert_rows((), [], result_format)
+            replica_error = e
         finally:
-            if cursor:
+            if cursor and not cached:
                 cursor.close()
-            if connection and connection.is_connected():
+            if connection:
                 connection.close()
                 logger.debug("Conexión devuelta al pool")
 
-    def fetch_one(self, query, params=None):
+        # Falló en la réplica: se reintenta una vez en el primario
+        self._replica.mark_failed(replica_error)
+        return self.fetch_all(query, params, use_cache, True, result_format)
+
+    @staticmethod
+    def _copy_cached_rows(rows, result_format):
+        """
+        Entrega un resultado de la caché sin exponer la lista ni las filas compartidas
+
+        Los diccionarios se copian uno a uno: quien los reciba puede
+        modificarlos (ProductSearchIndex.update_fields) sin alterar la caché.
+        """
+        if result_format == "dict":
+            return [dict(row) for row in rows]
+        if result_format == "tuple":
+            return ResultSet(rows.columns, rows)
+        return convert_rows(rows.columns, rows, result_format)
+
+    def fetch_one(self, query, params=None, use_cache=True, use_primary=False):
         """
         Ejecuta una consulta de selección y devuelve un solo resultado
 
         Args:
             query (str): Consulta SQL SELECT
             params (tuple, optional): Parámetros para la consulta
+            use_cache (bool): Consultar la caché de resultados si está activa
+            use_primary (bool): Leer siempre del primario
 
         Returns:
             dict: Diccionario con el resultado o None si no hay resultados
         """
+        result_cache = self._result_cache if use_cache else None
+        if result_cache is not None:
+            cache_key = QueryResultCache.make_key("one", query, params)
+            found, value = result_cache.get(cache_key)
+            if found:
+                return dict(value) if value is not None else None
+            cache_token = result_cache.begin(query)
+
         connection = None
         cursor = None
+        cached = False
+        from_replica = False
+        start_ns = None
         try:
-            connection = self._get_connection()
-            cursor = connection.cursor(dictionary=True)
+            connection, from_replica = self._get_read_connection(use_primary)
 
-            cursor.execute(query, params or ())
+            start_ns = time.perf_counter_ns()
+            cursor, cached = self._execute(connection, query, params)
             result = cursor.fetchone()
+            if cached:
+                # Un cursor preparado reutilizable no puede quedar con filas pendientes
+                cursor.fetchall()
+            self._record_query(query, params, start_ns, 1 if result else 0)
+
+            if result_cache is not None:
+                result_cache.put(cache_key, result, cache_token)
+                return dict(result) if result is not None else None
+            return result
 
-            logger.debug(f"✅ Consulta fetch_one ejecutada: {query[:50]}...")
+        except Error as e:
+            self._record_query(query, params, start_ns, error=e)
+            if not from_replica:
+                logger.error(
+                    f"❌ Error en consulta fetch_one: {e} | Query: {query} | Params: {params}")
+                print(f"❌ Error en base de datos al recuperar un registro: {e}")
+                return None
+            replica_error = e
+        finally:
+            if cursor and not cached:
+                cursor.close()
+            if connection:
+                connection.close()
+                logger.debug("Conexión devuelta al pool")
 
-            return result
+        # Falló en la réplica: se reintenta una vez en el primario
+        self._replica.mark_failed(replica_error)
+        return self.fetch_one(query, params, use_cache, True)
+
+    def fetch_iter(self, query, params=None, batch_size=1000, use_primary=False, result_format="dict"):
+        """
+        Ejecuta una consulta de selección y devuelve los resultados por lotes
+
+        Usa un cursor sin buffer, por lo que las filas se leen del servidor a
+        medida que se consumen y la memoria usada depende del tamaño del lote y
+        no del total de resultados. La conexión del pool se mantiene ocupada sólo
+        mientras el iterador está vivo; si se abandona a medias (break, excepción
+        o recolección de basura) las filas pendientes se descartan y la conexión
+        vuelve al pool.
+
+        Args:
+            query (str): Consulta SQL SELECT
+            params (tuple, optional): Parámetros para la consulta
+            batch_size (int): Número de filas por lote
+            use_primary (bool): Leer siempre del primario
+            result_format (str): Formato de cada lote, igual que en fetch_all
+
+        Yields:
+            list: Lote de diccionarios con los resultados (o el formato pedido)
+
+        Raises:
+            Error: Si la consulta falla (para no entregar exportaciones truncadas)
+        """
+        check_result_format(result_format)
+        dictionary = result_format == "dict"
+
+        connection = None
+        cursor = None
+        from_replica = False
+        total_rows = 0
+        batch_size = max(1, int(batch_size))
+        start_ns = None
+        # Solo cuenta el tiempo esperando al servidor, no el del consumidor entre lotes
+        server_ns = 0
+        try:
+            connection, from_replica = self._get_read_connection(use_primary)
+            cursor = connection.cursor(dictionary=dictionary, buffered=False)
+            start_ns = time.perf_counter_ns()
+            cursor.execute(query, params or ())
+            columns = tuple(cursor.column_names)
+            server_ns += time.perf_counter_ns() - start_ns
+
+            while True:
+                fetch_ns = time.perf_counter_ns()
+                batch = cursor.fetchmany(batch_size)
+                server_ns += time.perf_counter_ns() - fetch_ns
+                if not batch:
+                    break
+                total_rows += len(batch)
+                yield batch if dictionary else convert_rows(columns, batch, result_format)
+
+            self._record_query(query, params, start_ns, total_rows, elapsed_ns=server_ns)
+            return
 
         except Error as e:
-            logger.error(
-                f"❌ Error en consulta fetch_one: {e} | Query: {query} | Params: {params}")
-            print(f"❌ Error en base de datos al recuperar un registro: {e}")
-            return None
+            self._record_query(query, params, start_ns, total_rows, error=e, elapsed_ns=server_ns)
+            # Sin filas entregadas todavía se puede repetir en el primario
+            retry = from_replica and not total_rows
+            if from_replica:
+                self._replica.mark_failed(e)
+            if not retry:
+                logger.error(
+                    f"❌ Error en consulta SELECT en streaming: {e} | Query: {query} | Params: {params}")
+                print(f"❌ Error en base de datos al recuperar datos: {e}")
+                raise
+        finally:
+            if connection:
+                try:
+                    # Descartar filas no leídas si el iterador se abandonó a medias
+                    connection.consume_results()
+                except Exception:
+                    pass
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+                logger.debug("Conexión de streaming devuelta al pool")
+
+        yield from self.fetch_iter(query, params, batch_size, True, result_format)
+
+    def fetch_batch(self, queries, use_cache=True, use_primary=False):
+        """
+        Ejecuta varias consultas SELECT en un solo viaje al servidor
+
+        Las consultas se envían juntas como una sentencia múltiple sobre una
+        única conexión del pool y se leen los conjuntos de resultados en orden.
+        Las que ya están en la caché de resultados no se envían. Pensado para
+        los refrescos de pantalla, donde la latencia de red pesa más que las
+        propias consultas.
+
+        Args:
+            queries (list): Pares (query, params); cada query debe ser un único SELECT
+            use_cache (bool): Consultar la caché de resultados si está activa
+            use_primary (bool): Leer siempre del primario
+
+        Returns:
+            list: Una lista de diccionarios por consulta, en el mismo orden
+                (lista vacía para todas las enviadas si el lote falla)
+        """
+        queries = [(query.strip().rstrip(";"), tuple(params or ())) for query, params in queries]
+        results = [None] * len(queries)
+
+        result_cache = self._result_cache if use_cache else None
+        pending = []
+        for index, (query, params) in enumerate(queries):
+            cache_key = cache_token = None
+            if result_cache is not None:
+                cache_key = QueryResultCache.make_key("all", query, params)
+                found, value = result_cache.get(cache_key)
+                if found:
+                    results[index] = self._copy_cached_rows(value, "dict")
+                    continue
+                cache_token = result_cache.begin(query)
+            pending.append((index, query, params, cache_key, cache_token))
+
+        if not pending:
+            return results
+
+        connection = None
+        cursor = None
+        from_replica = False
+        start_ns = None
+        current = 0
+        try:
+            connection, from_replica = self._get_read_connection(use_primary)
+            cursor = connection.cursor(dictionary=True)
+            # Cada consulta recibe sus propios parámetros y el lote se envía sin
+            # parámetros, para que el conector no toque los '%' del resto
+            statement = b";\n".join(self._bind_params(connection, cursor, query, params)
+                                     for _, query, params, _, _ in pending)
+
+            start_ns = time.perf_counter_ns()
+            cursor.execute(statement)
+            for current, (index, query, params, cache_key, cache_token) in enumerate(pending):
+                if current and not cursor.nextset():
+                    raise Error(msg=f"El lote devolvió {current} de {len(pending)} resultados")
+                rows = cursor.fetchall() if cursor.description else []
+                self._record_query(query, params, start_ns, len(rows))
+                start_ns = time.perf_counter_ns()
+
+                if result_cache is not None:
+                    result_cache.put(cache_key, rows, cache_token)
+                    rows = self._copy_cached_rows(rows, "dict")
+                results[index] = rows
+
+            logger.debug(f"Lote de {len(pending)} consultas resuelto en un solo viaje")
+            return results
+
+        except Error as e:
+            query, params = pending[current][1:3]
+            self._record_query(query, params, start_ns, error=e)
+            if not from_replica:
+                logger.error(
+                    f"❌ Error en lote de consultas SELECT: {e} | Query: {query} | Params: {params}")
+                print(f"❌ Error en base de datos al recuperar datos: {e}")
+                for index, *_ in pending:
+                    results[index] = []
+                return results
+            replica_error = e
         finally:
+            if connection:
+                try:
+                    # Un fallo a mitad del lote puede dejar resultados sin leer
+                    connection.consume_results()
+                except Exception:
+                    pass
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
+            if connection:
                 connection.close()
                 logger.debug("Conexión devuelta al pool")
 
+        # Falló en la réplica: se reintenta una vez en el primario
+        self._replica.mark_failed(replica_error)
+        return self.fetch_batch(queries, use_cache, True)
+
+    @staticmethod
+    def _bind_params(connection, cursor, query, params):
+        """
+        Sustituye los %s de una consulta con el mismo escape que usa el conector
+
+        Returns:
+            bytes: Consulta lista para enviarse sin parámetros
+        """
+        statement = query.encode(connection.python_charset)
+        if not params:
+            return statement
+        # El conector en C escapa desde la conexión y el de Python desde el cursor
+        prepare = getattr(connection, "prepare_for_mysql", None)
+        values = list(prepare(params) if prepare else cursor._process_params(params))
+        if len(RE_PY_PARAM.findall(statement)) != len(values):
+            raise Error(msg=f"La consulta espera otro número de parámetros ({len(values)} recibidos): {query}")
+        values.reverse()
+        return RE_PY_PARAM.sub(lambda match: bytes(values.pop()), statement)
+
     def get_last_insert_id(self):
         """
         Obtiene el último ID insertado en la base de datos
 
+        LAST_INSERT_ID() es propio de cada sesión y esta consulta puede usar una
+        conexión del pool distinta a la del INSERT. Para inserciones
+        dependientes usar `transaction()` y `tx.lastrowid`.
+
         Returns:
             int: Último ID insertado
         """
         query = "SELECT LAST_INSERT_ID() as last_id"
-        result = self.fetch_one(query)
+        result = self.fetch_one(query, use_cache=False, use_primary=True)
         return result['last_id'] if result and 'last_id' in result else None
 
     def get_connection_status(self):
         """Verifica el estado de la conexión a la base de datos"""
+        connection = None
         try:
             connection = self._get_connection()
             if connection.is_connected():
@@ -219,30 +1602,101 @@ class DatabaseConnection:
                     "status": "connected",
                     "server_version": db_info,
                     "database": record[0] if record else "Unknown",
-                    "connection_id": connection.connection_id
+                    "connection_id": connection.connection_id,
+                    "pool": self.get_pool_metrics(),
+                    "replica": self.get_replica_status()
                 }
 
                 cursor.close()
-                connection.close()
                 return status
             return {"status": "disconnected"}
-        except Error as e:
+        except (Error, ConnectionError) as e:
             logger.error(f"❌ Error al verificar estado de conexión: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            if connection:
+                connection.close()
+
+    def get_pool_metrics(self):
+        """
+        Devuelve las métricas del pool de conexiones
+
+        Returns:
+            dict: Tamaño, utilización, tiempos de espera y eventos de agotamiento
+        """
+        if self._pool is None:
+            return {}
+        return self._pool.get_metrics()
+
+    def apply_migrations(self, target=None, include_cli_only=True):
+        """
+        Aplica las migraciones pendientes del esquema (db/migrations)
+
+        Args:
+            target (int, optional): Última versión a aplicar; por defecto todas
+            include_cli_only (bool): Con False se detiene antes de las que
+                reescriben tablas completas (ver src.migrations)
+
+        Returns:
+            list: Migraciones aplicadas
+
+        Raises:
+            MigrationError: Si otro proceso tiene el bloqueo o falla una migración
+        """
+        from src.migrations import MigrationRunner
+
+        applied = MigrationRunner().up(target, include_cli_only=include_cli_only)
+        if applied:
+            self.clear_result_cache()
+            self._known_tables = None
+            self._movement_procedure_missing_at = None
+        return applied
+
+    def has_table(self, name):
+        """
+        Indica si existe una tabla o vista en la base de datos actual
+
+        Consulta information_schema en el primario y recuerda la respuesta, para
+        que los módulos que dependen de una migración opcional no detecten su
+        ausencia con una consulta fallida. Que no existe se vuelve a comprobar
+        pasados unos minutos (o tras apply_migrations), por si otra terminal
+        aplicó la migración entretanto.
+
+        Args:
+            name (str): Nombre de la tabla o vista
+
+        Returns:
+            bool: True si existe
+        """
+        known = (self._known_tables or {}).get(name)
+        if known is not None and (known[0] or time.monotonic() - known[1] < self._MISSING_SCHEMA_TTL):
+            return known[0]
+        result = self.fetch_one(
+            "SELECT COUNT(*) AS total FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (name,), use_cache=False, use_primary=True)
+        if result is None:
+            # Sin conexión: no se recuerda la respuesta
+            return False
+        exists = result["total"] > 0
+        if self._known_tables is None:
+            self._known_tables = {}
+        self._known_tables[name] = (exists, time.monotonic())
+        return exists
+
+    def migration_status(self):
+        """Estado de cada migración del esquema (ver MigrationRunner.status)"""
+        from src.migrations import MigrationRunner
+
+        return MigrationRunner().status()
 
     def close_all_connections(self):
         """Cierra todas las conexiones del pool (para limpieza final)"""
         try:
             if self._pool:
-                # Obtener conexiones activas y cerrarlas
-                pool_size = self._pool._pool_size if self._pool._pool_size is not None else 5
-                for _ in range(pool_size):
-                    try:
-                        conn = self._pool.get_connection()
-                        if conn.is_connected():
-                            conn.close()
-                    except Exception:
-                        pass
+                self._pool.close_all()
+                if self._replica is not None:
+                    self._replica.pool.close_all()
 
                 logger.info(
                     "✅ Todas las conexiones del pool han sido cerradas")
@@ -250,6 +1704,50 @@ class DatabaseConnection:
         except Exception as e:
             logger.error(f"❌ Error al cerrar conexiones: {e}")
 
+    @contextmanager
+    def transaction(self, isolation_level=None):
+        """
+        Ejecuta varias sentencias en una transacción sobre una sola conexión
+
+        Confirma al salir del bloque y hace rollback si se produce una excepción,
+        que se propaga al llamador. Solo se obtiene una conexión del pool y se
+        hace un único commit:
+
+            with db.transaction() as tx:
+                tx.execute("INSERT INTO productos ...", params)
+                tx.execute("INSERT INTO stock ...", (tx.lastrowid, 0, ubicacion))
+
+        Args:
+            isolation_level (str, optional): Nivel de aislamiento solo para esta
+                transacción (por ejemplo 'READ COMMITTED')
+
+        Yields:
+            Transaction: Objeto con execute, executemany, fetch_all, fetch_one,
+                savepoint y lastrowid
+        """
+        connection = self._get_connection()
+        try:
+            connection.start_transaction(isolation_level=isolation_level)
+            tx = Transaction(self, connection)
+            try:
+                yield tx
+                connection.commit()
+            except BaseException as e:
+                try:
+                    connection.rollback()
+                except Error:
+                    pass  # Conexión caída: el servidor ya descartó la transacción
+                logger.error(f"❌ Error en transacción, rollback ejecutado: {e}")
+                raise
+
+            logger.info(
+                f"✅ Transacción confirmada con {len(tx.written)} sentencias")
+            for query in tx.written:
+                self._invalidate_for_write(query)
+        finally:
+            connection.close()
+            logger.debug("Conexión devuelta al pool después de transacción")
+
     def execute_transaction(self, queries, params_list=None):
         """
         Ejecuta múltiples consultas en una transacción
@@ -261,88 +1759,382 @@ class DatabaseConnection:
         Returns:
             bool: True si todas las consultas se ejecutaron exitosamente
         """
+        try:
+            with self.transaction() as tx:
+                for i, query in enumerate(queries):
+                    params = params_list[i] if params_list and i < len(
+                        params_list) else None
+                    tx.execute(query, params)
+            return True
+
+        except (Error, ConnectionError) as e:
+            print(f"❌ Error en transacción de base de datos: {e}")
+            return False
+
+    # Estados devueltos por el procedimiento registrar_movimiento
+    _MOVEMENT_STATUS = {"ok": "ok", "sin_producto": "no_product", "sin_stock": "no_stock"}
+    # Error del servidor si el procedimiento no existe (migración 0008 pendiente)
+    _MISSING_PROCEDURE_ERROR = 1305
+
+    def register_movement(self, producto_id, tipo, cantidad, responsable, motivo=None):
+        """
+        Registra un movimiento validando el producto y la existencia de forma atómica
+
+        Llama al procedimiento registrar_movimiento (migración 0008), que valida,
+        bloquea la fila de stock, inserta y lee el stock resultante en un solo
+        viaje al servidor. Si el procedimiento no existe hace lo mismo con una
+        transacción de varias sentencias y vuelve a probarlo pasados
+        _MISSING_SCHEMA_TTL segundos o tras aplicar migraciones.
+
+        Args:
+            producto_id (int): Producto del movimiento
+            tipo (str): 'entrada' o 'salida'
+            cantidad (int): Unidades (positiva)
+            responsable (str): Quién registra el movimiento
+            motivo (str, optional): Motivo del movimiento
+
+        Returns:
+            dict: status ('ok', 'no_product' o 'no_stock'), stock (resultante, o
+                el disponible si no alcanza) e id_movimiento
+
+        Raises:
+            Error: Si la base de datos rechaza el movimiento
+        """
+        params = (int(producto_id), tipo, int(cantidad), responsable, motivo)
+        insert = ("INSERT INTO movimientos (producto_id, tipo, cantidad, responsable, motivo) "
+                  "VALUES (%s, %s, %s, %s, %s)")
+        missing_at = self._movement_procedure_missing_at
+        if self._movement_procedure_enabled and (
+                missing_at is None or time.monotonic() - missing_at >= self._MISSING_SCHEMA_TTL):
+            query = "CALL registrar_movimiento(%s, %s, %s, %s, %s)"
+            connection = self._get_connection()
+            cursor = None
+            start_ns = time.perf_counter_ns()
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(query, params)
+                row = cursor.fetchone()
+                cursor.fetchall()
+                # El CALL deja un resultado de estado tras la fila devuelta
+                while cursor.nextset():
+                    if cursor.description:
+                        cursor.fetchall()
+                self._record_query(query, params, start_ns, 1)
+                status = self._MOVEMENT_STATUS[row["estado"]]
+                if status == "ok":
+                    # El procedimiento escribe lo mismo que el INSERT equivalente
+                    self._invalidate_for_write(insert)
+                return {"status": status, "stock": row["stock"], "id_movimiento": row["id_movimiento"]}
+            except Error as e:
+                self._record_query(query, params, start_ns, error=e)
+                if e.errno != self._MISSING_PROCEDURE_ERROR:
+                    logger.error(f"❌ Error al registrar movimiento: {e} | Params: {params}")
+                    raise
+                logger.warning("⚠️ Procedimiento registrar_movimiento no disponible; se usa una transacción")
+                self._movement_procedure_missing_at = time.monotonic()
+            finally:
+                if cursor:
+                    cursor.close()
+                connection.close()
+
+        with self.transaction() as tx:
+            stock = tx.fetch_one("SELECT cantidad FROM stock WHERE producto_id = %s FOR UPDATE", (params[0],))
+            if stock is None and not tx.fetch_one(
+                    "SELECT 1 AS existe FROM productos WHERE id_producto = %s", (params[0],)):
+                return {"status": "no_product", "stock": None, "id_movimiento": None}
+            available = stock["cantidad"] if stock else 0
+            if tipo == "salida" and available < params[2]:
+                return {"status": "no_stock", "stock": available, "id_movimiento": None}
+            tx.execute(insert, params)
+            movement_id = tx.lastrowid
+            stock = tx.fetch_one("SELECT cantidad FROM stock WHERE producto_id = %s", (params[0],))
+        return {"status": "ok", "stock": stock["cantidad"] if stock else None, "id_movimiento": movement_id}
+
+    def set_movement_procedure(self, enabled):
+        """
+        Activa o desactiva el uso del procedimiento registrar_movimiento
+
+        Con False register_movement usa siempre la transacción de varias
+        sentencias (para comparar ambos caminos o descartar el procedimiento
+        ante un problema).
+
+        Args:
+            enabled (bool): Usar el procedimiento cuando exista
+        """
+        self._movement_procedure_enabled = bool(enabled)
+        self._movement_procedure_missing_at = None
+
+    @classmethod
+    def _normalize_movement_row(cls, row):
+        """
+        Convierte una fila de movimiento en la tupla que espera el INSERT masivo
+
+        Args:
+            row (dict | tuple): Movimiento como diccionario o tupla en el orden
+                de MOVEMENT_COLUMNS (la fecha es opcional)
+
+        Returns:
+            tuple: (producto_id, tipo, cantidad, responsable, motivo, fecha)
+
+        Raises:
+            ValueError: Si la fila no es un movimiento válido
+        """
+        if isinstance(row, dict):
+            values = [row.get(column) for column in cls.MOVEMENT_COLUMNS]
+        else:
+            values = list(row) + [None] * (len(cls.MOVEMENT_COLUMNS) - len(row))
+
+        producto_id, tipo, cantidad, responsable, motivo, fecha = values[:6]
+
+        tipo = str(tipo or "").strip().lower()
+        if tipo not in ("entrada", "salida"):
+            raise ValueError(f"Tipo de movimiento inválido: {tipo!r}")
+
+        producto_id = int(producto_id)
+        cantidad = int(cantidad)
+        if cantidad <= 0:
+            raise ValueError(f"La cantidad debe ser positiva: {cantidad}")
+
+        responsable = str(responsable or "").strip()
+        if not responsable:
+            raise ValueError("El responsable es requerido")
+
+        # Sin fecha explícita se conserva el comportamiento del DEFAULT de la tabla
+        return (producto_id, tipo, cantidad, responsable,
+                motivo or "Carga masiva", cls._parse_movement_date(fecha) or datetime.now())
+
+    @classmethod
+    def _parse_movement_date(cls, fecha):
+        """
+        Convierte la fecha de una fila importada (DD/MM/AAAA [HH:MM[:SS]] o ISO)
+
+        Returns:
+            datetime: Fecha convertida o None si viene vacía
+
+        Raises:
+            ValueError: Si no es una fecha válida (la fila se rechaza sola en
+                lugar de hacer fallar el bloque completo en el servidor)
+        """
+        if fecha is None:
+            return None
+        if isinstance(fecha, datetime):
+            return fecha
+        if isinstance(fecha, date):
+            return datetime.combine(fecha, datetime.min.time())
+        texto = str(fecha).strip()
+        if not texto:
+            return None
+        for formato in cls.MOVEMENT_DATE_FORMATS:
+            try:
+                return datetime.strptime(texto, formato)
+            except ValueError:
+                continue
+        raise ValueError(f"Fecha no válida: {texto} (use DD/MM/AAAA HH:MM)")
+
+    @staticmethod
+    def _check_chunk_stock(cursor, numbered, summary):
+        """
+        Descarta las salidas de un bloque que dejarían el stock en negativo
+
+        Bloquea las filas de stock de los productos del bloque hasta el COMMIT,
+        de modo que otra terminal no puede gastar el mismo saldo entretanto.
+
+        Args:
+            cursor: Cursor de la transacción del bloque
+            numbered (list): Pares (número de fila, tupla del movimiento)
+            summary (dict): Resumen de la carga; se actualizan rejected e
+                insufficient_stock
+
+        Returns:
+            list: Tuplas de los movimientos aceptados, en orden
+        """
+        product_ids = sorted({values[0] for _, values in numbered})
+        cursor.execute(
+            f"SELECT producto_id, cantidad FROM stock "
+            f"WHERE producto_id IN ({', '.join(['%s'] * len(product_ids))}) FOR UPDATE",
+            product_ids)
+        balance = {producto_id: cantidad for producto_id, cantidad in cursor.fetchall()}
+
+        accepted = []
+        for number, values in numbered:
+            producto_id, tipo, cantidad = values[:3]
+            available = balance.get(producto_id, 0)
+            if tipo == "salida" and available < cantidad:
+                summary["rejected"] += 1
+                summary["insufficient_stock"].append(
+                    {"row": number, "producto_id": producto_id, "cantidad": cantidad, "disponible": available})
+                logger.warning(f"⚠️ Movimiento #{number} rechazado: stock insuficiente del producto "
+                               f"{producto_id} (disponible {available}, solicitado {cantidad})")
+                continue
+            balance[producto_id] = available + (cantidad if tipo == "entrada" else -cantidad)
+            accepted.append(values)
+        return accepted
+
+    def bulk_insert_movements(self, rows, chunk_size=1000, progress_callback=None):
+        """
+        Inserta movimientos de forma masiva por bloques con executemany
+
+        Toda la carga usa una sola conexión del pool. Cada bloque se envía como un
+        INSERT multi-fila y se confirma con un único COMMIT, de modo que el costo
+        de ida y vuelta y de escritura en disco se paga por bloque y no por fila.
+        El trigger actualizar_stock_despues_movimiento se dispara por cada fila
+        insertada, así que el stock resultante es el mismo que al registrar los
+        movimientos uno a uno. Lo mismo ocurre con el de snapshots_stock: cada
+        fila con fecha anterior a K fotografías hace K actualizaciones (ver
+        src/snapshots.py).
+
+        Como en register_movement, una salida no puede dejar el stock en
+        negativo: cada bloque bloquea (FOR UPDATE) las filas de stock de sus
+        productos, lleva el saldo en el orden del archivo y rechaza las salidas
+        que no alcanzan, que se informan en `insufficient_stock`.
+
+        Args:
+            rows (iterable): Diccionarios o tuplas con los movimientos; puede ser
+                un generador para no cargar todo el archivo en memoria
+            chunk_size (int): Número de filas por bloque (y por commit)
+            progress_callback (callable, optional): Se llama tras cada bloque
+                confirmado con un diccionario de estadísticas del bloque
+
+        Returns:
+            dict: Resumen con filas insertadas, rechazadas, bloques, tiempo total,
+                filas por segundo, si la carga terminó sin errores y la lista
+                insufficient_stock (fila, producto_id, cantidad, disponible)
+        """
+        query = f"""
+        INSERT INTO movimientos ({', '.join(self.MOVEMENT_COLUMNS)})
+        VALUES ({', '.join(['%s'] * len(self.MOVEMENT_COLUMNS))})
+        """
+        chunk_size = max(1, int(chunk_size))
+        summary = {
+            "success": True,
+            "inserted": 0,
+            "rejected": 0,
+            "chunks": 0,
+            "elapsed": 0.0,
+            "rows_per_second": 0.0,
+            "insufficient_stock": []
+        }
+
         connection = None
         cursor = None
+        start_total = time.perf_counter()
+        source = iter(rows)
+        row_number = 0
         try:
             connection = self._get_connection()
             connection.autocommit = False # type: ignore[attr-defined]
-            cursor = connection.cursor(dictionary=True)
+            cursor = connection.cursor()
 
-            for i, query in enumerate(queries):
-                params = params_list[i] if params_list and i < len(
-                    params_list) else None
-                cursor.execute(query, params or ())
+            while True:
+                raw_chunk = list(islice(source, chunk_size))
+                if not raw_chunk:
+                    break
 
-            connection.commit()
-            logger.info(
-                f"✅ Transacción ejecutada exitosamente con {len(queries)} consultas")
-            return True
+                numbered = []
+                for raw_row in raw_chunk:
+                    row_number += 1
+                    try:
+                        numbered.append((row_number, self._normalize_movement_row(raw_row)))
+                    except (ValueError, TypeError) as e:
+                        summary["rejected"] += 1
+                        logger.warning(f"⚠️ Movimiento #{row_number} rechazado: {e}")
+
+                if not numbered:
+                    continue
+
+                start_chunk = time.perf_counter()
+                try:
+                    chunk = self._check_chunk_stock(cursor, numbered, summary)
+                    if chunk:
+                        cursor.executemany(query, chunk)
+                    connection.commit()
+                except Error as e:
+                    connection.rollback()
+                    summary["success"] = False
+                    logger.error(
+                        f"❌ Error en bloque {summary['chunks'] + 1} de carga masiva, rollback ejecutado: {e}")
+                    print(f"❌ Error en carga masiva de movimientos: {e}")
+                    break
+
+                chunk_time = time.perf_counter() - start_chunk
+                if not chunk:
+                    continue
+                self._invalidate_for_write(query)
+                summary["chunks"] += 1
+                summary["inserted"] += len(chunk)
+
+                chunk_stats = {
+                    "chunk": summary["chunks"],
+                    "rows": len(chunk),
+                    "elapsed": chunk_time,
+                    "rows_per_second": len(chunk) / chunk_time if chunk_time > 0 else 0.0,
+                    "inserted": summary["inserted"]
+                }
+                logger.info(
+                    f"✅ Bloque {chunk_stats['chunk']} confirmado | Filas: {chunk_stats['rows']} | "
+                    f"Tiempo: {chunk_time:.4f}s | {chunk_stats['rows_per_second']:.0f} filas/s")
+                if progress_callback:
+                    progress_callback(chunk_stats)
 
         except Error as e:
-            if connection:
-                connection.rollback()
-            logger.error(f"❌ Error en transacción, rollback ejecutado: {e}")
-            print(f"❌ Error en transacción de base de datos: {e}")
-            return False
+            summary["success"] = False
+            logger.error(f"❌ Error en carga masiva de movimientos: {e}")
+            print(f"❌ Error en carga masiva de movimientos: {e}")
         finally:
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
-                connection.autocommit = True # type: ignore[attr-defined] # Restaurar autocommit
+            if connection:
+                try:
+                    connection.autocommit = True # type: ignore[attr-defined] # Restaurar autocommit
+                except Error:
+                    pass  # Conexión caída: el pool la descarta al devolverla
                 connection.close()
                 logger.debug(
-                    "Conexión devuelta al pool después de transacción")
+                    "Conexión devuelta al pool después de carga masiva")
+
+        summary["elapsed"] = time.perf_counter() - start_total
+        if summary["elapsed"] > 0:
+            summary["rows_per_second"] = summary["inserted"] / summary["elapsed"]
 
-    def backup_database(self, backup_dir='backups'):
+        logger.info(
+            f"✅ Carga masiva finalizada | Insertados: {summary['inserted']} | "
+            f"Rechazados: {summary['rejected']} (sin stock: {len(summary['insufficient_stock'])}) | "
+            f"Bloques: {summary['chunks']} | "
+            f"Tiempo: {summary['elapsed']:.2f}s | {summary['rows_per_second']:.0f} filas/s")
+        return summary
+
+    def backup_database(self, backup_dir='backups', progress_callback=None, incremental=False):
         """
-        Crea un backup de la base de datos (requiere permisos adecuados)
+        Crea un backup lógico comprimido de la base de datos
+
+        Usa BackupEngine (src/backup.py): vuelca las tablas en paralelo con
+        consultas keyset dentro de una instantánea consistente y no requiere
+        mysqldump.
 
         Args:
             backup_dir (str): Directorio para guardar el backup
+            progress_callback (callable, optional): Recibe (filas_volcadas,
+                filas_estimadas, tabla)
+            incremental (bool): Guardar solo los cambios desde el backup más
+                reciente del directorio (se encadena a un backup completo)
 
         Returns:
-            str: Ruta del archivo de backup creado o None si falla
+            str: Directorio del backup creado (con manifest.json) o None si falla
         """
-        try:
-            # Crear directorio si no existe
-            os.makedirs(backup_dir, exist_ok=True)
+        from src.backup import BackupEngine, BackupError
 
-            # Generar nombre de archivo con timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = os.path.join(
-                backup_dir, f"backup_inventario_{timestamp}.sql")
-
-            # Obtener configuración de conexión
-            db_config = {
-                "host": os.getenv('DB_HOST', 'localhost'),
-                "port": os.getenv('DB_PORT', '3306'),
-                "database": os.getenv('DB_NAME', 'gestion_inventario'),
-                "user": os.getenv('DB_USER', 'root'),
-                "password": os.getenv('DB_PASSWORD', '')
-            }
-
-            # Construir comando mysqldump (requiere que mysqldump esté en PATH)
-            password_flag = f"-p{db_config['password']}" if db_config['password'] else ""
-            command = (
-                f"mysqldump -h {db_config['host']} -P {db_config['port']} "
-                f"-u {db_config['user']} {password_flag} "
-                f"{db_config['database']} > {backup_file}"
-            )
-
-            # Ejecutar comando
-            import subprocess
-            result = subprocess.run(
-                command, shell=True, capture_output=True, text=True)
-
-            if result.returncode == 0:
-                logger.info(f"✅ Backup creado exitosamente: {backup_file}")
-                return backup_file
-            else:
-                logger.error(f"❌ Error al crear backup: {result.stderr}")
-                return None
-
-        except Exception as e:
-            logger.error(f"❌ Error inesperado al crear backup: {e}")
+        try:
+            engine = BackupEngine(
+                backup_dir,
+                compression=os.getenv('DB_BACKUP_COMPRESSION', 'gzip'),
+                workers=int(os.getenv('DB_BACKUP_WORKERS', '4')),
+                chunk_size=int(os.getenv('DB_BACKUP_CHUNK_SIZE', '10000')))
+            manifest = engine.run(progress_callback, incremental=incremental,
+                                  max_chain=int(os.getenv('DB_BACKUP_MAX_CHAIN', '7')))
+            return manifest["path"]
+
+        except (Error, BackupError, OSError, ValueError) as e:
+            logger.error(f"❌ Error al crear backup: {e}")
             return None
 
     def __del__(self):
@@ -393,6 +2185,18 @@ if __name__ == "__main__":
                 f"✅ Prueba exitosa: Hay {result['total']} productos en la base de datos")
         else:
             print("❌ No se pudieron recuperar datos de prueba")
+
+        # Con DB_REPLICA_HOST/DB_REPLICA_PORT apuntando a una segunda instancia
+        # local se comprueba el enrutamiento de lecturas
+        replica = db.get_replica_status()
+        if replica["enabled"]:
+            db.fetch_one(test_query, use_cache=False)
+            with db.primary():
+                db.fetch_one(test_query, use_cache=False)
+            replica = db.get_replica_status()
+            print(f"🔁 Réplica {'activa' if replica['healthy'] else 'en espera'} | "
+                  f"retraso: {replica['lag']} | lecturas réplica/primario: "
+                  f"{replica['replica_reads']}/{replica['primary_reads']}")
     else:
         print("❌ La conexión a la base de datos falló")
 
@@ -1,15 +1,215 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
+import json
+import logging
 import os
+import queue
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
+from src.archive import ArchiveManager, movement_source
 from src.database import DatabaseConnection
+from src.search_index import ProductSearchIndex
+from src.snapshots import StockSnapshots
+from src.summaries import ConsumptionSummary
 from src.utils import DataUtils
+from src.virtual_grid import ListRowSource, QueryRowSource, VirtualTreeview
+
+logger = logging.getLogger('InventoryApp')
+
+
+class BackgroundRunner:
+    """
+    Ejecuta trabajo bloqueante (consultas, exportaciones, backups) en un pool de
+    hilos y entrega los resultados al hilo de Tk mediante root.after.
+    
+    Cada tarea se identifica con una clave: enviar una tarea nueva con la misma
+    clave reemplaza a la anterior, cuyo resultado se descarta aunque ya esté en
+    curso. Eso solo sirve para lecturas que una más reciente deja obsoletas;
+    las escrituras (movimientos, altas, importaciones, exportaciones, backups)
+    se envían con replace=False y siempre se ejecutan y confirman. Los
+    callbacks siempre se ejecutan en el hilo principal de Tk.
+    """
+    
+    def __init__(self, root, max_workers=4, poll_interval=16, on_busy_change=None):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.on_busy_change = on_busy_change
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sgi-db")
+        self._results = queue.Queue()
+        self._posted = queue.Queue()
+        self._generations = {}
+        self._futures = {}
+        self._sequence = 0
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._busy = False
+        self._closed = False
+        self._poll()
+    
+    def submit(self, key, func, on_success=None, on_error=None, replace=True):
+        """
+        Ejecuta func en segundo plano
+        
+        Args:
+            key (str): Identificador de la tarea; reemplaza a otra con la misma clave
+            func (callable): Trabajo a ejecutar en el hilo secundario
+            on_success (callable, optional): Recibe el resultado en el hilo de Tk
+            on_error (callable, optional): Recibe la excepción en el hilo de Tk
+            replace (bool): Con False la tarea recibe una clave única: no
+                cancela ni es cancelada por otras (para escrituras)
+        """
+        if self._closed:
+            return
+        
+        if not replace:
+            self._sequence += 1
+            key = f"{key}#{self._sequence}"
+        
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        
+        previous = self._futures.get(key)
+        if previous is not None:
+            previous.cancel()
+        
+        future = self._executor.submit(self._run, key, generation, func, on_success, on_error)
+        self._futures[key] = future
+        with self._active_lock:
+            self._active.add(future)
+        future.add_done_callback(self._discard_future)
+    
+    def post(self, callback, *args):
+        """
+        Programa callback(*args) en el hilo de Tk desde cualquier hilo
+        
+        Útil para notificar avances de una tarea en curso.
+        """
+        if not self._closed:
+            self._posted.put((callback, args))
+    
+    def cancel(self, key):
+        """Cancela una tarea pendiente y descarta su resultado si ya está en curso"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+    
+    def is_busy(self):
+        """Indica si hay tareas pendientes o en ejecución"""
+        with self._active_lock:
+            return bool(self._active)
+    
+    def shutdown(self):
+        """Detiene el pool sin esperar a las tareas en curso"""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _discard_future(self, future):
+        with self._active_lock:
+            self._active.discard(future)
+    
+    def _run(self, key, generation, func, on_success, on_error):
+        """Ejecuta la tarea en el hilo secundario y encola el resultado"""
+        try:
+            result = func()
+            self._results.put((key, generation, on_success, result, None))
+        except Exception as e:
+            logger.error(f"Error en tarea en segundo plano '{key}': {e}")
+            self._results.put((key, generation, on_error, None, e))
+    
+    def _poll(self):
+        """Aplica en el hilo de Tk los resultados terminados"""
+        if self._closed:
+            return
+        
+        while True:
+            try:
+                callback, args = self._posted.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Error al aplicar notificación en segundo plano: {e}")
+        
+        while True:
+            try:
+                key, generation, callback, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            
+            # Resultado reemplazado por una tarea más reciente o cancelado
+            if self._generations.get(key) != generation:
+                continue
+            self._futures.pop(key, None)
+            
+            try:
+                if error is not None:
+                    if callback:
+                        callback(error)
+                    else:
+                        messagebox.showerror("Error", f"❌ Error en la operación:\n{error}")
+                elif callback:
+                    callback(result)
+            except Exception as e:
+                logger.error(f"Error al aplicar resultado de '{key}': {e}")
+        
+        busy = self.is_busy()
+        if busy != self._busy:
+            self._busy = busy
+            if self.on_busy_change:
+                self.on_busy_change(busy)
+        
+        self.root.after(self.poll_interval, self._poll)
+
 
 class InventoryApp:
+    # Consultas de las vistas principales (compartidas por las cargas
+    # individuales y por refresh_views)
+    STOCK_QUERY = """
+    SELECT p.id_producto, p.nombre, p.tipo, s.cantidad, s.ubicacion, 
+           p.precio_unitario,
+           (s.cantidad * p.precio_unitario) as valor_total,
+           s.estado
+    FROM productos p
+    JOIN stock s ON p.id_producto = s.producto_id
+    ORDER BY s.estado DESC, p.nombre
+    """
+    
+    # Últimos 50 movimientos
+    RECENT_MOVEMENTS_QUERY = """
+    SELECT m.id_movimiento, p.nombre, m.tipo as tipo_mov, m.cantidad, 
+           DATE_FORMAT(m.fecha, '%d/%m/%Y %H:%i') as fecha_formateada, m.responsable
+    FROM movimientos m
+    JOIN productos p ON m.producto_id = p.id_producto
+    ORDER BY m.fecha DESC
+    LIMIT 50
+    """
+    
+    ALERTS_QUERY = "SELECT * FROM vista_alertas_stock"
+    
+    # Sin ORDER BY: la tabla virtual de productos añade el orden y la página
+    PRODUCTS_QUERY = """
+    SELECT id_producto, nombre, tipo, precio_unitario
+    FROM productos
+    """
+    
+    # Resumen de la barra de estado: valor del inventario y total de movimientos
+    INVENTORY_SUMMARY_QUERY = """
+    SELECT SUM(s.cantidad * p.precio_unitario) as valor_total,
+           COUNT(*) as total_productos
+    FROM stock s
+    JOIN productos p ON s.producto_id = p.id_producto
+    """
+    MOVEMENT_COUNT_QUERY = "SELECT COUNT(*) as total_movimientos FROM movimientos"
+    
+    # Última migración de la que dependen las consultas de la interfaz
+    # (stock.estado y vista_alertas_stock de la 0006)
+    REQUIRED_SCHEMA_VERSION = 6
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Sistema de Gestión de Inventario - Escuela Industrial Álvaro Obregón")
@@ -28,27 +228,152 @@ class InventoryApp:
         # Variable para la barra de estado
         self.status_var = tk.StringVar()
         
-        # Inicializar conexión a DB
+        # Trabajo de base de datos en segundo plano
+        self.runner = BackgroundRunner(self.root, on_busy_change=self.set_busy)
+        self._search_after_id = None
+        
+        # Índice en memoria del catálogo: la búsqueda filtra sin ir a la base de datos
+        self.search_index = ProductSearchIndex()
+        
+        self._connected = False
+        self._chart_loaded = False
+        
+        # Inicializar conexión a DB (el pool se abre en segundo plano)
         try:
             self.db = DatabaseConnection()
-            # Verificar conexión al iniciar
-            status = self.db.get_connection_status()
-            if status.get('status') != 'connected':
-                raise ConnectionError("No se pudo establecer conexión con la base de datos")
+            # Reportes de consumo desde el resumen diario (consumo_diario)
+            self.consumption = ConsumptionSummary(self.db)
+            # Inventario a fecha desde las fotografías del stock
+            self.snapshots = StockSnapshots(self.db)
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo conectar a la base de datos:\n{e}")
-            logger.error(f"Error de conexión al iniciar aplicación: {e}")
-            root.destroy()
+            self._on_startup_error(e)
             return
         
-        # Crear interfaz
+        # Crear interfaz: la ventana se dibuja sin esperar a la base de datos
         self.create_menu()
         self.create_main_layout()
-        self.load_stock_data()
-        self.update_status_bar()
+        self.status_var.set("🔌 Conectando a la base de datos...")
+        
+        # Verificar conexión en segundo plano y cargar los datos al confirmarla
+        self.runner.submit("startup", self._startup_check,
+                           self._on_startup_status, self._on_startup_error)
         
         # Enlazar eventos
-        self.search_var.trace("w", lambda *args: self.search_products())
+        self.search_var.trace("w", lambda *args: self.schedule_search())
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    def _startup_check(self):
+        """
+        Aplica las migraciones pendientes (DB_AUTO_MIGRATE) salvo las que
+        reescriben tablas completas, crea las particiones mensuales de los
+        próximos meses (DB_PARTITION_MAINTENANCE), fotografía el stock si
+        corresponde y verifica la conexión
+        """
+        migration_error = None
+        if os.getenv('DB_AUTO_MIGRATE', '1').lower() in ('1', 'true', 'yes'):
+            try:
+                # Particionar movimientos o reconstruir stock bloquea las escrituras: solo desde la CLI
+                self.db.apply_migrations(include_cli_only=False)
+            except Exception as e:
+                # Sin permisos de ALTER o con otra terminal migrando se arranca igual
+                # si el esquema ya tiene lo que necesita la interfaz
+                migration_error = e
+                logger.warning(f"No se pudieron aplicar las migraciones al iniciar: {e}")
+        try:
+            pending = [m for m in self.db.migration_status() if m["estado"] == "pendiente"]
+        except Exception as e:
+            logger.warning(f"No se pudo consultar el estado de las migraciones: {e}")
+            pending = []
+        if os.getenv('DB_PARTITION_MAINTENANCE', '1').lower() in ('1', 'true', 'yes'):
+            try:
+                # Solo si es inmediato: con historial en p_futuro se avisa de usar la CLI
+                ArchiveManager().maintain(max_future_rows=int(os.getenv('DB_PARTITION_MAX_ROWS', '200000')))
+            except Exception as e:
+                logger.warning(f"No se pudieron crear las particiones de movimientos: {e}")
+        try:
+            self.snapshots.maybe_take()
+        except Exception as e:
+            logger.warning(f"No se pudo fotografiar el stock al iniciar: {e}")
+        status = self.db.get_connection_status()
+        status['pending_migrations'] = pending
+        status['migration_error'] = migration_error
+        return status
+    
+    def _on_startup_status(self, status):
+        """Carga los datos iniciales una vez confirmada la conexión"""
+        if status.get('status') != 'connected':
+            self._on_startup_error(ConnectionError(
+                status.get('message', "No se pudo establecer conexión con la base de datos")))
+            return
+        
+        pending = status.get('pending_migrations', [])
+        required = [m for m in pending if m['version'] <= self.REQUIRED_SCHEMA_VERSION]
+        if required:
+            self._on_schema_outdated(required, status.get('migration_error'))
+            return
+        
+        self._connected = True
+        self.refresh_views()
+        self.on_tab_changed()
+        
+        cli_only = [m for m in pending if m['solo_cli']]
+        if cli_only:
+            nombres = "\n".join(f"• {m['version']:04d}_{m['nombre']}" for m in cli_only)
+            messagebox.showwarning("Migraciones pendientes",
+                                   f"⚠️ Hay migraciones que reescriben tablas completas y no se "
+                                   f"aplican al iniciar:\n{nombres}\n\n"
+                                   f"Aplíquelas fuera del horario de uso con:\n"
+                                   f"python -m src.migrations up")
+    
+    def _on_schema_outdated(self, required, migration_error):
+        """Informa que faltan migraciones que la interfaz necesita y cierra la aplicación"""
+        nombres = "\n".join(f"• {m['version']:04d}_{m['nombre']}" for m in required)
+        detalle = f"\n\nError al migrar: {migration_error}" if migration_error else ""
+        messagebox.showerror("Esquema desactualizado",
+                             f"❌ La base de datos no tiene migraciones que esta versión necesita:\n"
+                             f"{nombres}{detalle}\n\n"
+                             f"Aplíquelas con un usuario con permisos de ALTER, CREATE ROUTINE y "
+                             f"TRIGGER (con registro binario activo hace falta "
+                             f"log_bin_trust_function_creators):\n"
+                             f"python -m src.migrations up")
+        versiones = ", ".join(f"{m['version']:04d}" for m in required)
+        logger.error(f"Esquema desactualizado, faltan las migraciones {versiones}")
+        self.runner.shutdown()
+        self.root.destroy()
+    
+    def _on_startup_error(self, error):
+        """Informa que no hubo conexión al iniciar y cierra la aplicación"""
+        messagebox.showerror("Error", f"No se pudo conectar a la base de datos:\n{error}")
+        logger.error(f"Error de conexión al iniciar aplicación: {error}")
+        self.runner.shutdown()
+        self.root.destroy()
+    
+    def on_tab_changed(self, event=None):
+        """Genera el gráfico de stock la primera vez que se abre la pestaña de reportes"""
+        if self._chart_loaded or not self._connected:
+            return
+        if self.notebook.select() == str(self.tab_reports):
+            self._chart_loaded = True
+            self.update_stock_chart()
+    
+    def set_busy(self, busy):
+        """Muestra u oculta el indicador de actividad de la barra de estado"""
+        if busy:
+            self.busy_indicator.pack(side=tk.RIGHT, padx=5)
+            self.busy_indicator.start(15)
+        else:
+            self.busy_indicator.stop()
+            self.busy_indicator.pack_forget()
+    
+    def on_close(self):
+        """Detiene el trabajo en segundo plano y cierra la ventana"""
+        self.runner.shutdown()
+        self.root.destroy()
+    
+    def show_db_error(self, error):
+        """Callback de error por defecto para las tareas de base de datos"""
+        messagebox.showerror("Error", f"❌ Error al consultar la base de datos:\n{error}")
     
     def create_menu(self):
         """Crea la barra de menú superior"""
@@ -58,16 +383,20 @@ class InventoryApp:
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Exportar Inventario", command=self.export_inventory)
         file_menu.add_command(label="Exportar Movimientos", command=self.export_movements)
+        file_menu.add_command(label="Importar Movimientos", command=self.import_movements)
         file_menu.add_separator()
         file_menu.add_command(label="Crear Backup", command=self.create_backup)
+        file_menu.add_command(label="Crear Backup Incremental",
+                              command=lambda: self.create_backup(incremental=True))
         file_menu.add_separator()
-        file_menu.add_command(label="Salir", command=self.root.quit)
+        file_menu.add_command(label="Salir", command=self.on_close)
         menubar.add_cascade(label="Archivo", menu=file_menu)
         
         # Menú Reportes
         report_menu = tk.Menu(menubar, tearoff=0)
         report_menu.add_command(label="Ver Gráfico de Stock", command=self.show_stock_chart)
         report_menu.add_command(label="Generar Reporte de Consumo", command=self.generate_consumption_report)
+        report_menu.add_command(label="Inventario a Fecha", command=self.show_inventory_at_date)
         menubar.add_cascade(label="Reportes", menu=report_menu)
         
         # Menú Ayuda
@@ -80,60 +409,135 @@ class InventoryApp:
     
     def show_connection_status(self):
         """Muestra el estado actual de la conexión a la base de datos"""
-        try:
-            status = self.db.get_connection_status()
-            
-            status_window = tk.Toplevel(self.root)
-            status_window.title("Estado de Conexión")
-            status_window.geometry("400x300")
-            status_window.resizable(False, False)
-            
-            frame = ttk.Frame(status_window, padding=20)
-            frame.pack(fill=tk.BOTH, expand=True)
-            
-            if status.get('status') == 'connected':
-                ttk.Label(frame, text="✅ CONEXIÓN EXITOSA", font=("Arial", 14, "bold"), foreground="#2ecc71").pack(pady=10)
-                info = f"""
-                Base de Datos: {status.get('database', 'N/A')}
-                Versión Servidor: {status.get('server_version', 'N/A')}
-                ID de Conexión: {status.get('connection_id', 'N/A')}
-                Última Verificación: {datetime.now().strftime('%H:%M:%S')}
-                """
-                ttk.Label(frame, text=info, justify=tk.LEFT).pack(pady=10)
-            else:
-                ttk.Label(frame, text="❌ CONEXIÓN FALLIDA", font=("Arial", 14, "bold"), foreground="#e74c3c").pack(pady=10)
-                ttk.Label(frame, text=f"Error: {status.get('message', 'Desconocido')}", wraplength=350).pack(pady=10)
-            
-            ttk.Button(frame, text="Cerrar", command=status_window.destroy).pack(pady=15)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo verificar el estado de la conexión:\n{e}")
+        self.runner.submit("connection_status", self.db.get_connection_status,
+                           self._render_connection_status,
+                           lambda e: messagebox.showerror("Error", f"No se pudo verificar el estado de la conexión:\n{e}"))
     
-    def create_backup(self):
-        """Crea un backup de la base de datos"""
-        try:
-            respuesta = messagebox.askyesno("Confirmar Backup", 
-                                           "¿Desea crear un backup de la base de datos?\n"
-                                           "Esto puede tomar unos segundos.")
-            if not respuesta:
+    def _render_connection_status(self, status):
+        """Muestra la ventana con el estado de la conexión y las consultas lentas"""
+        status_window = tk.Toplevel(self.root)
+        status_window.title("Estado de Conexión")
+        status_window.geometry("760x620")
+        
+        frame = ttk.Frame(status_window, padding=20)
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        if status.get('status') == 'connected':
+            ttk.Label(frame, text="✅ CONEXIÓN EXITOSA", font=("Arial", 14, "bold"), foreground="#2ecc71").pack(pady=10)
+            pool = status.get('pool', {})
+            info = f"""
+            Base de Datos: {status.get('database', 'N/A')}
+            Versión Servidor: {status.get('server_version', 'N/A')}
+            ID de Conexión: {status.get('connection_id', 'N/A')}
+            Pool: {pool.get('in_use', 0)}/{pool.get('max_size', 0)} en uso | {pool.get('idle', 0)} libres
+            Espera p95: {pool.get('p95_wait_ms', 0):.1f} ms | Agotamientos: {pool.get('exhaustion_events', 0)}
+            Réplica: {self._describe_replica(status.get('replica', {}))}
+            Última Verificación: {datetime.now().strftime('%H:%M:%S')}
+            """
+            ttk.Label(frame, text=info, justify=tk.LEFT).pack(pady=10)
+        else:
+            ttk.Label(frame, text="❌ CONEXIÓN FALLIDA", font=("Arial", 14, "bold"), foreground="#e74c3c").pack(pady=10)
+            ttk.Label(frame, text=f"Error: {status.get('message', 'Desconocido')}", wraplength=350).pack(pady=10)
+        
+        # Consultas lentas capturadas con su plan de ejecución
+        slow_frame = ttk.LabelFrame(frame, text="Consultas Lentas", padding=10)
+        slow_frame.pack(fill=tk.BOTH, expand=True)
+        
+        slow_queries = self.db.get_slow_queries()
+        columns = ("Hora", "Tiempo (ms)", "Filas", "Consulta")
+        slow_tree = ttk.Treeview(slow_frame, columns=columns, show="headings", height=6)
+        for col, width in zip(columns, (140, 90, 60, 400)):
+            slow_tree.heading(col, text=col)
+            slow_tree.column(col, width=width, anchor=tk.W if col == "Consulta" else tk.CENTER)
+        slow_tree.pack(fill=tk.X)
+        
+        for index, entry in enumerate(slow_queries):
+            slow_tree.insert("", tk.END, iid=str(index), values=(
+                entry['timestamp'].replace('T', ' '),
+                f"{entry['elapsed_ms']:.1f}",
+                entry['rows'],
+                entry['sql'][:120]
+            ))
+        
+        detail_text = scrolledtext.ScrolledText(slow_frame, height=10, font=("Courier", 9))
+        detail_text.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+        detail_text.insert(tk.END, "Seleccione una consulta para ver su plan de ejecución."
+                           if slow_queries else "No se han registrado consultas lentas.")
+        detail_text.config(state=tk.DISABLED)
+        
+        def mostrar_detalle(event=None):
+            seleccion = slow_tree.selection()
+            if not seleccion:
                 return
-            
-            backup_path = self.db.backup_database()
-            
-            if backup_path:
-                messagebox.showinfo("Backup Exitoso", 
-                                  f"✅ Backup creado exitosamente:\n{backup_path}\n\n"
-                                  f"Tamaño: {os.path.getsize(backup_path) / 1024:.1f} KB")
-                # Abrir carpeta del backup
-                os.startfile(os.path.dirname(backup_path))
-            else:
-                messagebox.showerror("Error en Backup", 
-                                   "❌ No se pudo crear el backup de la base de datos.\n"
-                                   "Verifique los permisos y que mysqldump esté disponible.")
+            entry = slow_queries[int(seleccion[0])]
+            plan = entry.get('plan')
+            detalle = (f"SQL:\n{entry['sql']}\n\n"
+                       f"Parámetros: {entry['params']}\n\n"
+                       f"Plan (EXPLAIN FORMAT=JSON):\n"
+                       f"{json.dumps(plan, indent=2, ensure_ascii=False) if plan is not None else 'No disponible'}")
+            detail_text.config(state=tk.NORMAL)
+            detail_text.delete("1.0", tk.END)
+            detail_text.insert(tk.END, detalle)
+            detail_text.config(state=tk.DISABLED)
+        
+        slow_tree.bind("<<TreeviewSelect>>", mostrar_detalle)
+        
+        ttk.Button(frame, text="Cerrar", command=status_window.destroy).pack(pady=15)
+    
+    @staticmethod
+    def _describe_replica(replica):
+        """Resume en una línea el estado de la réplica de lectura"""
+        if not replica.get('enabled'):
+            return "no configurada"
+        estado = "activa" if replica.get('healthy') else f"en espera ({replica.get('last_error') or 'sin datos'})"
+        retraso = f" | retraso {replica['lag']}s" if replica.get('lag') is not None else ""
+        return f"{estado}{retraso} | {replica.get('replica_reads', 0)} lecturas"
+    
+    def create_backup(self, incremental=False):
+        """Crea un backup completo o incremental de la base de datos"""
+        tipo = "incremental " if incremental else ""
+        respuesta = messagebox.askyesno("Confirmar Backup", 
+                                       f"¿Desea crear un backup {tipo}de la base de datos?\n"
+                                       "Esto puede tomar unos segundos.")
+        if not respuesta:
+            return
         
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo crear el backup:\n{e}")
-            logger.error(f"Error al crear backup: {e}")
+        self.status_var.set("💾 Creando backup de la base de datos...")
+        
+        def progreso(filas, estimadas, tabla):
+            """Muestra el avance en la barra de estado (se llama desde los hilos del backup)"""
+            porcentaje = filas / estimadas * 100 if estimadas else 0
+            self.runner.post(self.status_var.set,
+                             f"💾 Creando backup: {filas:,} filas ({porcentaje:.0f}%) - {tabla}")
+        
+        self.runner.submit("backup",
+                           lambda: self.db.backup_database(progress_callback=progreso, incremental=incremental),
+                           self._on_backup_done, self._on_backup_error, replace=False)
+    
+    def _on_backup_done(self, backup_path):
+        """Informa el resultado del backup"""
+        self.update_status_bar()
+        if backup_path:
+            from src.backup import load_manifest
+            manifest = load_manifest(backup_path)
+            tipo = "incremental" if manifest['type'] == "incremental" else "completo"
+            messagebox.showinfo("Backup Exitoso", 
+                              f"✅ Backup {tipo} creado exitosamente:\n{backup_path}\n\n"
+                              f"Filas: {manifest['total_rows']:,} | "
+                              f"Tamaño: {manifest['total_bytes'] / 1024:.1f} KB | "
+                              f"Tiempo: {manifest['elapsed']:.2f}s")
+            # Abrir carpeta del backup
+            os.startfile(backup_path)
+        else:
+            messagebox.showerror("Error en Backup", 
+                               "❌ No se pudo crear el backup de la base de datos.\n"
+                               "Revise database.log para más detalles.")
+    
+    def _on_backup_error(self, error):
+        """Informa un error inesperado durante el backup"""
+        self.update_status_bar()
+        messagebox.showerror("Error", f"No se pudo crear el backup:\n{error}")
+        logger.error(f"Error al crear backup: {error}")
     
     def create_main_layout(self):
         """Crea el diseño principal de la interfaz"""
@@ -158,9 +562,14 @@ class InventoryApp:
         self.setup_products_tab()
         self.setup_reports_tab()
         
-        # Barra de estado
-        status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        # Barra de estado con indicador de actividad
+        status_frame = ttk.Frame(self.root, relief=tk.SUNKEN)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, anchor=tk.W)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.busy_indicator = ttk.Progressbar(status_frame, mode="indeterminate", length=120)
     
     def setup_inventory_tab(self):
         """Configura la pestaña de gestión de inventario"""
@@ -220,8 +629,7 @@ class InventoryApp:
         
         # Tabla de stock
         self.stock_tree = ttk.Treeview(stock_frame, columns=("id", "producto", "tipo", "cantidad", "ubicacion", "precio", "valor_total", "estado"), show="headings")
-        scrollbar = ttk.Scrollbar(stock_frame, orient="vertical", command=self.stock_tree.yview)
-        self.stock_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(stock_frame, orient="vertical")
         
         # Configurar columnas
         column_config = {
@@ -242,6 +650,20 @@ class InventoryApp:
         self.stock_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Solo se dibujan las filas visibles; el orden por columna se hace en memoria
+        self.stock_grid = VirtualTreeview(
+            self.stock_tree, scrollbar,
+            ListRowSource(sort_keys={
+                "id": "id_producto", "producto": "nombre", "tipo": "tipo", "cantidad": "cantidad",
+                "ubicacion": "ubicacion", "precio": "precio_unitario", "valor_total": "valor_total",
+                "estado": "estado"
+            }),
+            self._stock_row_values, key="id_producto", name="stock_grid")
+        
+        # Configurar colores para estados
+        self.stock_tree.tag_configure("critical", background="#ffcccc", foreground="#cc0000", font=("Arial", 9, "bold"))
+        self.stock_tree.tag_configure("normal", background="#ffffff")
+        
         # Bind para doble click en producto
         self.stock_tree.bind("<Double-1>", self.on_product_double_click)
         
@@ -271,9 +693,6 @@ class InventoryApp:
         self.movements_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar_mov.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Cargar movimientos recientes
-        self.load_recent_movements()
-        
         # Panel de alertas
         alerts_frame = ttk.LabelFrame(right_frame, text="Alertas de Stock", padding="10")
         alerts_frame.pack(fill=tk.X, pady=(10, 0))
@@ -345,14 +764,21 @@ class InventoryApp:
         self.products_tree.column("acciones", width=150, anchor=tk.CENTER)
         
         # Scrollbar para la tabla
-        scrollbar_prod = ttk.Scrollbar(products_frame, orient="vertical", command=self.products_tree.yview)
-        self.products_tree.configure(yscrollcommand=scrollbar_prod.set)
+        scrollbar_prod = ttk.Scrollbar(products_frame, orient="vertical")
         
         self.products_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar_prod.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Cargar productos existentes
-        self.load_products_data()
+        # Páginas del catálogo pedidas a la base de datos al desplazarse, ordenadas en el servidor
+        self.products_grid = VirtualTreeview(
+            self.products_tree, scrollbar_prod,
+            QueryRowSource(self.db, self.PRODUCTS_QUERY,
+                           sort_keys={"id": "id_producto", "nombre": "nombre", "tipo": "tipo",
+                                      "precio": "precio_unitario"},
+                           default_order="nombre", key="id_producto"),
+            self._product_row_values, key="id_producto", runner=self.runner, name="products_grid",
+            on_error=self.show_db_error)
+        
     
     def setup_reports_tab(self):
         """Configura la pestaña de reportes y análisis"""
@@ -376,77 +802,44 @@ class InventoryApp:
         chart_frame = ttk.LabelFrame(self.tab_reports, text="Análisis Visual del Inventario", padding="15")
         chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
-        # Contenedor para el gráfico
+        # Contenedor para el gráfico (se genera al abrir la pestaña)
         self.chart_container = ttk.Frame(chart_frame)
         self.chart_container.pack(fill=tk.BOTH, expand=True)
-        
-        # Generar gráfico inicial
-        self.update_stock_chart()
     
     def load_stock_data(self):
-        """Carga los datos del stock en la tabla"""
-        # Limpiar tabla
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
-        # Obtener datos de stock
-        query = """
-        SELECT p.id_producto, p.nombre, p.tipo, s.cantidad, s.ubicacion, 
-               p.precio_unitario,
-               (s.cantidad * p.precio_unitario) as valor_total,
-               CASE 
-                   WHEN p.tipo = 'papel' AND s.cantidad < 500 THEN 'CRÍTICO'
-                   WHEN p.tipo = 'toner' AND s.cantidad < 10 THEN 'CRÍTICO'
-                   WHEN p.tipo = 'encuadernacion' AND s.cantidad < 20 THEN 'CRÍTICO'
-                   ELSE 'NORMAL'
-               END AS estado
-        FROM productos p
-        JOIN stock s ON p.id_producto = s.producto_id
-        ORDER BY estado DESC, p.nombre
-        """
-        
-        stock_data = self.db.fetch_all(query)
-        
-        # Cargar en tabla
-        for item in stock_data:
-            estado_tag = "critical" if item['estado'] == 'CRÍTICO' else "normal"
-            
-            self.stock_tree.insert("", tk.END, values=(
-                item['id_producto'],
-                item['nombre'],
-                item['tipo'].capitalize(),
-                item['cantidad'],
-                item['ubicacion'],
-                DataUtils.formatear_moneda(item['precio_unitario']),
-                DataUtils.formatear_moneda(item['valor_total']),
-                item['estado']
-            ), tags=(estado_tag,))
-        
-        # Configurar colores para estados
-        self.stock_tree.tag_configure("critical", background="#ffcccc", foreground="#cc0000", font=("Arial", 9, "bold"))
-        self.stock_tree.tag_configure("normal", background="#ffffff")
-        
-        # Actualizar alertas
-        self.update_alerts()
+        """Carga los datos del stock y las alertas (un solo viaje, en segundo plano)"""
+        self.refresh_views("stock", "alerts")
+    
+    def _render_stock_data(self, stock_data, empty_message=None):
+        """Carga en la tabla de stock las filas obtenidas (solo se dibujan las visibles)"""
+        self.stock_grid.set_rows(stock_data, empty_message)
+    
+    @staticmethod
+    def _stock_row_values(item):
+        """Valores y etiqueta de una fila de la tabla de stock"""
+        estado_tag = "critical" if item['estado'] == 'CRÍTICO' else "normal"
+        return (
+            item['id_producto'],
+            item['nombre'],
+            item['tipo'].capitalize(),
+            item['cantidad'],
+            item['ubicacion'],
+            DataUtils.formatear_moneda(item['precio_unitario']),
+            DataUtils.formatear_moneda(item['valor_total']),
+            item['estado']
+        ), (estado_tag,)
     
     def load_recent_movements(self):
-        """Carga los últimos movimientos en la tabla"""
+        """Carga los últimos movimientos en la tabla (consulta en segundo plano)"""
+        self.runner.submit("movements", lambda: self.db.fetch_all(self.RECENT_MOVEMENTS_QUERY),
+                           self._render_recent_movements, self.show_db_error)
+    
+    def _render_recent_movements(self, movements_data):
+        """Carga en la tabla los últimos movimientos obtenidos"""
         # Limpiar tabla
         for item in self.movements_tree.get_children():
             self.movements_tree.delete(item)
         
-        # Obtener últimos 50 movimientos
-        query = """
-        SELECT m.id_movimiento, p.nombre, m.tipo as tipo_mov, m.cantidad, 
-               DATE_FORMAT(m.fecha, '%d/%m/%Y %H:%i') as fecha_formateada, m.responsable
-        FROM movimientos m
-        JOIN productos p ON m.producto_id = p.id_producto
-        ORDER BY m.fecha DESC
-        LIMIT 50
-        """
-        
-        movements_data = self.db.fetch_all(query)
-        
         # Cargar en tabla
         for item in movements_data:
             tipo_tag = "entrada" if item['tipo_mov'] == 'entrada' else "salida"
@@ -465,11 +858,12 @@ class InventoryApp:
         self.movements_tree.tag_configure("salida", background="#ffe6e6", foreground="#cc0000")
     
     def update_alerts(self):
-        """Actualiza el panel de alertas"""
-        # Obtener alertas
-        query = "SELECT * FROM vista_alertas_stock"
-        alerts = self.db.fetch_all(query)
-        
+        """Actualiza el panel de alertas (consulta en segundo plano)"""
+        self.runner.submit("alerts", lambda: self.db.fetch_all(self.ALERTS_QUERY),
+                           self._render_alerts, self.show_db_error)
+    
+    def _render_alerts(self, alerts):
+        """Muestra las alertas obtenidas en el panel"""
         # Actualizar texto de alertas
         self.alerts_text.config(state=tk.NORMAL)
         self.alerts_text.delete(1.0, tk.END)
@@ -494,8 +888,35 @@ class InventoryApp:
         
         self.alerts_text.config(state=tk.DISABLED)
     
+    def _on_stock_loaded(self, stock_data):
+        """Actualiza el índice de búsqueda y muestra el stock respetando el filtro activo"""
+        self.search_index.sync(stock_data)
+        if self.search_var.get().strip():
+            self._render_stock_data(self.search_index.search(self.search_var.get()),
+                                    "No se encontraron productos")
+        else:
+            self._render_stock_data(stock_data)
+    
+    def schedule_search(self, delay=200):
+        """Agrupa las pulsaciones de teclado antes de lanzar la búsqueda"""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        # Con el índice cargado la búsqueda es local y no hace falta esperar
+        if self.search_index.ready:
+            delay = 0
+        self._search_after_id = self.root.after(delay, self.search_products)
+    
     def search_products(self, event=None):
         """Busca productos en la tabla de stock"""
+        self._search_after_id = None
+        
+        # Filtrar desde el índice en memoria (sin acentos, subcadenas y búsqueda difusa)
+        if self.search_index.ready:
+            self.runner.cancel("stock")
+            self._render_stock_data(self.search_index.search(self.search_var.get()),
+                                    "No se encontraron productos")
+            return
+        
         search_term = self.search_var.get().lower()
         
         # Si no hay término de búsqueda, cargar todos los datos
@@ -503,48 +924,24 @@ class InventoryApp:
             self.load_stock_data()
             return
         
-        # Limpiar tabla
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
         # Obtener datos filtrados
         query = """
         SELECT p.id_producto, p.nombre, p.tipo, s.cantidad, s.ubicacion, 
                p.precio_unitario,
                (s.cantidad * p.precio_unitario) as valor_total,
-               CASE 
-                   WHEN p.tipo = 'papel' AND s.cantidad < 500 THEN 'CRÍTICO'
-                   WHEN p.tipo = 'toner' AND s.cantidad < 10 THEN 'CRÍTICO'
-                   WHEN p.tipo = 'encuadernacion' AND s.cantidad < 20 THEN 'CRÍTICO'
-                   ELSE 'NORMAL'
-               END AS estado
+               s.estado
         FROM productos p
         JOIN stock s ON p.id_producto = s.producto_id
         WHERE LOWER(p.nombre) LIKE %s OR LOWER(p.tipo) LIKE %s
-        ORDER BY estado DESC, p.nombre
+        ORDER BY s.estado DESC, p.nombre
         """
         
         params = (f"%{search_term}%", f"%{search_term}%")
-        results = self.db.fetch_all(query, params)
-        
-        # Cargar resultados en tabla
-        for item in results:
-            estado_tag = "critical" if item['estado'] == 'CRÍTICO' else "normal"
-            
-            self.stock_tree.insert("", tk.END, values=(
-                item['id_producto'],
-                item['nombre'],
-                item['tipo'].capitalize(),
-                item['cantidad'],
-                item['ubicacion'],
-                DataUtils.formatear_moneda(item['precio_unitario']),
-                DataUtils.formatear_moneda(item['valor_total']),
-                item['estado']
-            ), tags=(estado_tag,))
         
-        # Mostrar mensaje si no hay resultados
-        if not results:
-            self.stock_tree.insert("", tk.END, values=("", "No se encontraron productos", "", "", "", "", "", ""), tags=("normal",))
+        # La clave "stock" hace que una búsqueda nueva reemplace a la anterior
+        self.runner.submit("stock", lambda: self.db.fetch_all(query, params),
+                           lambda results: self._render_stock_data(results, "No se encontraron productos"),
+                           self.show_db_error)
     
     def clear_search(self):
         """Limpia el campo de búsqueda"""
@@ -572,60 +969,43 @@ class InventoryApp:
             return
         
         quantity = int(self.quantity.get())
+        movement_type = self.movement_type.get()
+        params = (
+            product_id,
+            movement_type,
+            quantity,
+            self.responsible.get(),
+            self.motivo.get() or "Movimiento manual"
+        )
         
-        # Validar que el producto exista
-        check_query = "SELECT COUNT(*) as count FROM productos WHERE id_producto = %s"
-        result = self.db.fetch_all(check_query, (product_id,))
-        
-        if not result or result[0]['count'] == 0:
-            messagebox.showerror("Error", f"No existe un producto con ID {product_id}. Verifique el ID.")
-            return
-        
-        # Registrar movimiento (usando transacción para integridad)
-        try:
-            # Primero verificar stock suficiente para salidas
-            if self.movement_type.get() == 'salida':
-                stock_query = "SELECT cantidad FROM stock WHERE producto_id = %s"
-                stock_result = self.db.fetch_one(stock_query, (product_id,))
-                
-                if not stock_result or stock_result['cantidad'] < quantity:
-                    messagebox.showerror("Error de Stock", 
-                                       f"No hay suficiente stock para este producto.\n"
-                                       f"Stock actual: {stock_result['cantidad'] if stock_result else 0}\n"
-                                       f"Cantidad solicitada: {quantity}")
-                    return
-            
-            # Registrar el movimiento
-            query = """
-            INSERT INTO movimientos (producto_id, tipo, cantidad, responsable, motivo)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            params = (
-                product_id,
-                self.movement_type.get(),
-                quantity,
-                self.responsible.get(),
-                self.motivo.get() or "Movimiento manual"
-            )
-            
-            if self.db.execute_query(query, params):
-                messagebox.showinfo("Éxito", "✅ Movimiento registrado correctamente")
-                self.load_stock_data()
-                self.load_recent_movements()
-                self.update_status_bar()
+        def on_done(result):
+            """Informa el resultado en el hilo de Tk"""
+            if result["status"] == "no_product":
+                messagebox.showerror("Error", f"No existe un producto con ID {product_id}. Verifique el ID.")
+            elif result["status"] == "no_stock":
+                messagebox.showerror("Error de Stock", 
+                                   f"No hay suficiente stock para este producto.\n"
+                                   f"Stock actual: {result['stock']}\n"
+                                   f"Cantidad solicitada: {quantity}")
+            else:
+                messagebox.showinfo("Éxito", f"✅ Movimiento registrado correctamente\n"
+                                              f"Stock actual: {result['stock']}")
+                self.refresh_views("stock", "alerts", "movements", "status_bar")
+                self.schedule_snapshot()
                 
                 # Limpiar campos excepto responsable (por eficiencia)
                 self.product_id.set("")
                 self.quantity.set("")
                 self.motivo.set("Consumo normal")
                 self.product_id_entry.focus()
-            else:
-                messagebox.showerror("Error", "❌ No se pudo registrar el movimiento. Verifique los datos e intente nuevamente.")
         
-        except Exception as e:
-            messagebox.showerror("Error", f"❌ Error al registrar movimiento:\n{e}")
-            logger.error(f"Error al registrar movimiento: {e}")
+        def on_error(error):
+            messagebox.showerror("Error", f"❌ Error al registrar movimiento:\n{error}")
+            logger.error(f"Error al registrar movimiento: {error}")
+        
+        # Validación, bloqueo del stock e INSERT en un solo viaje al servidor
+        self.runner.submit("register_movement", lambda: self.db.register_movement(*params),
+                           on_done, on_error, replace=False)
     
     def add_new_product(self):
         """Agrega un nuevo producto al sistema"""
@@ -643,47 +1023,37 @@ class InventoryApp:
             messagebox.showerror("Error", "El precio debe ser un número válido y positivo")
             return
         
-        # Usar transacción para garantizar integridad
-        try:
-            # Insertar nuevo producto
+        params_producto = (
+            self.new_prod_name.get().strip(),
+            self.new_prod_type.get(),
+            precio
+        )
+        ubicacion = self.new_prod_location.get().strip()
+        
+        def crear_producto():
+            """Inserta el producto y su stock inicial en una sola transacción"""
             query_producto = """
             INSERT INTO productos (nombre, tipo, precio_unitario)
             VALUES (%s, %s, %s)
             """
-            
-            params_producto = (
-                self.new_prod_name.get().strip(),
-                self.new_prod_type.get(),
-                precio
-            )
-            
-            if not self.db.execute_query(query_producto, params_producto):
-                raise Exception("No se pudo crear el producto")
-            
-            # Obtener el ID del nuevo producto
-            new_product_id = self.db.get_last_insert_id()
-            
-            if not new_product_id:
-                raise Exception("No se pudo obtener el ID del nuevo producto")
-            
-            # Insertar stock inicial
             query_stock = """
             INSERT INTO stock (producto_id, cantidad, ubicacion)
             VALUES (%s, %s, %s)
             """
             
-            params_stock = (
-                new_product_id,
-                0,  # Cantidad inicial 0
-                self.new_prod_location.get().strip()
-            )
-            
-            if not self.db.execute_query(query_stock, params_stock):
-                messagebox.showwarning("Advertencia", "Producto creado pero no se pudo inicializar el stock")
-            
+            with self.db.transaction() as tx:
+                # Insertar nuevo producto; lastrowid es de esta misma conexión
+                tx.execute(query_producto, params_producto)
+                new_product_id = tx.lastrowid
+                
+                # Insertar stock inicial (cantidad 0)
+                tx.execute(query_stock, (new_product_id, 0, ubicacion))
+            return new_product_id
+        
+        def on_done(new_product_id):
+            """Actualiza las vistas en el hilo de Tk"""
             # Actualizar vistas
-            self.load_products_data()
-            self.load_stock_data()
+            self.refresh_views("products", "stock", "alerts")
             
             # Limpiar formulario
             self.new_prod_name.set("")
@@ -692,34 +1062,26 @@ class InventoryApp:
             
             messagebox.showinfo("Éxito", f"✅ Producto creado exitosamente con ID #{new_product_id}")
         
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo crear el producto:\n{e}")
-            logger.error(f"Error al crear producto: {e}")
+        def on_error(error):
+            messagebox.showerror("Error", f"No se pudo crear el producto:\n{error}")
+            logger.error(f"Error al crear producto: {error}")
+        
+        self.runner.submit("add_product", crear_producto, on_done, on_error, replace=False)
     
     def load_products_data(self):
-        """Carga los productos existentes en la tabla"""
-        # Limpiar tabla
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        # Obtener productos
-        query = """
-        SELECT id_producto, nombre, tipo, precio_unitario
-        FROM productos
-        ORDER BY nombre
-        """
-        
-        products = self.db.fetch_all(query)
-        
-        # Cargar en tabla
-        for product in products:
-            self.products_tree.insert("", tk.END, values=(
-                product['id_producto'],
-                product['nombre'],
-                product['tipo'].capitalize(),
-                DataUtils.formatear_moneda(product['precio_unitario']),
-                "✏️ Editar | 🗑️ Eliminar"
-            ))
+        """Carga el total de productos y la página visible (consulta en segundo plano)"""
+        self.refresh_views("products")
+    
+    @staticmethod
+    def _product_row_values(product):
+        """Valores de una fila de la tabla de productos"""
+        return (
+            product['id_producto'],
+            product['nombre'],
+            product['tipo'].capitalize(),
+            DataUtils.formatear_moneda(product['precio_unitario']),
+            "✏️ Editar | 🗑️ Eliminar"
+        ), ()
     
     def update_stock_chart(self):
         """Actualiza el gráfico de stock en la pestaña de reportes"""
@@ -731,8 +1093,11 @@ class InventoryApp:
         GROUP BY p.tipo
         """
         
-        stock_data = self.db.fetch_all(query)
-        
+        self.runner.submit("stock_chart", lambda: self.db.fetch_all(query),
+                           self._render_stock_chart, self.show_db_error)
+    
+    def _render_stock_chart(self, stock_data):
+        """Dibuja el gráfico de stock con los datos obtenidos"""
         if not stock_data:
             # Mostrar mensaje en lugar de gráfico
             for widget in self.chart_container.winfo_children():
@@ -750,6 +1115,10 @@ class InventoryApp:
         for widget in self.chart_container.winfo_children():
             widget.destroy()
         
+        # matplotlib se carga la primera vez que se muestra un gráfico
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
         # Generar y mostrar el gráfico
         fig, ax = plt.subplots(figsize=(10, 6), dpi=100)
         
@@ -782,42 +1151,28 @@ class InventoryApp:
     
     def export_inventory(self):
         """Exporta el inventario actual a Excel"""
+        # Los alias son las cabeceras del Excel: el DataFrame sale listo del cursor
         query = """
-        SELECT p.id_producto, p.nombre, p.tipo, s.cantidad, s.ubicacion, 
-               p.precio_unitario, (s.cantidad * p.precio_unitario) as valor_total,
-               CASE 
-                   WHEN p.tipo = 'papel' AND s.cantidad < 500 THEN 'CRÍTICO'
-                   WHEN p.tipo = 'toner' AND s.cantidad < 10 THEN 'CRÍTICO'
-                   WHEN p.tipo = 'encuadernacion' AND s.cantidad < 20 THEN 'CRÍTICO'
-                   ELSE 'NORMAL'
-               END AS estado
+        SELECT p.id_producto AS `ID`, p.nombre AS `Producto`,
+               CONCAT(UPPER(LEFT(p.tipo, 1)), SUBSTRING(p.tipo, 2)) AS `Tipo`,
+               s.cantidad AS `Cantidad`, s.ubicacion AS `Ubicación`,
+               p.precio_unitario AS `Precio Unitario`,
+               (s.cantidad * p.precio_unitario) AS `Valor Total`,
+               s.estado AS `Estado`
         FROM productos p
         JOIN stock s ON p.id_producto = s.producto_id
         ORDER BY p.tipo, p.nombre
         """
         
-        inventory_data = self.db.fetch_all(query)
-        
-        if not inventory_data:
+        self.runner.submit("export_inventory", lambda: self.db.fetch_all(query, result_format="dataframe"),
+                           self._export_inventory_data, self.show_db_error)
+    
+    def _export_inventory_data(self, inventory_data):
+        """Pide la ruta de destino y exporta el inventario obtenido (DataFrame)"""
+        if inventory_data.empty:
             messagebox.showinfo("Información", "No hay datos de inventario para exportar")
             return
         
-        # Preparar datos para exportar
-        datos = []
-        for item in inventory_data:
-            datos.append([
-                item['id_producto'],
-                item['nombre'],
-                item['tipo'].capitalize(),
-                item['cantidad'],
-                item['ubicacion'],
-                item['precio_unitario'],
-                item['cantidad'] * item['precio_unitario'],
-                item['estado']
-            ])
-        
-        columnas = ["ID", "Producto", "Tipo", "Cantidad", "Ubicación", "Precio Unitario", "Valor Total", "Estado"]
-        
         # Generar nombre de archivo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         default_filename = f"inventario_completo_{timestamp}.xlsx"
@@ -833,46 +1188,45 @@ class InventoryApp:
         if not filepath:
             return  # Usuario canceló
         
-        try:
-            ruta = DataUtils.exportar_a_excel(datos, columnas, os.path.basename(filepath))
-            
+        def on_done(ruta):
             if ruta:
                 messagebox.showinfo("Éxito", f"✅ Reporte exportado exitosamente a:\n{ruta}")
                 # Calcular valor total del inventario
-                valor_total = sum(item['cantidad'] * item['precio_unitario'] for item in inventory_data)
+                valor_total = float(inventory_data["Valor Total"].sum())
                 messagebox.showinfo("Resumen", f"📊 Valor total del inventario: {DataUtils.formatear_moneda(valor_total)}\n📦 Total de productos: {len(inventory_data)}")
-        except Exception as e:
+        
+        def on_error(e):
             messagebox.showerror("Error", f"❌ Error al exportar el reporte:\n{e}")
             logger.error(f"Error al exportar inventario: {e}")
+        
+        self.runner.submit("export_inventory",
+                           lambda: DataUtils.exportar_a_excel(inventory_data, None, os.path.basename(filepath)),
+                           on_done, on_error, replace=False)
     
     def export_movements(self):
-        """Exporta los movimientos a Excel"""
+        """Exporta los movimientos a Excel en streaming (memoria constante)"""
+        # Verificar que existan movimientos sin traer el historial completo
+        self.runner.submit("export_movements",
+                           lambda: self.db.fetch_one("SELECT 1 AS existe FROM movimientos LIMIT 1"),
+                           self._export_movements_stream, self.show_db_error)
+    
+    def _export_movements_stream(self, existe):
+        """Pide la ruta de destino y exporta los movimientos en segundo plano"""
+        if not existe:
+            messagebox.showinfo("Información", "No hay movimientos para exportar")
+            return
+        
+        # El formato de cada celda se resuelve en SQL para escribir las tuplas tal cual
         query = """
-        SELECT m.id_movimiento, p.nombre, m.tipo, m.cantidad, m.fecha, m.responsable, m.motivo
-        FROM movimientos m
+        SELECT m.id_movimiento, p.nombre,
+               CONCAT(UPPER(LEFT(m.tipo, 1)), SUBSTRING(m.tipo, 2)) AS tipo,
+               m.cantidad, COALESCE(DATE_FORMAT(m.fecha, '%d/%m/%Y %H:%i:%s'), '') AS fecha,
+               m.responsable, COALESCE(m.motivo, '') AS motivo
+        FROM {tabla} m
         JOIN productos p ON m.producto_id = p.id_producto
         ORDER BY m.fecha DESC
         """
         
-        movements_data = self.db.fetch_all(query)
-        
-        if not movements_data:
-            messagebox.showinfo("Información", "No hay movimientos para exportar")
-            return
-        
-        # Preparar datos para exportar
-        datos = []
-        for item in movements_data:
-            datos.append([
-                item['id_movimiento'],
-                item['nombre'],
-                item['tipo'].capitalize(),
-                item['cantidad'],
-                item['fecha'].strftime("%d/%m/%Y %H:%M:%S") if item['fecha'] else "",
-                item['responsable'],
-                item['motivo'] or ""
-            ])
-        
         columnas = ["ID Movimiento", "Producto", "Tipo", "Cantidad", "Fecha", "Responsable", "Motivo"]
         
         # Generar nombre de archivo
@@ -890,42 +1244,223 @@ class InventoryApp:
         if not filepath:
             return  # Usuario canceló
         
-        try:
-            ruta = DataUtils.exportar_a_excel(datos, columnas, os.path.basename(filepath))
-            
+        totales = {"Entrada": 0, "Salida": 0}
+        
+        def filas_movimientos():
+            """Entrega las tuplas del cursor como filas de Excel mientras cuenta por tipo"""
+            # Lo archivado es más antiguo que lo que queda en movimientos: leer
+            # una tabla tras otra mantiene el orden sin ordenar la unión completa
+            tablas = ["movimientos"]
+            if movement_source(self.db) != "movimientos":
+                tablas.append("movimientos_archivo")
+            for tabla in tablas:
+                for lote in self.db.fetch_iter(query.format(tabla=tabla), batch_size=2000,
+                                               result_format="tuple"):
+                    for fila in lote:
+                        totales[fila[2]] = totales.get(fila[2], 0) + 1
+                        yield fila
+        
+        def on_done(result):
+            ruta, total_movimientos = result
             if ruta:
                 messagebox.showinfo("Éxito", f"✅ Reporte de movimientos exportado exitosamente a:\n{ruta}")
-                total_movimientos = len(movements_data)
-                total_entradas = sum(1 for m in movements_data if m['tipo'] == 'entrada')
-                total_salidas = sum(1 for m in movements_data if m['tipo'] == 'salida')
                 
                 resumen = "📊 Resumen de Movimientos Exportados:\n"
                 resumen += f"• Total de movimientos: {total_movimientos}\n"
-                resumen += f"• Entradas registradas: {total_entradas}\n"
-                resumen += f"• Salidas registradas: {total_salidas}"
+                resumen += f"• Entradas registradas: {totales['Entrada']}\n"
+                resumen += f"• Salidas registradas: {totales['Salida']}"
                 
                 messagebox.showinfo("Resumen", resumen)
-        except Exception as e:
+        
+        def on_error(e):
             messagebox.showerror("Error", f"❌ Error al exportar el reporte:\n{e}")
             logger.error(f"Error al exportar movimientos: {e}")
+        
+        self.runner.submit("export_movements",
+                           lambda: DataUtils.exportar_a_excel_stream(
+                               filas_movimientos(), columnas, os.path.basename(filepath),
+                               columnas_numericas=["Cantidad"]),
+                           on_done, on_error, replace=False)
     
-    def generate_consumption_report(self):
-        """Genera un reporte de consumo por producto"""
-        # Obtener datos de consumo (solo salidas)
-        query = """
-        SELECT p.nombre, p.tipo, SUM(m.cantidad) as total_consumido,
-               COUNT(*) as num_movimientos,
-               AVG(m.cantidad) as promedio_por_mov
-        FROM movimientos m
-        JOIN productos p ON m.producto_id = p.id_producto
-        WHERE m.tipo = 'salida'
-        GROUP BY p.id_producto
-        ORDER BY total_consumido DESC
-        LIMIT 10
-        """
+    def import_movements(self):
+        """Importa movimientos masivamente desde un archivo CSV o Excel"""
+        filepath = filedialog.askopenfilename(
+            filetypes=[("Archivos de movimientos", "*.csv *.xlsx"), ("All Files", "*.*")],
+            title="Importar Movimientos"
+        )
+        
+        if not filepath:
+            return  # Usuario canceló
+        
+        def on_done(resumen):
+            mensaje = (f"📥 Movimientos importados: {resumen['inserted']:,}\n"
+                       f"⚠️ Filas rechazadas: {resumen['rejected']:,}\n"
+                       f"⏱️ Tiempo: {resumen['elapsed']:.2f}s ({resumen['rows_per_second']:,.0f} filas/s)")
+            sin_stock = resumen.get('insufficient_stock', [])
+            if sin_stock:
+                detalle = "\n".join(f"• Fila {r['row']}: producto {r['producto_id']}, salida de "
+                                    f"{r['cantidad']} con {r['disponible']} disponibles"
+                                    for r in sin_stock[:10])
+                resto = f"\n… y {len(sin_stock) - 10:,} más" if len(sin_stock) > 10 else ""
+                mensaje += f"\n\n🚫 Salidas rechazadas por stock insuficiente ({len(sin_stock):,}):\n{detalle}{resto}"
+            
+            if resumen['success']:
+                messagebox.showinfo("Importación Completa", f"✅ Importación finalizada\n\n{mensaje}")
+            else:
+                messagebox.showwarning("Importación Incompleta", 
+                                       f"❌ La importación se detuvo por un error de base de datos.\n"
+                                       f"Los bloques anteriores quedaron guardados.\n\n{mensaje}")
+            
+            self.refresh_views("stock", "alerts", "movements", "status_bar")
+            self.schedule_snapshot()
+        
+        def on_error(e):
+            messagebox.showerror("Error", f"❌ Error al importar movimientos:\n{e}")
+            logger.error(f"Error al importar movimientos: {e}")
+        
+        self.status_var.set("📥 Importando movimientos...")
+        self.runner.submit("import_movements",
+                           lambda: DataUtils.importar_movimientos(filepath, self.db),
+                           on_done, on_error, replace=False)
+    
+    def schedule_snapshot(self):
+        """Fotografía el stock en segundo plano si ya corresponde (por tiempo o movimientos)"""
+        self.runner.submit("snapshot", self.snapshots.maybe_take, lambda fecha: None,
+                           lambda e: logger.warning(f"No se pudo fotografiar el stock: {e}"))
+    
+    def show_inventory_at_date(self):
+        """Abre el reporte de inventario a fecha (por defecto al cierre de hoy)"""
+        hoy = datetime.now().date()
+        self.runner.submit("inventory_at_date", lambda: self.snapshots.stock_at(hoy),
+                           lambda data: self._show_inventory_at_date(data, hoy), self.show_db_error)
+    
+    def _show_inventory_at_date(self, inventario, fecha):
+        """Ventana con existencias y valoración a una fecha pasada"""
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Inventario a Fecha")
+        report_window.geometry("900x650")
+        
+        ttk.Label(report_window, text="🗓️ INVENTARIO A FECHA", 
+                 font=("Arial", 16, "bold")).pack(pady=15)
+        
+        filter_frame = ttk.Frame(report_window)
+        filter_frame.pack(fill=tk.X, padx=20)
+        
+        fecha_var = tk.StringVar(value=fecha.strftime("%d/%m/%Y"))
+        ttk.Label(filter_frame, text="Fecha (DD/MM/AAAA):").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=fecha_var, width=12).pack(side=tk.LEFT, padx=(0, 15))
+        
+        table_frame = ttk.Frame(report_window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        
+        columns = ("producto", "tipo", "cantidad", "precio", "valor")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        tree.heading("producto", text="Producto")
+        tree.heading("tipo", text="Tipo")
+        tree.heading("cantidad", text="Cantidad")
+        tree.heading("precio", text="Precio Unitario")
+        tree.heading("valor", text="Valor")
+        
+        tree.column("producto", width=250)
+        tree.column("tipo", width=100)
+        tree.column("cantidad", width=100, anchor=tk.CENTER)
+        tree.column("precio", width=120, anchor=tk.E)
+        tree.column("valor", width=140, anchor=tk.E)
+        
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        total_label = ttk.Label(report_window, font=("Arial", 11, "bold"))
+        total_label.pack(pady=10)
+        
+        # Datos y fecha mostrados actualmente (los que se exportan)
+        current = {"data": inventario, "fecha": fecha}
+        
+        def fill(data, dia):
+            """Llena la tabla y el total con el inventario de la fecha"""
+            if not report_window.winfo_exists():
+                return
+            current["data"], current["fecha"] = data, dia
+            for row in tree.get_children():
+                tree.delete(row)
+            for item in data:
+                tree.insert("", tk.END, values=(
+                    item['nombre'],
+                    item['tipo'].capitalize(),
+                    item['cantidad'],
+                    DataUtils.formatear_moneda(item['precio_unitario']),
+                    DataUtils.formatear_moneda(item['valor'])
+                ))
+            valor_total = sum(item['valor'] for item in data)
+            total_label.config(text=f"💰 Valor del inventario al {dia:%d/%m/%Y}: "
+                                    f"{DataUtils.formatear_moneda(valor_total)}")
+        
+        def apply_date():
+            """Vuelve a calcular el inventario para la fecha indicada"""
+            try:
+                dia = DataUtils.parsear_fecha(fecha_var.get())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=report_window)
+                return
+            if dia is None:
+                messagebox.showerror("Error", "Indique una fecha", parent=report_window)
+                return
+            self.runner.submit("inventory_at_date", lambda: self.snapshots.stock_at(dia),
+                               lambda data: fill(data, dia), self.show_db_error)
+        
+        ttk.Button(filter_frame, text="Aplicar", command=apply_date).pack(side=tk.LEFT)
+        fill(inventario, fecha)
+        
+        button_frame = ttk.Frame(report_window)
+        button_frame.pack(fill=tk.X, padx=20, pady=10)
         
-        consumo_data = self.db.fetch_all(query)
+        ttk.Button(button_frame, text="Exportar a Excel", 
+                  command=lambda: self.export_inventory_at_date(current["data"], current["fecha"])
+                  ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cerrar", 
+                  command=report_window.destroy).pack(side=tk.RIGHT, padx=5)
+    
+    def export_inventory_at_date(self, inventario, fecha):
+        """Exporta a Excel el inventario a fecha mostrado"""
+        if not inventario:
+            messagebox.showinfo("Información", "No hay inventario para exportar en esa fecha")
+            return
+        
+        datos = [[item['id_producto'], item['nombre'], item['tipo'].capitalize(), item['cantidad'],
+                  float(item['precio_unitario']), float(item['valor'])] for item in inventario]
+        columnas = ["ID", "Producto", "Tipo", "Cantidad", "Precio Unitario", "Valor"]
         
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")],
+            initialfile=f"inventario_al_{fecha:%Y%m%d}.xlsx",
+            title="Guardar Inventario a Fecha"
+        )
+        
+        if not filepath:
+            return
+        
+        def on_done(ruta):
+            if ruta:
+                messagebox.showinfo("Éxito", f"✅ Inventario a fecha exportado exitosamente a:\n{ruta}")
+        
+        def on_error(e):
+            messagebox.showerror("Error", f"❌ Error al exportar el reporte:\n{e}")
+            logger.error(f"Error al exportar inventario a fecha: {e}")
+        
+        self.runner.submit("export_inventory_at_date",
+                           lambda: DataUtils.exportar_a_excel(datos, columnas, os.path.basename(filepath)),
+                           on_done, on_error, replace=False)
+    
+    def generate_consumption_report(self):
+        """Genera un reporte de consumo por producto (desde el resumen diario)"""
+        self.runner.submit("consumption_report", lambda: self.consumption.report(),
+                           self._show_consumption_report, self.show_db_error)
+    
+    def _show_consumption_report(self, consumo_data):
+        """Abre la ventana del reporte de consumo con los datos obtenidos"""
         if not consumo_data:
             messagebox.showinfo("Información", "No hay datos de consumo para generar el reporte")
             return
@@ -933,12 +1468,23 @@ class InventoryApp:
         # Crear ventana de reporte
         report_window = tk.Toplevel(self.root)
         report_window.title("Reporte de Consumo de Productos")
-        report_window.geometry("900x600")
+        report_window.geometry("900x650")
         
         # Título
         ttk.Label(report_window, text="📊 TOP 10 PRODUCTOS MÁS CONSUMIDOS", 
                  font=("Arial", 16, "bold")).pack(pady=15)
         
+        # Filtro por rango de fechas
+        filter_frame = ttk.Frame(report_window)
+        filter_frame.pack(fill=tk.X, padx=20)
+        
+        desde_var = tk.StringVar()
+        hasta_var = tk.StringVar()
+        ttk.Label(filter_frame, text="Desde (DD/MM/AAAA):").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=desde_var, width=12).pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Label(filter_frame, text="Hasta:").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=hasta_var, width=12).pack(side=tk.LEFT, padx=(0, 15))
+        
         # Frame para la tabla
         table_frame = ttk.Frame(report_window)
         table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -969,28 +1515,54 @@ class InventoryApp:
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Llenar tabla
-        for i, item in enumerate(consumo_data, 1):
-            tree.insert("", tk.END, values=(
-                i,
-                item['nombre'],
-                item['tipo'].capitalize(),
-                item['total_consumido'],
-                item['num_movimientos'],
-                f"{item['promedio_por_mov']:.1f}"
-            ))
+        total_label = ttk.Label(report_window, font=("Arial", 11, "bold"))
+        total_label.pack(pady=10)
         
-        # Total consumido
-        total_consumido = sum(item['total_consumido'] for item in consumo_data)
-        ttk.Label(report_window, text=f"📦 Total consumido en el periodo: {total_consumido:,} unidades", 
-                 font=("Arial", 11, "bold")).pack(pady=10)
+        # Datos mostrados actualmente (los que se exportan)
+        current = {"data": consumo_data}
+        
+        def fill(data):
+            """Llena la tabla y el total con los datos del rango"""
+            if not report_window.winfo_exists():
+                return
+            current["data"] = data
+            for row in tree.get_children():
+                tree.delete(row)
+            for i, item in enumerate(data, 1):
+                tree.insert("", tk.END, values=(
+                    i,
+                    item['nombre'],
+                    item['tipo'].capitalize(),
+                    item['total_consumido'],
+                    item['num_movimientos'],
+                    f"{item['promedio_por_mov']:.1f}"
+                ))
+            
+            # Total consumido
+            total_consumido = sum(item['total_consumido'] for item in data)
+            total_label.config(text=f"📦 Total consumido en el periodo: {total_consumido:,} unidades")
+        
+        def apply_filter():
+            """Vuelve a consultar el resumen con el rango indicado"""
+            try:
+                desde = DataUtils.parsear_fecha(desde_var.get())
+                hasta = DataUtils.parsear_fecha(hasta_var.get())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=report_window)
+                return
+            self.runner.submit("consumption_report",
+                               lambda: self.consumption.report(desde, hasta),
+                               fill, self.show_db_error)
+        
+        ttk.Button(filter_frame, text="Aplicar", command=apply_filter).pack(side=tk.LEFT)
+        fill(consumo_data)
         
         # Botones
         button_frame = ttk.Frame(report_window)
         button_frame.pack(fill=tk.X, padx=20, pady=10)
         
         ttk.Button(button_frame, text="Exportar a Excel", 
-                  command=lambda: self.export_consumption_report(consumo_data)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.export_consumption_report(current["data"])).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Cerrar", 
                   command=report_window.destroy).pack(side=tk.RIGHT, padx=5)
     
@@ -1027,14 +1599,17 @@ class InventoryApp:
         if not filepath:
             return
         
-        try:
-            ruta = DataUtils.exportar_a_excel(datos, columnas, os.path.basename(filepath))
-            
+        def on_done(ruta):
             if ruta:
                 messagebox.showinfo("Éxito", f"✅ Reporte de consumo exportado exitosamente a:\n{ruta}")
-        except Exception as e:
+        
+        def on_error(e):
             messagebox.showerror("Error", f"❌ Error al exportar el reporte:\n{e}")
             logger.error(f"Error al exportar reporte de consumo: {e}")
+        
+        self.runner.submit("export_consumption",
+                           lambda: DataUtils.exportar_a_excel(datos, columnas, os.path.basename(filepath)),
+                           on_done, on_error, replace=False)
     
     def show_stock_chart(self):
         """Muestra un gráfico del stock por tipo de producto en una ventana separada"""
@@ -1046,8 +1621,11 @@ class InventoryApp:
         GROUP BY p.tipo
         """
         
-        stock_data = self.db.fetch_all(query)
-        
+        self.runner.submit("stock_chart_window", lambda: self.db.fetch_all(query),
+                           self._show_stock_chart_window, self.show_db_error)
+    
+    def _show_stock_chart_window(self, stock_data):
+        """Abre la ventana del gráfico de stock con los datos obtenidos"""
         if not stock_data:
             messagebox.showinfo("Información", "No hay datos de stock para graficar")
             return
@@ -1112,36 +1690,69 @@ class InventoryApp:
         self.quantity_entry.focus()
     
     def update_status_bar(self):
-        """Actualiza la barra de estado con información relevante"""
-        try:
-            # Obtener valor total del inventario
-            query = """
-            SELECT SUM(s.cantidad * p.precio_unitario) as valor_total,
-                   COUNT(*) as total_productos
-            FROM stock s
-            JOIN productos p ON s.producto_id = p.id_producto
-            """
-            
-            result = self.db.fetch_all(query)
-            valor_total = result[0]['valor_total'] if result and result[0]['valor_total'] else 0
-            total_productos = result[0]['total_productos'] if result else 0
-            
-            # Obtener total de movimientos
-            query_mov = "SELECT COUNT(*) as total_movimientos FROM movimientos"
-            result_mov = self.db.fetch_all(query_mov)
-            total_movimientos = result_mov[0]['total_movimientos'] if result_mov else 0
-            
-            # Actualizar barra de estado
-            status_text = (f"💰 Valor Total Inventario: {DataUtils.formatear_moneda(valor_total)} | "
-                          f"📦 Productos: {total_productos} | "
-                          f"📊 Movimientos Registrados: {total_movimientos} | "
-                          f"🕒 Última actualización: {datetime.now().strftime('%H:%M:%S')}")
-            
-            self.status_var.set(status_text)
-            
-        except Exception as e:
-            logger.error(f"Error al actualizar barra de estado: {e}")
+        """Actualiza la barra de estado con información relevante (en segundo plano)"""
+        self.refresh_views("status_bar")
+    
+    @staticmethod
+    def _summarize_status(result, result_mov):
+        """Extrae valor total, número de productos y de movimientos de las consultas de resumen"""
+        valor_total = result[0]['valor_total'] if result and result[0]['valor_total'] else 0
+        total_productos = result[0]['total_productos'] if result else 0
+        total_movimientos = result_mov[0]['total_movimientos'] if result_mov else 0
+        return valor_total, total_productos, total_movimientos
+    
+    def _render_status_bar(self, resumen):
+        """Muestra el resumen del inventario en la barra de estado"""
+        valor_total, total_productos, total_movimientos = resumen
+        
+        # Actualizar barra de estado
+        status_text = (f"💰 Valor Total Inventario: {DataUtils.formatear_moneda(valor_total)} | "
+                      f"📦 Productos: {total_productos} | "
+                      f"📊 Movimientos Registrados: {total_movimientos} | "
+                      f"🕒 Última actualización: {datetime.now().strftime('%H:%M:%S')}")
+        
+        self.status_var.set(status_text)
+    
+    def refresh_views(self, *views):
+        """
+        Refresca varias vistas con un solo viaje a la base de datos
+        
+        Las consultas de todas las vistas pedidas se envían juntas con
+        fetch_batch y cada resultado se pinta en su vista. Las cargas
+        individuales pendientes de esas vistas se cancelan.
+        
+        Args:
+            views: 'stock', 'alerts', 'movements', 'products' y/o 'status_bar';
+                sin argumentos se refrescan todas
+        """
+        specs = {
+            "stock": ([self.STOCK_QUERY], lambda r: self._on_stock_loaded(r[0])),
+            "alerts": ([self.ALERTS_QUERY], lambda r: self._render_alerts(r[0])),
+            "movements": ([self.RECENT_MOVEMENTS_QUERY], lambda r: self._render_recent_movements(r[0])),
+            "products": self.products_grid.refresh_request(),
+            "status_bar": ([self.INVENTORY_SUMMARY_QUERY, self.MOVEMENT_COUNT_QUERY],
+                           lambda r: self._render_status_bar(self._summarize_status(*r)))
+        }
+        views = views or tuple(specs)
+        selected = [specs[view] for view in views]
+        queries = [query if isinstance(query, tuple) else (query, None)
+                   for view_queries, _ in selected for query in view_queries]
+        
+        for view in views:
+            self.runner.cancel(view)
+        
+        def on_done(results):
+            offset = 0
+            for view_queries, render in selected:
+                render(results[offset:offset + len(view_queries)])
+                offset += len(view_queries)
+        
+        def on_error(e):
+            logger.error(f"Error al refrescar vistas {', '.join(views)}: {e}")
             self.status_var.set(f"❌ Error al actualizar información | {datetime.now().strftime('%H:%M:%S')}")
+        
+        self.runner.submit("refresh:" + "+".join(views), lambda: self.db.fetch_batch(queries),
+                           on_done, on_error)
     
     def show_about(self):
         """Muestra información sobre la aplicación"""
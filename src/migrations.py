@@ -0,0 +1,299 @@
+"""
+Migraciones versionadas del esquema de la base de datos
+
+Cada migración es un archivo db/migrations/NNNN_descripcion.sql que se aplica
+una sola vez y en orden. Las versiones aplicadas se registran en la tabla
+schema_version junto con la suma SHA-256 del archivo, para detectar
+migraciones modificadas después de aplicarse. Un bloqueo con GET_LOCK evita
+que dos terminales migren a la vez al arrancar.
+
+En MariaDB el DDL no es transaccional, por eso las migraciones se escriben de
+forma idempotente (IF NOT EXISTS / IF EXISTS): si una falla a medias se puede
+corregir y volver a lanzar.
+
+Las migraciones que reescriben tablas completas (CLI_ONLY_VERSIONS) copian
+todas las filas y bloquean las escrituras mientras duran; la interfaz no las
+aplica al arrancar y pide lanzarlas desde la línea de comandos.
+
+Uso desde la línea de comandos:
+
+    python -m src.migrations status
+    python -m src.migrations up
+    python -m src.migrations up --target 2
+"""
+import argparse
+import hashlib
+import logging
+import os
+import re
+import time
+
+from mysql.connector import Error
+
+from src.backup import split_sql_script
+from src.database import get_db_config
+from src.pool import ConnectionPoolManager
+
+logger = logging.getLogger('Migrations')
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "migrations")
+LOCK_NAME = "sgi_schema_migrations"
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Reescriben una tabla completa: 0005 particiona movimientos (todo el
+# historial) y 0006 añade a stock una columna generada almacenada
+CLI_ONLY_VERSIONS = frozenset({5, 6})
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    nombre VARCHAR(200) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    duracion_ms INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+class MigrationError(Exception):
+    """Error al descubrir o aplicar una migración"""
+
+
+class Migration:
+    """Archivo de migración numerado"""
+
+    __slots__ = ("version", "name", "path", "checksum")
+
+    def __init__(self, version, name, path, checksum):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.checksum = checksum
+
+    @property
+    def cli_only(self):
+        """Solo se aplica desde la línea de comandos (reescribe una tabla)"""
+        return self.version in CLI_ONLY_VERSIONS
+
+    def statements(self):
+        """Sentencias de la migración (respeta DELIMITER)"""
+        with open(self.path, encoding="utf-8") as f:
+            return split_sql_script(f.read())
+
+    def __repr__(self):
+        return f"Migration({self.version:04d}_{self.name})"
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """
+    Lista las migraciones de un directorio ordenadas por versión
+
+    Returns:
+        list: Objetos Migration
+
+    Raises:
+        MigrationError: Si hay dos archivos con la misma versión
+    """
+    migrations = {}
+    if not os.path.isdir(directory):
+        return []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILE_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(
+                f"Versión de migración duplicada {version:04d}: {migrations[version].path} y {filename}")
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations[version] = Migration(version, match.group(2), path, checksum)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+class MigrationRunner:
+    """
+    Aplica las migraciones pendientes sobre la base de datos configurada
+
+    Args:
+        config (dict, optional): Configuración de conexión (por defecto get_db_config())
+        directory (str, optional): Directorio de migraciones
+        lock_timeout (int): Segundos de espera si otro proceso está migrando
+    """
+
+    def __init__(self, config=None, directory=MIGRATIONS_DIR, lock_timeout=60):
+        self.config = dict(config or get_db_config())
+        self.directory = directory
+        self.lock_timeout = lock_timeout
+
+    def _pool(self):
+        return ConnectionPoolManager({**self.config, "autocommit": True}, min_size=0, max_size=1,
+                                     name="migrations_pool")
+
+    @staticmethod
+    def _applied(cursor):
+        """Versiones registradas en schema_version: {versión: (nombre, checksum, fecha)}"""
+        cursor.execute(SCHEMA_VERSION_DDL)
+        cursor.execute("SELECT version, nombre, checksum, aplicada_en FROM schema_version ORDER BY version")
+        return {version: (name, checksum, applied_at) for version, name, checksum, applied_at in cursor.fetchall()}
+
+    def status(self):
+        """
+        Estado de cada migración conocida o registrada
+
+        Returns:
+            list: Diccionarios con version, nombre, estado ('aplicada',
+                'pendiente', 'modificada' o 'desconocida'), fecha de aplicación
+                y solo_cli
+        """
+        migrations = {m.version: m for m in discover_migrations(self.directory)}
+        pool = self._pool()
+        try:
+            connection = pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    applied = self._applied(cursor)
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
+        finally:
+            pool.close_all()
+
+        result = []
+        for version in sorted(set(migrations) | set(applied)):
+            migration = migrations.get(version)
+            if version not in applied:
+                state, applied_at = "pendiente", None
+            elif migration is None:
+                state, applied_at = "desconocida", applied[version][2]
+            elif migration.checksum != applied[version][1]:
+                state, applied_at = "modificada", applied[version][2]
+            else:
+                state, applied_at = "aplicada", applied[version][2]
+            name = migration.name if migration else applied[version][0]
+            result.append({"version": version, "nombre": name, "estado": state, "aplicada_en": applied_at,
+                           "solo_cli": bool(migration and migration.cli_only)})
+        return result
+
+    def up(self, target=None, progress_callback=None, include_cli_only=True):
+        """
+        Aplica en orden las migraciones pendientes hasta `target` (incluida)
+
+        Args:
+            target (int, optional): Última versión a aplicar; por defecto todas
+            progress_callback (callable, optional): Recibe (migración, duración) tras cada una
+            include_cli_only (bool): Con False se detiene antes de la primera
+                migración pendiente de CLI_ONLY_VERSIONS (arranque de la interfaz)
+
+        Returns:
+            list: Migraciones aplicadas
+
+        Raises:
+            MigrationError: Si no se obtiene el bloqueo o falla una sentencia
+        """
+        migrations = discover_migrations(self.directory)
+        pool = self._pool()
+        applied_now = []
+        try:
+            connection = pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, self.lock_timeout))
+                    if cursor.fetchall()[0][0] != 1:
+                        raise MigrationError(
+                            f"Otro proceso está aplicando migraciones (esperados {self.lock_timeout}s)")
+                    try:
+                        # Se relee con el bloqueo tomado: otro proceso pudo migrar mientras tanto
+                        applied = self._applied(cursor)
+                        for migration in migrations:
+                            if migration.version in applied:
+                                if applied[migration.version][1] != migration.checksum:
+                                    logger.warning(
+                                        f"⚠️ La migración {migration.version:04d}_{migration.name} "
+                                        f"cambió después de aplicarse")
+                                continue
+                            if target is not None and migration.version > target:
+                                break
+                            if migration.cli_only and not include_cli_only:
+                                logger.warning(
+                                    f"⚠️ La migración {migration.version:04d}_{migration.name} reescribe "
+                                    f"una tabla completa; aplicarla con: python -m src.migrations up")
+                                break
+                            elapsed = self._apply(cursor, migration)
+                            applied_now.append(migration)
+                            if progress_callback:
+                                progress_callback(migration, elapsed)
+                    finally:
+                        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                        cursor.fetchall()
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
+        finally:
+            pool.close_all()
+
+        if applied_now:
+            logger.info(f"✅ Migraciones aplicadas: {', '.join(f'{m.version:04d}' for m in applied_now)}")
+        return applied_now
+
+    @staticmethod
+    def _apply(cursor, migration):
+        """Ejecuta una migración y la registra en schema_version"""
+        start = time.perf_counter()
+        for number, statement in enumerate(migration.statements(), 1):
+            try:
+                cursor.execute(statement)
+                if cursor.with_rows:
+                    cursor.fetchall()
+            except Error as e:
+                logger.error(f"❌ Error en la migración {migration.version:04d}_{migration.name}, "
+                             f"sentencia {number}: {e}")
+                raise MigrationError(
+                    f"La migración {migration.version:04d}_{migration.name} falló en la sentencia "
+                    f"{number}: {e}") from e
+        elapsed = time.perf_counter() - start
+        cursor.execute(
+            "INSERT INTO schema_version (version, nombre, checksum, duracion_ms) VALUES (%s, %s, %s, %s)",
+            (migration.version, migration.name, migration.checksum, int(elapsed * 1000)))
+        logger.info(f"✅ Migración {migration.version:04d}_{migration.name} aplicada en {elapsed:.2f}s")
+        return elapsed
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de la base de datos de inventario")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    up = commands.add_parser("up", help="Aplicar las migraciones pendientes")
+    up.add_argument("--target", type=int, default=None, help="Última versión a aplicar")
+    up.add_argument("--dir", default=MIGRATIONS_DIR, help="Directorio de migraciones")
+
+    status = commands.add_parser("status", help="Mostrar el estado de las migraciones")
+    status.add_argument("--dir", default=MIGRATIONS_DIR, help="Directorio de migraciones")
+    args = parser.parse_args(argv)
+
+    runner = MigrationRunner(directory=args.dir)
+    if args.command == "status":
+        for item in runner.status():
+            applied_at = item["aplicada_en"].strftime("%d/%m/%Y %H:%M") if item["aplicada_en"] else ""
+            cli_only = "solo CLI" if item["solo_cli"] else ""
+            print(f"{item['version']:04d}  {item['nombre']:<40} {item['estado']:<12} {applied_at:<17} {cli_only}")
+        return 0
+
+    def progress(migration, elapsed):
+        print(f"✅ {migration.version:04d}_{migration.name} ({elapsed:.2f}s)")
+
+    applied = runner.up(args.target, progress)
+    if not applied:
+        print("✅ El esquema ya está al día")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
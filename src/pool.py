@@ -0,0 +1,557 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+
+logger = logging.getLogger('ConnectionPool')
+
+
+def percentile(values, q):
+    """
+    Percentil de una muestra ya ordenada, interpolando linealmente entre
+    los dos valores vecinos (como QueryInstrumentation dentro de cada cubeta)
+
+    Args:
+        values (list): Valores en orden ascendente
+        q (float): Percentil entre 0 y 1
+
+    Returns:
+        float: Percentil estimado, o 0.0 si la muestra está vacía
+    """
+    if not values:
+        return 0.0
+    position = q * (len(values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class PoolExhaustedError(ConnectionError):
+    """No se obtuvo una conexión del pool dentro del tiempo de espera"""
+
+
+class PooledConnection:
+    """
+    Conexión prestada por ConnectionPoolManager
+
+    Delega todo en la conexión física; close() la devuelve al pool en lugar de
+    cerrarla. Puede llamarse varias veces sin efecto adicional.
+    """
+
+    def __init__(self, pool, cnx):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_cnx", cnx)
+
+    def close(self):
+        """Devuelve la conexión al pool"""
+        cnx = self._cnx
+        if cnx is not None:
+            object.__setattr__(self, "_cnx", None)
+            self._pool.release(cnx)
+
+    def is_connected(self):
+        """Indica si la conexión sigue prestada y activa"""
+        return self._cnx is not None and self._cnx.is_connected()
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise ConnectionError("La conexión ya fue devuelta al pool")
+        return getattr(self._cnx, name)
+
+    def __setattr__(self, name, value):
+        if self._cnx is None:
+            raise ConnectionError("La conexión ya fue devuelta al pool")
+        setattr(self._cnx, name, value)
+
+
+class ConnectionPoolManager:
+    """
+    Pool de conexiones con tamaño mínimo/máximo, espera acotada y métricas
+
+    - get_connection() espera hasta `timeout` segundos si el pool está lleno en
+      lugar de fallar inmediatamente.
+    - Las conexiones que superan `max_lifetime` se reciclan y las que llevan más
+      de `ping_after` segundos sin usarse se verifican con ping antes de
+      prestarse (pre-ping).
+    - Las conexiones libres más de `max_idle_time` se cierran mientras el pool
+      tenga más de `min_size` conexiones.
+    - get_metrics() expone tiempos de espera, utilización y eventos de
+      agotamiento para dimensionar el pool con datos.
+    - Con warm=False no se abre ninguna conexión al crearlo; warm_up_async()
+      las abre en segundo plano para no retrasar el arranque.
+    """
+
+    # Número de tiempos de espera recientes usados para calcular percentiles
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, config, min_size=1, max_size=5, timeout=10.0, max_lifetime=1800.0,
+                 max_idle_time=300.0, ping_after=30.0, reset_session=True, name="inventory_pool",
+                 warm=True):
+        self.config = config
+        self.name = name
+        self.max_size = max(1, int(max_size))
+        self.min_size = min(max(0, int(min_size)), self.max_size)
+        self.timeout = float(timeout)
+        self.max_lifetime = float(max_lifetime)
+        self.max_idle_time = float(max_idle_time)
+        self.ping_after = float(ping_after)
+        self.reset_session = reset_session
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexión, creada_en, último_uso)
+        self._created_at = {}
+        self._total = 0
+        self._in_use = 0
+        self._closed = False
+        self._last_trim = time.monotonic()
+
+        self._wait_times = deque(maxlen=self.WAIT_SAMPLES)
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "exhaustion_events": 0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "recycled": 0,
+            "stale_discarded": 0,
+            "trimmed": 0,
+            "peak_in_use": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0
+        }
+
+        if warm:
+            self.warm_up()
+
+    def _connect(self):
+        """Abre una conexión física nueva"""
+        cnx = mysql.connector.connect(**self.config)
+        with self._cond:
+            self._created_at[id(cnx)] = time.monotonic()
+            self._metrics["created"] += 1
+        return cnx
+
+    def _discard(self, cnx):
+        """Cierra una conexión física y libera su lugar en el pool"""
+        try:
+            cnx.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created_at.pop(id(cnx), None)
+            self._total -= 1
+            self._metrics["closed"] += 1
+            self._cond.notify()
+
+    def warm_up(self):
+        """Abre conexiones hasta alcanzar min_size"""
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.min_size:
+                    return
+                self._total += 1
+            try:
+                cnx = self._connect()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                raise
+            with self._cond:
+                now = time.monotonic()
+                self._idle.append((cnx, now, now))
+                self._cond.notify()
+
+    def warm_up_async(self):
+        """Abre las conexiones mínimas en un hilo aparte"""
+        def run():
+            try:
+                self.warm_up()
+                logger.info(f"✅ Pool {self.name} precalentado ({self._total} conexiones)")
+            except Exception as e:
+                # La primera consulta volverá a intentarlo e informará del error
+                logger.warning(f"⚠️ No se pudo precalentar el pool {self.name}: {e}")
+
+        thread = threading.Thread(target=run, name=f"{self.name}-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def get_connection(self, timeout=None):
+        """
+        Presta una conexión del pool
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera si el pool está lleno
+
+        Returns:
+            PooledConnection: Conexión que vuelve al pool al llamar close()
+
+        Raises:
+            PoolExhaustedError: Si no se liberó ninguna conexión a tiempo
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        entry = None
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ConnectionError("El pool de conexiones está cerrado")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    break
+                if not waited:
+                    waited = True
+                    self._metrics["exhaustion_events"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    logger.warning(
+                        f"⚠️ Pool agotado: {self._in_use}/{self.max_size} conexiones en uso tras {timeout:.1f}s de espera")
+                    raise PoolExhaustedError(
+                        f"No hay conexiones libres en el pool tras esperar {timeout:.1f}s")
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        validated = False
+        try:
+            cnx = self._validate(entry) if entry else None
+            validated = True
+            if cnx is None:
+                cnx = self._connect()
+        except Exception:
+            # Si _validate terminó, ya cerró y contó la conexión descartada
+            if entry is not None and not validated:
+                self._close_reserved(entry[0])
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        wait_time = time.monotonic() - start
+        with self._cond:
+            self._metrics["checkouts"] += 1
+            if waited:
+                self._metrics["waits"] += 1
+            self._metrics["total_wait"] += wait_time
+            self._metrics["max_wait"] = max(self._metrics["max_wait"], wait_time)
+            self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], self._in_use)
+            self._wait_times.append(wait_time)
+
+        self._maybe_trim()
+        return PooledConnection(self, cnx)
+
+    def _validate(self, entry):
+        """
+        Revisa una conexión libre antes de prestarla
+
+        Returns:
+            conexión | None: La conexión si sigue siendo válida; None si se cerró
+                (la plaza queda reservada para abrir una nueva)
+        """
+        cnx, created, last_used = entry
+        now = time.monotonic()
+
+        if self.max_lifetime and now - created > self.max_lifetime:
+            self._close_reserved(cnx)
+            with self._cond:
+                self._metrics["recycled"] += 1
+            return None
+
+        if self.ping_after >= 0 and now - last_used > self.ping_after:
+            try:
+                cnx.ping(reconnect=False)
+            except Error:
+                self._close_reserved(cnx)
+                with self._cond:
+                    self._metrics["stale_discarded"] += 1
+                logger.info("♻️ Conexión inactiva descartada tras fallar el pre-ping")
+                return None
+        return cnx
+
+    def _close_reserved(self, cnx):
+        """Cierra una conexión cuya plaza se reutilizará inmediatamente"""
+        try:
+            cnx.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created_at.pop(id(cnx), None)
+            self._metrics["closed"] += 1
+
+    def release(self, cnx):
+        """Devuelve una conexión física al pool (la llama PooledConnection.close)"""
+        healthy = not self._closed
+        if healthy:
+            try:
+                if getattr(cnx, "unread_result", False):
+                    cnx.consume_results()
+                if self.reset_session:
+                    cnx.reset_session()
+            except Exception:
+                healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+
+        if not healthy:
+            self._discard(cnx)
+            return
+
+        with self._cond:
+            created = self._created_at.get(id(cnx), time.monotonic())
+            self._idle.append((cnx, created, time.monotonic()))
+            self._cond.notify()
+
+        self._maybe_trim()
+
+    def _maybe_trim(self, interval=5.0):
+        """Recorta conexiones inactivas como mucho una vez cada `interval` segundos"""
+        if time.monotonic() - self._last_trim >= interval:
+            self.trim_idle()
+
+    def trim_idle(self):
+        """Cierra las conexiones libres que superan max_idle_time, respetando min_size"""
+        to_close = []
+        now = time.monotonic()
+        with self._cond:
+            self._last_trim = now
+            # Las más antiguas están al inicio de la cola (uso LIFO)
+            while (self._idle and self._total - len(to_close) > self.min_size
+                   and now - self._idle[0][2] > self.max_idle_time):
+                to_close.append(self._idle.popleft()[0])
+            self._metrics["trimmed"] += len(to_close)
+        for cnx in to_close:
+            self._discard(cnx)
+        if to_close:
+            logger.info(f"✂️ {len(to_close)} conexiones inactivas cerradas")
+
+    def close_all(self):
+        """Cierra las conexiones libres; las prestadas se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle = [entry[0] for entry in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for cnx in idle:
+            self._discard(cnx)
+
+    def get_metrics(self):
+        """
+        Devuelve las métricas del pool
+
+        Returns:
+            dict: Tamaño, conexiones en uso/libres, utilización, tiempos de espera
+                (promedio, p95, máximo en ms) y contadores de eventos
+        """
+        with self._cond:
+            metrics = dict(self._metrics)
+            waits = sorted(self._wait_times)
+            metrics.update({
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._total,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "utilization": self._in_use / self.max_size
+            })
+
+        checkouts = metrics["checkouts"]
+        metrics["avg_wait_ms"] = metrics.pop("total_wait") / checkouts * 1000 if checkouts else 0.0
+        metrics["max_wait_ms"] = metrics.pop("max_wait") * 1000
+        metrics["p95_wait_ms"] = percentile(waits, 0.95) * 1000
+        return metrics
+
+
+class ReplicaRouter:
+    """
+    Decide si una lectura puede ir a la réplica o debe ir al primario
+
+    Las lecturas van al primario cuando:
+    - el hilo actual está dentro de un bloque force_primary();
+    - no han pasado `read_your_writes` segundos desde la última escritura, para
+      que quien acaba de escribir vea sus propios cambios;
+    - el retraso de la réplica (Seconds_Behind_Master, consultado como mucho una
+      vez cada `check_interval` segundos) supera `max_lag` o la replicación está
+      detenida;
+    - la réplica falló recientemente (se reintenta tras `check_interval`).
+
+    Si el usuario de la réplica no tiene permiso para SHOW SLAVE STATUS
+    (REPLICATION CLIENT) es un error de configuración, no una caída: se
+    registra una sola vez y la réplica se sigue usando sin vigilar el retraso.
+    """
+
+    # ER_SPECIFIC_ACCESS_DENIED_ERROR: falta REPLICATION CLIENT (o SUPER)
+    PRIVILEGE_ERRORS = (1227,)
+
+    def __init__(self, pool, read_your_writes=5.0, max_lag=5.0, check_interval=5.0,
+                 acquire_timeout=2.0):
+        self.pool = pool
+        self.read_your_writes = float(read_your_writes)
+        self.max_lag = float(max_lag)
+        self.check_interval = float(check_interval)
+        self.acquire_timeout = float(acquire_timeout)
+
+        self._local = threading.local()
+        self._check_lock = threading.Lock()
+        self._lag_lock = threading.Lock()
+        self._last_write = 0.0
+        self._healthy = True
+        self._lag = None
+        self._checked_at = 0.0
+        self._last_error = None
+        self._lag_unavailable = False
+        self._metrics = {
+            "replica_reads": 0,
+            "primary_reads": 0,
+            "forced_primary": 0,
+            "read_your_writes": 0,
+            "lag_fallbacks": 0,
+            "failures": 0
+        }
+
+    def note_write(self):
+        """Registra una escritura en el primario (abre la ventana de lectura propia)"""
+        self._last_write = time.monotonic()
+
+    @contextmanager
+    def force_primary(self):
+        """Envía al primario todas las lecturas del hilo actual dentro del bloque"""
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+
+    def use_replica(self, use_primary=False):
+        """
+        Indica si la próxima lectura puede ir a la réplica
+
+        Args:
+            use_primary (bool): Forzar el primario para esta lectura
+        """
+        reason = None
+        if use_primary or getattr(self._local, "depth", 0):
+            reason = "forced_primary"
+        elif time.monotonic() - self._last_write < self.read_your_writes:
+            reason = "read_your_writes"
+        elif not self._replica_ok():
+            reason = "lag_fallbacks"
+
+        with self._check_lock:
+            if reason is None:
+                self._metrics["replica_reads"] += 1
+                return True
+            self._metrics[reason] += 1
+            self._metrics["primary_reads"] += 1
+            return False
+
+    def mark_failed(self, error):
+        """Deja de usar la réplica hasta la próxima verificación"""
+        logger.warning(f"⚠️ Réplica no disponible, lecturas redirigidas al primario: {error}")
+        with self._check_lock:
+            self._healthy = False
+            self._checked_at = time.monotonic()
+            self._last_error = str(error)
+            self._metrics["failures"] += 1
+
+    def _replica_ok(self):
+        """Devuelve el último estado conocido de la réplica, revisándolo si caducó"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._healthy
+        # Solo un hilo consulta el retraso; el resto usa el estado anterior
+        if not self._lag_lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            self._check_lag()
+        finally:
+            self._lag_lock.release()
+        return self._healthy
+
+    def _check_lag(self):
+        """Consulta SHOW SLAVE STATUS en la réplica y actualiza su estado"""
+        healthy, lag, error = False, None, None
+        try:
+            connection = self.pool.get_connection(timeout=self.acquire_timeout)
+            try:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    status = None
+                    if not self._lag_unavailable:
+                        status = self._slave_status(cursor)
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
+
+            if self.max_lag < 0 or self._lag_unavailable:
+                healthy = True
+            elif not status:
+                error = "el servidor no está configurado como réplica"
+            else:
+                lag = status.get("Seconds_Behind_Master")
+                if lag is None:
+                    error = "replicación detenida"
+                else:
+                    healthy = lag <= self.max_lag
+                    if not healthy:
+                        error = f"retraso de {lag}s (máximo {self.max_lag:g}s)"
+        except (Error, ConnectionError) as e:
+            error = str(e)
+
+        with self._check_lock:
+            if healthy != self._healthy:
+                if healthy:
+                    logger.info("✅ Réplica disponible de nuevo para lecturas")
+                else:
+                    logger.warning(f"⚠️ Lecturas redirigidas al primario: {error}")
+            self._healthy = healthy
+            self._lag = lag
+            self._last_error = error
+            self._checked_at = time.monotonic()
+
+    def _slave_status(self, cursor):
+        """Fila de SHOW SLAVE STATUS; sin permiso deja de vigilar el retraso"""
+        try:
+            cursor.execute("SHOW SLAVE STATUS")
+        except Error as e:
+            if e.errno not in self.PRIVILEGE_ERRORS:
+                raise
+            self._lag_unavailable = True
+            logger.error(
+                f"❌ Configuración de la réplica: el usuario no puede consultar SHOW SLAVE STATUS ({e}). "
+                f"Conceder REPLICATION CLIENT o definir DB_REPLICA_MAX_LAG=-1; "
+                f"las lecturas seguirán yendo a la réplica sin controlar el retraso")
+            return None
+        status = cursor.fetchone()
+        cursor.fetchall()
+        return status
+
+    def get_status(self):
+        """
+        Devuelve el estado de la réplica y el reparto de lecturas
+
+        Returns:
+            dict: healthy, lag, last_error, contadores de enrutamiento y
+                métricas del pool de la réplica
+        """
+        with self._check_lock:
+            status = dict(self._metrics)
+            status.update({
+                "healthy": self._healthy,
+                "lag": self._lag,
+                "last_error": self._last_error,
+                "lag_unavailable": self._lag_unavailable
+            })
+        status["pool"] = self.pool.get_metrics()
+        return status
@@ -0,0 +1,155 @@
+import logging
+from decimal import Decimal
+from functools import lru_cache
+
+logger = logging.getLogger('ResultFormats')
+
+# Formatos aceptados por DatabaseConnection.fetch_all / fetch_iter
+RESULT_FORMATS = ("dict", "tuple", "row", "numpy", "dataframe")
+
+
+class ResultSet(list):
+    """
+    Lista de tuplas con una única cabecera de columnas compartida
+
+    Evita repetir los nombres de columna en cada fila; se comporta como una
+    lista normal y expone `columns` y `index_of()` para localizar valores.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns, rows=()):
+        super().__init__(rows)
+        self.columns = tuple(columns)
+
+    def index_of(self, column):
+        """Posición de una columna dentro de cada tupla"""
+        return self.columns.index(column)
+
+    def column(self, name):
+        """Devuelve los valores de una columna como lista"""
+        position = self.columns.index(name)
+        return [row[position] for row in self]
+
+
+@lru_cache(maxsize=128)
+def row_class(columns):
+    """
+    Crea (y reutiliza) una clase de fila con __slots__ para unas columnas
+
+    Las instancias ocupan aproximadamente lo mismo que una tupla y permiten
+    acceder por atributo (`fila.nombre`) o, para facilitar la migración desde
+    los diccionarios, por clave (`fila['nombre']`).
+
+    Args:
+        columns (tuple): Nombres de columna; deben ser identificadores válidos
+    """
+    invalid = [column for column in columns if not column.isidentifier()]
+    if invalid:
+        raise ValueError(f"Columnas no válidas para filas con atributos: {invalid} (usar alias AS)")
+
+    def __init__(self, values):
+        for column, value in zip(columns, values):
+            setattr(self, column, value)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return getattr(self, columns[key])
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return (getattr(self, column) for column in columns)
+
+    def __len__(self):
+        return len(columns)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        values = ", ".join(f"{column}={getattr(self, column)!r}" for column in columns)
+        return f"Row({values})"
+
+    def as_dict(self):
+        return dict(zip(columns, self))
+
+    return type("Row", (), {
+        "__slots__": columns,
+        "__init__": __init__,
+        "__getitem__": __getitem__,
+        "__iter__": __iter__,
+        "__len__": __len__,
+        "__eq__": __eq__,
+        "__hash__": None,
+        "__repr__": __repr__,
+        "keys": lambda self: columns,
+        "as_dict": as_dict
+    })
+
+
+def to_columns(columns, rows):
+    """
+    Convierte filas en tuplas a un diccionario columna -> array de NumPy
+
+    Las columnas numéricas (incluidas las DECIMAL) quedan como float64 o int64;
+    el resto como arrays de objetos para no copiar las cadenas.
+    """
+    import numpy as np
+
+    data = {}
+    values_by_column = list(zip(*rows)) if rows else [()] * len(columns)
+    for name, values in zip(columns, values_by_column):
+        kinds = {type(value) for value in values if value is not None}
+        has_nulls = len(values) != sum(1 for value in values if value is not None)
+        if kinds and kinds <= {int, bool} and not has_nulls:
+            data[name] = np.fromiter(values, dtype=np.int64, count=len(values))
+        elif kinds and kinds <= {int, float, Decimal}:
+            data[name] = np.fromiter((np.nan if value is None else float(value) for value in values),
+                                     dtype=np.float64, count=len(values))
+        else:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            data[name] = array
+    return data
+
+
+def to_dataframe(columns, rows):
+    """Construye un DataFrame directamente desde las filas en tuplas"""
+    import pandas as pd
+
+    return pd.DataFrame.from_records(rows, columns=list(columns), coerce_float=True)
+
+
+def convert_rows(columns, rows, result_format):
+    """
+    Convierte filas en tuplas al formato de resultado pedido
+
+    Args:
+        columns (tuple): Nombres de columna del cursor
+        rows (list): Filas en tuplas
+        result_format (str): 'tuple', 'row', 'numpy' o 'dataframe'
+
+    Returns:
+        ResultSet | list | dict | DataFrame: Resultados en el formato indicado
+    """
+    if result_format == "tuple":
+        return rows if isinstance(rows, ResultSet) else ResultSet(columns, rows)
+    if result_format == "row":
+        cls = row_class(tuple(columns))
+        return [cls(row) for row in rows]
+    if result_format == "numpy":
+        return to_columns(columns, rows)
+    if result_format == "dataframe":
+        return to_dataframe(columns, rows)
+    raise ValueError(f"Formato de resultado no soportado: {result_format!r} (use {', '.join(RESULT_FORMATS)})")
+
+
+def check_result_format(result_format):
+    """Valida el formato de resultado antes de lanzar la consulta"""
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Formato de resultado no soportado: {result_format!r} (use {', '.join(RESULT_FORMATS)})")
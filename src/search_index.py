@@ -0,0 +1,225 @@
+"""
+Índice de búsqueda en memoria del catálogo de productos
+
+ProductSearchIndex indexa el nombre y el tipo de cada producto, normalizados
+sin acentos, por subcadenas de hasta tres caracteres (trigramas), y tiene una
+búsqueda difusa para errores de tecleo. La pestaña de stock de la interfaz
+lo alimenta con cada carga de la tabla (sync) y, una vez listo, filtra al
+teclear sin consultar la base de datos. Mientras no está listo, la búsqueda
+usa LIKE en el servidor.
+"""
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+
+def normalize_text(text):
+    """
+    Normaliza un texto para búsqueda: minúsculas, sin acentos ni diéresis
+
+    La ñ también se reduce a n para que 'canon' encuentre 'Cañón' desde
+    teclados sin ñ; como la búsqueda se normaliza igual, 'cañón' sigue
+    encontrándolo.
+    """
+    text = unicodedata.normalize("NFD", str(text or "").lower())
+    text = "".join(char for char in text if unicodedata.category(char) != "Mn")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _substrings(text, max_len=3):
+    """Todas las subcadenas de 1 a max_len caracteres de un texto"""
+    grams = set()
+    for size in range(1, max_len + 1):
+        for start in range(len(text) - size + 1):
+            grams.add(text[start:start + size])
+    return grams
+
+
+def _word_trigrams(text):
+    """Trigramas por palabra con relleno, al estilo de pg_trgm, para búsqueda difusa"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for start in range(len(padded) - 2):
+            grams.add(padded[start:start + 3])
+    return grams
+
+
+class ProductSearchIndex:
+    """
+    Índice en memoria del catálogo para la búsqueda de la pestaña de stock
+
+    Indexa nombre y tipo normalizados con todas sus subcadenas de hasta tres
+    caracteres: una búsqueda corta se resuelve con una sola consulta al
+    diccionario y una larga intersecando los trigramas y verificando la
+    subcadena en los pocos candidatos. Cada palabra de la búsqueda debe
+    aparecer (AND). Si no hay coincidencias exactas se usa una búsqueda difusa
+    por similitud de trigramas ('tonr' encuentra 'Toner').
+
+    Las filas guardadas son las de la tabla de stock; sync() las reemplaza y
+    solo reindexa los productos cuyo nombre o tipo cambió, por lo que los
+    cambios de stock no tienen coste de indexación.
+
+    Args:
+        fields (tuple): Campos de cada fila que se indexan
+        key (str): Campo identificador de la fila
+        fuzzy_threshold (float): Fracción mínima de trigramas compartidos
+    """
+
+    def __init__(self, fields=("nombre", "tipo"), key="id_producto", fuzzy_threshold=0.45):
+        self.fields = tuple(fields)
+        self.key = key
+        self.fuzzy_threshold = fuzzy_threshold
+        self._rows = {}
+        self._positions = {}
+        self._next_position = 0
+        self._texts = {}
+        self._grams = defaultdict(set)
+        self._fuzzy_grams = defaultdict(set)
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _text_for(self, row):
+        return normalize_text(" ".join(str(row.get(field) or "") for field in self.fields))
+
+    def _index(self, key, text):
+        for gram in _substrings(text):
+            self._grams[gram].add(key)
+        for gram in _word_trigrams(text):
+            self._fuzzy_grams[gram].add(key)
+        self._texts[key] = text
+
+    def _unindex(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for postings, grams in ((self._grams, _substrings(text)), (self._fuzzy_grams, _word_trigrams(text))):
+            for gram in grams:
+                keys = postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del postings[gram]
+
+    def upsert(self, row):
+        """Añade o actualiza una fila; solo reindexa si cambió el texto indexado"""
+        key = row[self.key]
+        text = self._text_for(row)
+        with self._lock:
+            if self._texts.get(key) != text:
+                self._unindex(key)
+                self._index(key, text)
+            if key not in self._positions:
+                self._positions[key] = self._next_position
+                self._next_position += 1
+            self._rows[key] = row
+
+    def remove(self, key):
+        """Elimina una fila del índice"""
+        with self._lock:
+            self._unindex(key)
+            self._rows.pop(key, None)
+            self._positions.pop(key, None)
+
+    def sync(self, rows):
+        """
+        Sustituye el contenido por `rows` conservando su orden
+
+        Los productos nuevos o renombrados se indexan, los que ya no están se
+        eliminan y el resto solo actualiza sus datos (cantidad, estado...).
+        """
+        with self._lock:
+            incoming = {row[self.key] for row in rows}
+            for key in [key for key in self._rows if key not in incoming]:
+                self.remove(key)
+            # Reinsertar en el orden recibido (el de la tabla de stock)
+            self._rows = {}
+            self._positions = {}
+            for position, row in enumerate(rows):
+                key = row[self.key]
+                text = self._text_for(row)
+                if self._texts.get(key) != text:
+                    self._unindex(key)
+                    self._index(key, text)
+                self._rows[key] = row
+                self._positions[key] = position
+            self._next_position = len(rows)
+            self.ready = True
+
+    def update_fields(self, key, **fields):
+        """Actualiza campos no indexados de una fila (por ejemplo la cantidad)"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return False
+            if any(field in self.fields for field in fields):
+                self.upsert({**row, **fields})
+            else:
+                row.update(fields)
+            return True
+
+    def _substring_matches(self, term):
+        """Claves cuyo texto contiene `term`"""
+        if len(term) <= 3:
+            return set(self._grams.get(term, ()))
+        grams = sorted((self._grams.get(term[i:i + 3], set()) for i in range(len(term) - 2)), key=len)
+        if not grams[0]:
+            return set()
+        candidates = set(grams[0])
+        for keys in grams[1:]:
+            candidates &= keys
+            if not candidates:
+                return candidates
+        return {key for key in candidates if term in self._texts[key]}
+
+    def _fuzzy_matches(self, query):
+        """Claves ordenadas por similitud de trigramas con la búsqueda"""
+        query_grams = _word_trigrams(query)
+        if not query_grams:
+            return []
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for key in self._fuzzy_grams.get(gram, ()):
+                shared[key] += 1
+        scored = [(count / len(query_grams), key) for key, count in shared.items()
+                  if count / len(query_grams) >= self.fuzzy_threshold]
+        scored.sort(key=lambda item: -item[0])
+        return [key for _, key in scored]
+
+    def search(self, query, limit=None, fuzzy=True):
+        """
+        Busca productos cuyo nombre o tipo contenga todas las palabras de `query`
+
+        Args:
+            query (str): Texto buscado (sin distinguir mayúsculas ni acentos)
+            limit (int, optional): Máximo de filas devueltas
+            fuzzy (bool): Recurrir a la búsqueda difusa si no hay coincidencias exactas
+
+        Returns:
+            list: Filas coincidentes; las exactas en el orden de la tabla y las
+                difusas de más a menos parecida
+        """
+        query = normalize_text(query)
+        with self._lock:
+            if not query:
+                rows = list(self._rows.values())
+                return rows[:limit] if limit else rows
+
+            matches = None
+            for term in query.split():
+                keys = self._substring_matches(term)
+                matches = keys if matches is None else matches & keys
+                if not matches:
+                    break
+
+            if matches:
+                rows = [self._rows[key] for key in sorted(matches, key=self._positions.__getitem__)]
+            elif fuzzy:
+                rows = [self._rows[key] for key in self._fuzzy_matches(query) if key in self._rows]
+            else:
+                rows = []
+        return rows[:limit] if limit else rows
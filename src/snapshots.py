@@ -0,0 +1,229 @@
+"""
+Fotografías periódicas del stock e inventario a una fecha
+
+La tabla snapshots_stock (migración 0007) guarda la cantidad y el precio de
+cada producto en un instante. El inventario a una fecha parte de la
+fotografía más cercana y aplica solo los movimientos fechados entre ambas, por
+lo que el coste no depende de los años de historial:
+
+    python -m src.snapshots take
+    python -m src.snapshots maybe
+    python -m src.snapshots at --fecha 2024-12-31
+
+Las fotografías se toman cada DB_SNAPSHOT_HOURS horas (24 por defecto) o cada
+DB_SNAPSHOT_MOVEMENTS movimientos (0 = desactivado) con maybe_take(), que la
+aplicación llama al iniciar y tras registrar movimientos; para instalaciones
+sin interfaz basta con programar "maybe" en cron.
+
+Un movimiento con fecha anterior a fotografías ya tomadas se suma a todas
+ellas (trigger de la migración 0007): importar N movimientos atrasados de un
+producto con K fotografías posteriores cuesta N × K actualizaciones. Las
+importaciones grandes de historial conviene hacerlas antes de empezar a
+fotografiar, o vaciar snapshots_stock, importar y tomar una fotografía nueva.
+"""
+import argparse
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from src.archive import movement_source
+from src.database import DatabaseConnection
+
+logger = logging.getLogger('Snapshots')
+
+
+def _as_instant(fecha):
+    """Una fecha sin hora se interpreta como el cierre de ese día"""
+    if isinstance(fecha, datetime):
+        return fecha
+    return datetime.combine(fecha, datetime.max.time().replace(microsecond=0))
+
+
+class StockSnapshots:
+    """
+    Fotografías del stock y consultas de inventario histórico
+
+    Args:
+        db (DatabaseConnection, optional): Conexión a usar (por defecto el singleton)
+        interval_hours (float, optional): Horas entre fotografías (DB_SNAPSHOT_HOURS)
+        every_movements (int, optional): Movimientos entre fotografías (DB_SNAPSHOT_MOVEMENTS)
+    """
+
+    def __init__(self, db=None, interval_hours=None, every_movements=None):
+        self.db = db or DatabaseConnection()
+        self.interval_hours = (float(os.getenv('DB_SNAPSHOT_HOURS', '24'))
+                               if interval_hours is None else interval_hours)
+        self.every_movements = (int(os.getenv('DB_SNAPSHOT_MOVEMENTS', '0'))
+                                if every_movements is None else every_movements)
+
+    def take(self):
+        """
+        Fotografía el stock actual
+
+        La transacción bloquea en modo compartido las filas de stock (con un
+        COUNT(*) que no trae las filas al cliente): los movimientos que llegan
+        mientras tanto esperan y, al continuar, el trigger de la migración 0007
+        los suma a esta fotografía si su fecha no es posterior.
+
+        Returns:
+            datetime: Instante de la fotografía o None si ya había una en ese segundo
+        """
+        with self.db.transaction(isolation_level="READ COMMITTED") as tx:
+            fecha = tx.fetch_one("SELECT NOW() AS ahora")["ahora"]
+            if tx.fetch_one("SELECT 1 AS existe FROM snapshots_stock WHERE fecha = %s LIMIT 1", (fecha,)):
+                return None
+            tx.fetch_one("SELECT COUNT(*) AS total FROM stock LOCK IN SHARE MODE")
+            written = tx.execute("""
+                INSERT INTO snapshots_stock (fecha, producto_id, cantidad, precio_unitario)
+                SELECT %s, s.producto_id, s.cantidad, COALESCE(p.precio_unitario, 0)
+                FROM stock s
+                JOIN productos p ON s.producto_id = p.id_producto
+                """, (fecha,))
+        logger.info(f"📸 Fotografía del stock tomada ({written} productos, {fecha:%d/%m/%Y %H:%M:%S})")
+        return fecha
+
+    def is_due(self):
+        """Indica si toca fotografiar por tiempo o por número de movimientos"""
+        if not self.db.has_table("snapshots_stock"):
+            # Sin la migración 0007 no hay dónde guardar la fotografía
+            return False
+        result = self.db.fetch_one("SELECT MAX(fecha) AS ultima FROM snapshots_stock", use_cache=False)
+        if result is None:
+            return False
+        last = result["ultima"]
+        if last is None or datetime.now() - last >= timedelta(hours=self.interval_hours):
+            return True
+        if self.every_movements > 0:
+            # El LIMIT acota el conteo a lo necesario para decidir
+            pending = self.db.fetch_one(
+                "SELECT COUNT(*) AS total FROM "
+                "(SELECT 1 FROM movimientos WHERE fecha > %s LIMIT %s) recientes",
+                (last, self.every_movements), use_cache=False)
+            return bool(pending) and pending["total"] >= self.every_movements
+        return False
+
+    def maybe_take(self):
+        """
+        Toma una fotografía si corresponde según la programación
+
+        Returns:
+            datetime: Instante de la fotografía tomada o None
+        """
+        if not self.is_due():
+            return None
+        return self.take()
+
+    def _rows(self, base, base_params, start, end, sign, instant, only_ids=None):
+        """
+        Inventario desde una base (fotografía o stock actual) más/menos los
+        movimientos fechados en (start, end]
+        """
+        op = "+" if sign > 0 else "-"
+        delta_conditions, delta_params = ["fecha > %s"], [start]
+        if end is not None:
+            delta_conditions.append("fecha <= %s")
+            delta_params.append(end)
+        filters, filter_params = ["(p.fecha_registro IS NULL OR p.fecha_registro <= %s)"], [instant]
+        if only_ids is not None:
+            filters.append(f"p.id_producto IN ({', '.join(['%s'] * len(only_ids))})")
+            filter_params.extend(only_ids)
+        query = f"""
+        SELECT p.id_producto, p.nombre, p.tipo,
+               b.cantidad {op} COALESCE(d.delta, 0) AS cantidad,
+               b.precio_unitario,
+               (b.cantidad {op} COALESCE(d.delta, 0)) * b.precio_unitario AS valor
+        FROM ({base}) b
+        JOIN productos p ON p.id_producto = b.producto_id
+        LEFT JOIN (
+            SELECT producto_id, SUM(IF(tipo = 'entrada', cantidad, -cantidad)) AS delta
+            FROM {movement_source(self.db, start)}
+            WHERE {" AND ".join(delta_conditions)}
+            GROUP BY producto_id
+        ) d ON d.producto_id = b.producto_id
+        WHERE {" AND ".join(filters)}
+        ORDER BY p.nombre
+        """
+        return self.db.fetch_all(query, tuple(base_params) + tuple(delta_params) + tuple(filter_params))
+
+    def stock_at(self, fecha):
+        """
+        Inventario y valoración en una fecha pasada
+
+        Usa la última fotografía anterior y suma los movimientos posteriores
+        hasta la fecha; si no hay ninguna anterior parte de la siguiente (o
+        del stock actual) y resta los movimientos intermedios. Los productos
+        dados de alta después de la fotografía se calculan desde el stock
+        actual.
+
+        Args:
+            fecha (date | datetime): Fecha consultada (una fecha sin hora es el cierre del día)
+
+        Returns:
+            list: Diccionarios con id_producto, nombre, tipo, cantidad,
+                precio_unitario y valor, ordenados por nombre
+        """
+        instant = _as_instant(fecha)
+        current_only = not self.db.has_table("snapshots_stock")
+        snapshot_base = "SELECT producto_id, cantidad, precio_unitario FROM snapshots_stock WHERE fecha = %s"
+        current_base = ("SELECT s.producto_id, s.cantidad, COALESCE(pr.precio_unitario, 0) AS precio_unitario "
+                        "FROM stock s JOIN productos pr ON pr.id_producto = s.producto_id")
+
+        if current_only:
+            # Sin la migración 0007 se parte del stock actual
+            return self._rows(current_base, (), instant, None, -1, instant)
+
+        previous = self.db.fetch_one(
+            "SELECT MAX(fecha) AS fecha FROM snapshots_stock WHERE fecha <= %s", (instant,))
+        if previous and previous["fecha"] is not None:
+            rows = self._rows(snapshot_base, (previous["fecha"],), previous["fecha"], instant, 1, instant)
+            # Altas posteriores a la fotografía con fecha de registro anterior a la consultada
+            missing = self.db.fetch_all(
+                "SELECT id_producto FROM productos WHERE fecha_registro > %s AND fecha_registro <= %s",
+                (previous["fecha"], instant))
+            known = {row["id_producto"] for row in rows}
+            missing = [row["id_producto"] for row in missing if row["id_producto"] not in known]
+            if missing:
+                rows = sorted(list(rows) + list(self._rows(current_base, (), instant, None, -1, instant, missing)),
+                              key=lambda row: row["nombre"])
+            return rows
+
+        following = self.db.fetch_one(
+            "SELECT MIN(fecha) AS fecha FROM snapshots_stock WHERE fecha > %s", (instant,))
+        if following and following["fecha"] is not None:
+            return self._rows(snapshot_base, (following["fecha"],), instant, following["fecha"], -1, instant)
+        return self._rows(current_base, (), instant, None, -1, instant)
+
+
+def _parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Fotografías del stock e inventario a fecha")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("take", help="Fotografiar el stock ahora")
+    commands.add_parser("maybe", help="Fotografiar si corresponde (para cron)")
+    at = commands.add_parser("at", help="Inventario a una fecha")
+    at.add_argument("--fecha", type=_parse_date, default=date.today(), help="Fecha (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+
+    snapshots = StockSnapshots()
+    if args.command == "take":
+        fecha = snapshots.take()
+        print(f"📸 Fotografía tomada: {fecha:%d/%m/%Y %H:%M:%S}" if fecha else "✅ Ya había una fotografía en este segundo")
+        return 0
+    if args.command == "maybe":
+        fecha = snapshots.maybe_take()
+        print(f"📸 Fotografía tomada: {fecha:%d/%m/%Y %H:%M:%S}" if fecha else "✅ No corresponde fotografiar todavía")
+        return 0
+
+    rows = snapshots.stock_at(args.fecha)
+    for row in rows:
+        print(f"{row['nombre']:<40} {row['cantidad']:>10,}  ${row['valor']:>14,.2f}")
+    print(f"💰 Valor del inventario al {args.fecha:%d/%m/%Y}: ${sum(row['valor'] for row in rows):,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+"""
+Resumen diario de movimientos (tabla consumo_diario)
+
+La tabla la mantienen los triggers de movimientos (migración 0004), por lo
+que el reporte de consumo agrega un registro por producto y día del rango
+pedido en lugar de recorrer todo el historial. Este módulo sirve el reporte
+y ofrece la reconstrucción y la verificación de la tabla:
+
+    python -m src.summaries report --desde 2025-01-01 --hasta 2025-01-31
+    python -m src.summaries check
+    python -m src.summaries rebuild --desde 2025-01-01
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from src.archive import movement_source
+from src.database import DatabaseConnection
+
+logger = logging.getLogger('Summaries')
+
+
+def _range_filter(column, desde, hasta):
+    """Condición SQL y parámetros para un rango de fechas inclusivo"""
+    conditions, params = [], []
+    if desde is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(desde)
+    if hasta is not None:
+        conditions.append(f"{column} <= %s")
+        params.append(hasta)
+    return conditions, params
+
+
+class ConsumptionSummary:
+    """
+    Consultas sobre el resumen diario de movimientos
+
+    Args:
+        db (DatabaseConnection, optional): Conexión a usar (por defecto el singleton)
+    """
+
+    def __init__(self, db=None):
+        self.db = db or DatabaseConnection()
+
+    def report(self, desde=None, hasta=None, tipo="salida", limit=10):
+        """
+        Productos con más unidades movidas en un rango de días
+
+        Args:
+            desde (date, optional): Primer día incluido
+            hasta (date, optional): Último día incluido
+            tipo (str): 'salida' (consumo) o 'entrada'
+            limit (int, optional): Máximo de productos (None para todos)
+
+        Returns:
+            list: Diccionarios con nombre, tipo, total_consumido,
+                num_movimientos y promedio_por_mov
+        """
+        conditions, params = _range_filter("c.dia", desde, hasta)
+        query = f"""
+        SELECT p.nombre, p.tipo, SUM(c.total_cantidad) AS total_consumido,
+               SUM(c.num_movimientos) AS num_movimientos,
+               SUM(c.total_cantidad) / SUM(c.num_movimientos) AS promedio_por_mov
+        FROM consumo_diario c
+        JOIN productos p ON c.producto_id = p.id_producto
+        WHERE {" AND ".join(["c.tipo = %s"] + conditions)}
+        GROUP BY c.producto_id, p.nombre, p.tipo
+        ORDER BY total_consumido DESC
+        """
+        params = [tipo] + params
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+        return self.db.fetch_all(query, tuple(params))
+
+    def _aggregate_query(self, desde, hasta):
+        """
+        Agregado por producto, día y tipo calculado desde movimientos
+
+        Si el rango llega a los movimientos archivados se lee la vista
+        movimientos_historico: archivar no modifica consumo_diario.
+        """
+        conditions, params = _range_filter("fecha", desde, _end_of_day(hasta))
+        where = " AND ".join(["fecha IS NOT NULL"] + conditions)
+        query = f"""
+        SELECT producto_id, DATE(fecha) AS dia, tipo,
+               SUM(cantidad) AS total_cantidad, COUNT(*) AS num_movimientos
+        FROM {movement_source(self.db, desde)}
+        WHERE {where}
+        GROUP BY producto_id, DATE(fecha), tipo
+        """
+        return query, params
+
+    def rebuild(self, desde=None, hasta=None):
+        """
+        Recalcula el resumen desde movimientos para un rango de días
+
+        Se ejecuta en una sola transacción: el INSERT ... SELECT bloquea los
+        movimientos leídos, así que las altas concurrentes esperan y el
+        resumen queda consistente.
+
+        Returns:
+            int: Registros de resumen escritos
+        """
+        delete_conditions, delete_params = _range_filter("dia", desde, hasta)
+        aggregate, params = self._aggregate_query(desde, hasta)
+        with self.db.transaction() as tx:
+            tx.execute("DELETE FROM consumo_diario"
+                       + (f" WHERE {' AND '.join(delete_conditions)}" if delete_conditions else ""),
+                       tuple(delete_params))
+            written = tx.execute(
+                "INSERT INTO consumo_diario (producto_id, dia, tipo, total_cantidad, num_movimientos) "
+                + aggregate, tuple(params))
+        logger.info(f"✅ Resumen diario reconstruido ({written} registros, rango {desde or '-'} a {hasta or '-'})")
+        return written
+
+    def check(self, desde=None, hasta=None):
+        """
+        Compara el resumen con el agregado real de movimientos
+
+        Returns:
+            list: Diferencias (producto_id, dia, tipo, esperado y resumen como
+                (total, movimientos)); vacía si son consistentes
+        """
+        aggregate, params = self._aggregate_query(desde, hasta)
+        summary_conditions, summary_params = _range_filter("dia", desde, hasta)
+        expected = {(row["producto_id"], row["dia"], row["tipo"]):
+                    (int(row["total_cantidad"]), int(row["num_movimientos"]))
+                    for row in self.db.fetch_all(aggregate, tuple(params), use_cache=False, use_primary=True)}
+        stored = {(row["producto_id"], row["dia"], row["tipo"]):
+                  (int(row["total_cantidad"]), int(row["num_movimientos"]))
+                  for row in self.db.fetch_all(
+                      "SELECT producto_id, dia, tipo, total_cantidad, num_movimientos FROM consumo_diario"
+                      + (f" WHERE {' AND '.join(summary_conditions)}" if summary_conditions else ""),
+                      tuple(summary_params), use_cache=False, use_primary=True)}
+
+        differences = []
+        for key in sorted(set(expected) | set(stored), key=lambda k: (k[1], k[0], k[2])):
+            if expected.get(key) != stored.get(key):
+                differences.append({"producto_id": key[0], "dia": key[1], "tipo": key[2],
+                                    "esperado": expected.get(key), "resumen": stored.get(key)})
+        if differences:
+            logger.warning(f"⚠️ Resumen diario inconsistente: {len(differences)} diferencias")
+        return differences
+
+
+def _end_of_day(day):
+    """Último instante de un día, para comparar con columnas DATETIME"""
+    if day is None:
+        return None
+    return datetime.combine(day, datetime.max.time())
+
+
+def _parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Resumen diario de movimientos")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("report", "Reporte de consumo por producto"),
+                            ("check", "Verificar el resumen contra movimientos"),
+                            ("rebuild", "Reconstruir el resumen desde movimientos")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--desde", type=_parse_date, default=None, help="Primer día (AAAA-MM-DD)")
+        command.add_argument("--hasta", type=_parse_date, default=None, help="Último día (AAAA-MM-DD)")
+        if name == "report":
+            command.add_argument("--tipo", default="salida", choices=["salida", "entrada"])
+            command.add_argument("--limit", type=int, default=10, help="Productos a mostrar (0 = todos)")
+    args = parser.parse_args(argv)
+
+    summary = ConsumptionSummary()
+    if args.command == "report":
+        for i, item in enumerate(summary.report(args.desde, args.hasta, args.tipo, args.limit), 1):
+            print(f"{i:>3}. {item['nombre']:<40} {item['total_consumido']:>10,} unidades "
+                  f"({item['num_movimientos']:,} movimientos)")
+        return 0
+
+    if args.command == "rebuild":
+        written = summary.rebuild(args.desde, args.hasta)
+        print(f"✅ Resumen reconstruido: {written:,} registros")
+        return 0
+
+    differences = summary.check(args.desde, args.hasta)
+    for item in differences[:50]:
+        print(f"❌ {item['dia']} producto {item['producto_id']} {item['tipo']}: "
+              f"movimientos {item['esperado']} / resumen {item['resumen']}")
+    if differences:
+        print(f"❌ {len(differences)} diferencias; reparar con: python -m src.summaries rebuild")
+        return 1
+    print("✅ El resumen diario coincide con los movimientos")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
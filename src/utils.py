@@ -1,11 +1,11 @@
-import pandas as pd
+import csv
 import os
 from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import seaborn as sns
 import logging
 
+# pandas, matplotlib y seaborn se importan dentro de las funciones que los usan:
+# cargarlos al inicio retrasa el arranque de la aplicación en más de un segundo
+
 # Configurar logging para utils
 logger = logging.getLogger('DataUtils')
 
@@ -18,8 +18,9 @@ class DataUtils:
         Exporta datos a un archivo Excel con formato profesional
         
         Args:
-            datos (list): Lista de tuplas o diccionarios con los datos
-            columnas (list): Nombres de las columnas
+            datos (list | DataFrame): Lista de tuplas o diccionarios, o un DataFrame
+                (por ejemplo de fetch_all(..., result_format="dataframe")) que se usa sin copiarlo
+            columnas (list): Nombres de las columnas (opcional con un DataFrame)
             nombre_archivo (str): Nombre del archivo (opcional)
         
         Returns:
@@ -35,9 +36,14 @@ class DataUtils:
         
         ruta_completa = os.path.join('data', nombre_archivo)
         
+        import pandas as pd
+        
         try:
-            # Crear DataFrame
-            df = pd.DataFrame(datos, columns=columnas)
+            # Crear DataFrame (o reutilizar el recibido)
+            if isinstance(datos, pd.DataFrame):
+                df = datos if columnas is None else datos.set_axis(list(columnas), axis=1)
+            else:
+                df = pd.DataFrame(datos, columns=columnas)
             
             # Crear writer de Excel
             with pd.ExcelWriter(ruta_completa, engine='openpyxl') as writer:
@@ -106,6 +112,84 @@ class DataUtils:
             logger.error(f"❌ Error al exportar a Excel: {e}")
             raise
     
+    @staticmethod
+    def exportar_a_excel_stream(filas, columnas, nombre_archivo=None, columnas_numericas=None):
+        """
+        Exporta filas a Excel en modo de sólo escritura, sin cargarlas en memoria
+        
+        Pensado para exportaciones grandes alimentadas por DatabaseConnection.fetch_iter:
+        cada fila se escribe en cuanto llega, así que la memoria usada es constante.
+        
+        Args:
+            filas (iterable): Iterable de listas/tuplas con los datos
+            columnas (list): Nombres de las columnas
+            nombre_archivo (str): Nombre del archivo (opcional)
+            columnas_numericas (list, optional): Columnas a las que aplicar formato numérico
+        
+        Returns:
+            tuple: (ruta del archivo generado, total de filas escritas)
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+        
+        os.makedirs('data', exist_ok=True)
+        
+        if not nombre_archivo:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            nombre_archivo = f"reporte_inventario_{timestamp}.xlsx"
+        
+        ruta_completa = os.path.join('data', nombre_archivo)
+        
+        try:
+            workbook = Workbook(write_only=True)
+            worksheet = workbook.create_sheet("Reporte")
+            
+            # En modo streaming el ancho se fija antes de escribir las filas
+            for idx, column in enumerate(columnas):
+                worksheet.column_dimensions[chr(65 + idx)].width = min(max(len(column) + 2, 15), 50)
+            
+            # Cabeceras con el mismo formato que exportar_a_excel
+            header_font = Font(bold=True, color="FFFFFF")
+            header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+            header_alignment = Alignment(horizontal="center", vertical="center")
+            
+            cabeceras = []
+            for column_title in columnas:
+                cell = WriteOnlyCell(worksheet, value=column_title)
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = header_alignment
+                cabeceras.append(cell)
+            worksheet.append(cabeceras)
+            
+            numericas = {columnas.index(c) for c in (columnas_numericas or []) if c in columnas}
+            
+            total = 0
+            for fila in filas:
+                if numericas:
+                    fila = list(fila)
+                    for idx in numericas:
+                        if isinstance(fila[idx], (int, float)):
+                            cell = WriteOnlyCell(worksheet, value=fila[idx])
+                            cell.number_format = '#,##0.00'
+                            fila[idx] = cell
+                worksheet.append(fila)
+                total += 1
+            
+            summary_sheet = workbook.create_sheet("Resumen")
+            summary_sheet.append(["Reporte Generado el:", datetime.now().strftime("%d/%m/%Y %H:%M:%S")])
+            summary_sheet.append(["Total de Registros:", total])
+            
+            workbook.save(ruta_completa)
+            
+            logger.info(f"✅ Reporte exportado en streaming a {ruta_completa} ({total} filas)")
+            return ruta_completa, total
+            
+        except Exception as e:
+            logger.error(f"❌ Error al exportar a Excel en streaming: {e}")
+            raise
+    
     @staticmethod
     def generar_grafico_stock(tipos, cantidades, parent_frame):
         """
@@ -119,6 +203,10 @@ class DataUtils:
         Returns:
             FigureCanvasTkAgg: Canvas con el gráfico listo para mostrar
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
         try:
             # Configurar estilo
             plt.style.use('seaborn-v0_8')
@@ -178,6 +266,30 @@ class DataUtils:
         except ValueError:
             return False, "El valor debe ser un número entero válido"
     
+    @staticmethod
+    def parsear_fecha(texto):
+        """
+        Convierte una fecha escrita como DD/MM/AAAA (o AAAA-MM-DD)
+        
+        Args:
+            texto (str): Fecha escrita por el usuario; vacío significa sin límite
+        
+        Returns:
+            date: Fecha convertida o None si el texto está vacío
+        
+        Raises:
+            ValueError: Si el texto no es una fecha válida
+        """
+        texto = (texto or "").strip()
+        if not texto:
+            return None
+        for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(texto, formato).date()
+            except ValueError:
+                continue
+        raise ValueError(f"Fecha no válida: {texto} (use DD/MM/AAAA)")
+    
     @staticmethod
     def formatear_moneda(valor):
         """
@@ -238,6 +350,82 @@ class DataUtils:
             "fecha_generacion": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
         }
 
+    # Alias aceptados en las cabeceras de los archivos de importación
+    ALIAS_COLUMNAS_MOVIMIENTOS = {
+        "producto_id": "producto_id",
+        "id producto": "producto_id",
+        "id_producto": "producto_id",
+        "tipo": "tipo",
+        "cantidad": "cantidad",
+        "responsable": "responsable",
+        "motivo": "motivo",
+        "fecha": "fecha"
+    }
+    
+    @staticmethod
+    def leer_movimientos_archivo(ruta_archivo):
+        """
+        Lee movimientos desde un archivo CSV o XLSX fila por fila
+        
+        Las filas se generan de forma perezosa para que archivos grandes no se
+        carguen completos en memoria.
+        
+        Args:
+            ruta_archivo (str): Ruta del archivo .csv o .xlsx
+        
+        Yields:
+            dict: Movimiento con las claves producto_id, tipo, cantidad,
+                responsable, motivo y fecha (si existe la columna)
+        """
+        extension = os.path.splitext(ruta_archivo)[1].lower()
+        
+        def normalizar_cabeceras(cabeceras):
+            return [DataUtils.ALIAS_COLUMNAS_MOVIMIENTOS.get(str(c or "").strip().lower())
+                    for c in cabeceras]
+        
+        if extension == ".csv":
+            with open(ruta_archivo, newline='', encoding='utf-8-sig') as archivo:
+                lector = csv.reader(archivo)
+                cabeceras = normalizar_cabeceras(next(lector, []))
+                for fila in lector:
+                    yield {c: v for c, v in zip(cabeceras, fila) if c and v != ""}
+        
+        elif extension in (".xlsx", ".xlsm"):
+            from openpyxl import load_workbook
+            
+            libro = load_workbook(ruta_archivo, read_only=True, data_only=True)
+            try:
+                filas = libro.active.iter_rows(values_only=True) # type: ignore[union-attr]
+                cabeceras = normalizar_cabeceras(next(filas, ()))
+                for fila in filas:
+                    yield {c: v for c, v in zip(cabeceras, fila) if c and v is not None}
+            finally:
+                libro.close()
+        else:
+            raise ValueError(f"Formato de archivo no soportado: {extension}")
+    
+    @staticmethod
+    def importar_movimientos(ruta_archivo, db, chunk_size=1000, progress_callback=None):
+        """
+        Importa movimientos desde CSV/XLSX usando la carga masiva por bloques
+        
+        Args:
+            ruta_archivo (str): Ruta del archivo a importar
+            db (DatabaseConnection): Conexión a la base de datos
+            chunk_size (int): Filas por bloque/commit
+            progress_callback (callable, optional): Recibe estadísticas de cada bloque
+        
+        Returns:
+            dict: Resumen devuelto por DatabaseConnection.bulk_insert_movements
+        """
+        logger.info(f"📥 Importando movimientos desde {ruta_archivo}")
+        resumen = db.bulk_insert_movements(
+            DataUtils.leer_movimientos_archivo(ruta_archivo),
+            chunk_size=chunk_size,
+            progress_callback=progress_callback
+        )
+        return resumen
+
 # Función auxiliar para validaciones simples
 def safe_int_conversion(valor, default=0):
     """Convierte un valor a entero de forma segura"""
@@ -0,0 +1,493 @@
+"""
+Tablas virtuales para catálogos grandes
+
+VirtualTreeview dibuja en un ttk.Treeview solo las filas visibles: mantiene
+tantos elementos como caben en pantalla y, al desplazarse, reescribe sus
+valores con la ventana de filas que toca. Refrescar o desplazarse cuesta lo
+mismo con cien filas que con cien mil.
+
+Las filas salen de un origen de datos:
+
+- ListRowSource: filas ya cargadas en memoria (la tabla de stock, que el
+  índice de búsqueda necesita completa); ordena en el propio modelo
+- QueryRowSource: páginas de una consulta (la tabla de productos); cuenta con
+  COUNT(*), pide cada página con LIMIT/OFFSET y ordena en el servidor
+"""
+import logging
+import tkinter as tk
+from collections import OrderedDict
+
+logger = logging.getLogger('VirtualGrid')
+
+
+def _sort_key(value):
+    """Clave de orden: texto sin distinguir mayúsculas"""
+    return value.casefold() if isinstance(value, str) else value
+
+
+class ListRowSource:
+    """
+    Origen de filas en memoria
+
+    Args:
+        rows (list): Filas (diccionarios) en el orden por defecto
+        sort_keys (dict): Columna de la tabla -> campo de la fila por el que ordena
+    """
+
+    local = True
+
+    def __init__(self, rows=(), sort_keys=None):
+        self.sort_keys = dict(sort_keys or {})
+        self.sort_column = None
+        self.descending = False
+        self._original = list(rows)
+        self._rows = self._original
+
+    def set_rows(self, rows):
+        """Reemplaza las filas manteniendo el orden elegido"""
+        self._original = list(rows)
+        self._apply_sort()
+
+    def sortable(self, column):
+        return column in self.sort_keys
+
+    def sort(self, column, descending=False):
+        """Ordena por una columna; None vuelve al orden en que llegaron las filas"""
+        self.sort_column = column
+        self.descending = descending
+        self._apply_sort()
+
+    def _apply_sort(self):
+        if self.sort_column is None:
+            self._rows = self._original
+            return
+        field = self.sort_keys[self.sort_column]
+        # Las filas sin valor quedan al final en los dos sentidos
+        present = [row for row in self._original if row.get(field) is not None]
+        missing = [row for row in self._original if row.get(field) is None]
+        self._rows = sorted(present, key=lambda row: _sort_key(row[field]),
+                            reverse=self.descending) + missing
+
+    def count(self):
+        return len(self._rows)
+
+    def fetch(self, offset, limit):
+        return self._rows[offset:offset + limit]
+
+
+class QueryRowSource:
+    """
+    Origen de filas paginado desde la base de datos
+
+    La consulta base no lleva ORDER BY: el origen añade el orden elegido (con
+    la clave como desempate para que las páginas sean estables) y LIMIT/OFFSET.
+    Solo se ordena por las columnas de sort_keys, cuyas expresiones se
+    insertan tal cual en la consulta.
+
+    Args:
+        db (DatabaseConnection): Conexión a usar
+        query (str): SELECT base sin ORDER BY ni LIMIT
+        sort_keys (dict): Columna de la tabla -> expresión SQL por la que ordena
+        default_order (str): Expresión del orden por defecto
+        key (str): Columna única usada como desempate
+        params (tuple, optional): Parámetros de la consulta base
+    """
+
+    local = False
+
+    def __init__(self, db, query, sort_keys, default_order, key, params=()):
+        self.db = db
+        self.query = query.strip().rstrip(";")
+        self.sort_keys = dict(sort_keys)
+        self.default_order = default_order
+        self.key = key
+        self.params = tuple(params)
+        self.sort_column = None
+        self.descending = False
+
+    def sortable(self, column):
+        return column in self.sort_keys
+
+    def sort(self, column, descending=False):
+        self.sort_column = column
+        self.descending = descending
+
+    def _order_by(self):
+        if self.sort_column is None:
+            return f"{self.default_order}, {self.key}"
+        direction = "DESC" if self.descending else "ASC"
+        expression = self.sort_keys[self.sort_column]
+        if expression == self.key:
+            return f"{expression} {direction}"
+        return f"{expression} {direction}, {self.key} {direction}"
+
+    def count_query(self):
+        """Par (query, params) que devuelve el total de filas en la columna total"""
+        return f"SELECT COUNT(*) AS total FROM ({self.query}) filas", self.params
+
+    def page_query(self, offset, limit):
+        """Par (query, params) con las filas [offset, offset + limit) en el orden elegido"""
+        return (f"{self.query} ORDER BY {self._order_by()} LIMIT %s OFFSET %s",
+                self.params + (int(limit), int(offset)))
+
+    def count(self):
+        result = self.db.fetch_one(*self.count_query())
+        return result["total"] if result else 0
+
+    def fetch(self, offset, limit):
+        return self.db.fetch_all(*self.page_query(offset, limit))
+
+
+class VirtualTreeview:
+    """
+    Ventana virtual sobre un ttk.Treeview
+
+    La tabla conserva un elemento por fila visible y la barra de
+    desplazamiento representa el total de filas del origen. Con un origen
+    remoto las páginas se piden en segundo plano (BackgroundRunner) y se
+    guardan en una caché LRU; mientras llegan, las filas se muestran como
+    "Cargando...". Pulsar un encabezado ordena por esa columna (el segundo
+    clic invierte el orden).
+
+    Args:
+        tree (ttk.Treeview): Tabla ya configurada (columnas y encabezados)
+        scrollbar (ttk.Scrollbar): Barra vertical de la tabla
+        source: ListRowSource o QueryRowSource
+        formatter (callable): fila -> (valores, etiquetas) para la tabla
+        key (str): Campo que identifica la fila (para conservar la selección)
+        runner (BackgroundRunner, optional): Para pedir páginas remotas sin
+            bloquear la interfaz; sin él se piden en el momento
+        name (str): Prefijo de las tareas en segundo plano
+        page_size (int): Filas por página remota
+        max_pages (int): Páginas remotas en caché
+        message_column (int): Columna donde se muestran los avisos
+        on_error (callable, optional): Recibe los errores al pedir páginas
+    """
+
+    WHEEL_ROWS = 3
+
+    def __init__(self, tree, scrollbar, source, formatter, key, runner=None, name="grid",
+                 page_size=200, max_pages=16, message_column=1, on_error=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.source = source
+        self.formatter = formatter
+        self.key = key
+        self.runner = runner
+        self.name = name
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.message_column = message_column
+        self.on_error = on_error
+        self.empty_message = None
+
+        self.total = 0
+        self.first = 0
+        self.visible = 20
+        self._measured = False
+        self._slots = []
+        self._window = []
+        self._pages = OrderedDict()
+        self._pending = None
+        self._epoch = 0
+        self._selected_index = None
+        self._selected_key = None
+        self._columns = tuple(tree["columns"])
+        self._headings = {column: tree.heading(column, "text") for column in self._columns}
+
+        # La barra sigue a la ventana virtual, no a los elementos de la tabla
+        tree.configure(yscrollcommand="")
+        scrollbar.configure(command=self.yview)
+        for column in self._columns:
+            if source.sortable(column):
+                tree.heading(column, command=lambda c=column: self.sort_by(c))
+
+        tree.tag_configure("loading", foreground="#888888")
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        tree.bind("<MouseWheel>", self._on_wheel)
+        tree.bind("<Button-4>", lambda e: self._scroll_rows(-self.WHEEL_ROWS))
+        tree.bind("<Button-5>", lambda e: self._scroll_rows(self.WHEEL_ROWS))
+        tree.bind("<Up>", lambda e: self._move_selection(-1))
+        tree.bind("<Down>", lambda e: self._move_selection(1))
+        tree.bind("<Prior>", lambda e: self._move_selection(-self._page_step()))
+        tree.bind("<Next>", lambda e: self._move_selection(self._page_step()))
+        tree.bind("<Home>", lambda e: self._select_index(0))
+        tree.bind("<End>", lambda e: self._select_index(self.total - 1))
+
+    # --- Datos -------------------------------------------------------------
+
+    def set_rows(self, rows, empty_message=None):
+        """Reemplaza las filas de un origen en memoria y vuelve a dibujar"""
+        self.empty_message = empty_message
+        self.source.set_rows(rows)
+        self.total = self.source.count()
+        self._render()
+
+    def refresh_request(self):
+        """
+        Refresco de un origen remoto para enviar en el mismo lote que otras
+        vistas: el total de filas y las páginas de la ventana actual
+
+        Returns:
+            tuple: (consultas, aplicar) donde consultas son pares (query,
+                params) para fetch_batch y aplicar(resultados) dibuja la tabla
+        """
+        first_page, last_page = self._page_range(self.first, self.first + self.visible)
+        queries = [self.source.count_query(),
+                   self.source.page_query(first_page * self.page_size,
+                                          (last_page - first_page + 1) * self.page_size)]
+
+        epoch = self._epoch
+
+        def apply(results):
+            count_rows, rows = results
+            self.total = count_rows[0]["total"] if count_rows else 0
+            # Si se reordenó mientras tanto las páginas recibidas no sirven
+            stale = epoch != self._epoch
+            self._reset_pages()
+            if not stale:
+                self._store_pages(first_page, rows)
+            self._render()
+
+        return queries, apply
+
+    def sort_by(self, column):
+        """Ordena por una columna; repetir sobre la misma invierte el orden"""
+        if not self.source.sortable(column):
+            return
+        descending = self.source.sort_column == column and not self.source.descending
+        self.source.sort(column, descending)
+        for name, text in self._headings.items():
+            arrow = (" ▼" if descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=text + arrow)
+        self._reset_pages()
+        self.first = 0
+        self._render()
+
+    def selected_row(self):
+        """Fila seleccionada si está en la ventana visible, o None"""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._slots:
+            return None
+        position = self._slots.index(selection[0])
+        return self._window[position] if position < len(self._window) else None
+
+    def _reset_pages(self):
+        self._epoch += 1
+        self._pages.clear()
+        self._pending = None
+        if self.runner is not None:
+            self.runner.cancel(f"{self.name}:pages")
+
+    # --- Páginas remotas ---------------------------------------------------
+
+    def _page_range(self, start, end):
+        return start // self.page_size, max(start, end - 1) // self.page_size
+
+    def _store_pages(self, first_page, rows):
+        for number in range(0, max(1, -(-len(rows) // self.page_size))):
+            self._pages[first_page + number] = rows[number * self.page_size:(number + 1) * self.page_size]
+            self._pages.move_to_end(first_page + number)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def _request_pages(self, first_page, last_page):
+        """
+        Pide en una sola consulta las páginas que faltan para la ventana
+
+        Returns:
+            bool: True si las páginas ya están guardadas (sin runner)
+        """
+        if self._pending == (first_page, last_page):
+            return False
+        self._pending = (first_page, last_page)
+        epoch = self._epoch
+        offset = first_page * self.page_size
+        limit = (last_page - first_page + 1) * self.page_size
+
+        def loaded(rows):
+            if epoch != self._epoch:
+                return
+            self._pending = None
+            self._store_pages(first_page, rows)
+            self._render()
+
+        def failed(error):
+            self._pending = None
+            logger.error(f"❌ Error al cargar filas de {self.name}: {error}")
+            if self.on_error:
+                self.on_error(error)
+
+        if self.runner is None:
+            # Sin hilo secundario las páginas se piden ya y la ventana se lee de nuevo
+            self._pending = None
+            self._store_pages(first_page, self.source.fetch(offset, limit))
+            return True
+        self.runner.submit(f"{self.name}:pages", lambda: self.source.fetch(offset, limit),
+                           loaded, failed)
+        return False
+
+    def _window_rows(self):
+        """Filas de la ventana visible; None en las que aún no han llegado"""
+        end = min(self.total, self.first + self.visible)
+        if self.source.local:
+            return list(self.source.fetch(self.first, end - self.first))
+
+        rows, missing = [], []
+        for index in range(self.first, end):
+            number, position = divmod(index, self.page_size)
+            page = self._pages.get(number)
+            if page is None:
+                rows.append(None)
+                missing.append(number)
+            elif position < len(page):
+                rows.append(page[position])
+            else:
+                # El total cambió desde el último refresco
+                break
+        for number in {index // self.page_size for index in range(self.first, end)} & set(self._pages):
+            self._pages.move_to_end(number)
+        if missing and self._request_pages(min(missing), max(missing)):
+            return self._window_rows()
+        return rows
+
+    # --- Dibujo ------------------------------------------------------------
+
+    def _message_values(self, message):
+        values = [""] * len(self._columns)
+        values[self.message_column] = message
+        return tuple(values)
+
+    def _ensure_slots(self, count):
+        while len(self._slots) < count:
+            self._slots.append(self.tree.insert("", tk.END))
+        if len(self._slots) > count:
+            self.tree.delete(*self._slots[count:])
+            del self._slots[count:]
+
+    def _render(self):
+        """Escribe la ventana actual en los elementos de la tabla"""
+        self.first = max(0, min(self.first, self.total - self.visible))
+        self._window = self._window_rows()
+
+        if not self._window and self.empty_message:
+            self._ensure_slots(1)
+            self.tree.item(self._slots[0], values=self._message_values(self.empty_message), tags=())
+        else:
+            self._ensure_slots(len(self._window))
+            for slot, row in zip(self._slots, self._window):
+                if row is None:
+                    self.tree.item(slot, values=self._message_values("Cargando..."), tags=("loading",))
+                else:
+                    values, tags = self.formatter(row)
+                    self.tree.item(slot, values=values, tags=tags)
+
+        self._restore_selection()
+        if self.total:
+            self.scrollbar.set(self.first / self.total, min(1.0, (self.first + self.visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _restore_selection(self):
+        """Selecciona el elemento que muestra la fila seleccionada, si está visible"""
+        target = None
+        for position, row in enumerate(self._window):
+            if row is None:
+                continue
+            if self._selected_key is not None and row.get(self.key) == self._selected_key:
+                target = position
+                break
+            if self._selected_key is None and self._selected_index == self.first + position:
+                target = position
+                self._selected_key = row.get(self.key)
+                break
+        if target is None:
+            if self.tree.selection():
+                self.tree.selection_set(())
+            return
+        self._selected_index = self.first + target
+        slot = self._slots[target]
+        if self.tree.selection() != (slot,):
+            self.tree.selection_set(slot)
+        self.tree.focus(slot)
+
+    # --- Desplazamiento ----------------------------------------------------
+
+    def _rows_that_fit(self):
+        height = self.tree.winfo_height()
+        bbox = self.tree.bbox(self._slots[0]) if self._slots else ""
+        if bbox:
+            self._measured = True
+            _, top, _, row_height = bbox
+        else:
+            # Aún sin dibujar: alto de fila del tema y encabezado de una fila
+            row_height = int(str(self.tree.tk.call("ttk::style", "lookup", "Treeview", "-rowheight")) or 20)
+            top = row_height + 4
+        return max(1, (height - top) // max(1, row_height))
+
+    def _on_configure(self, event=None):
+        visible = self._rows_that_fit()
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+        # Con la tabla recién mostrada el alto de fila es estimado: se vuelve
+        # a medir una vez dibujada
+        if event is not None and not self._measured and self._slots:
+            self.tree.after_idle(self._on_configure)
+
+    def yview(self, *args):
+        """Comando de la barra de desplazamiento (moveto y scroll)"""
+        if not args:
+            return (self.first / self.total, min(1.0, (self.first + self.visible) / self.total)) \
+                if self.total else (0.0, 1.0)
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = self._page_step() if args[2] == "pages" else 1
+            self.scroll_to(self.first + int(args[1]) * step)
+
+    def scroll_to(self, first):
+        """Coloca la fila first en lo alto de la tabla"""
+        first = max(0, min(int(first), self.total - self.visible))
+        if first != self.first:
+            self.first = first
+            self._render()
+
+    def _page_step(self):
+        return max(1, self.visible - 1)
+
+    def _scroll_rows(self, rows):
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def _on_wheel(self, event):
+        notches = event.delta / 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        return self._scroll_rows(-int(notches * self.WHEEL_ROWS))
+
+    # --- Selección ---------------------------------------------------------
+
+    def _on_select(self, event=None):
+        """Recuerda la fila elegida con el ratón para conservarla al desplazarse"""
+        row = self.selected_row()
+        if row is not None:
+            self._selected_key = row.get(self.key)
+            self._selected_index = self.first + self._slots.index(self.tree.selection()[0])
+
+    def _select_index(self, index):
+        if self.total == 0:
+            return "break"
+        index = max(0, min(index, self.total - 1))
+        self._selected_index = index
+        self._selected_key = None
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.visible:
+            self.first = index - self.visible + 1
+        self._render()
+        return "break"
+
+    def _move_selection(self, step):
+        if self._selected_index is None:
+            return self._select_index(self.first)
+        return self._select_index(self._selected_index + step)